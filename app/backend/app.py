@@ -3,14 +3,35 @@ Flask Backend for Household Energy Survey
 Handles web server, API endpoints, and MongoDB integration
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
+import atexit
+import gzip
+import hashlib
+import hmac
+import itertools
+import json
+import math
+import mimetypes
 import os
+import queue
+import re
+import threading
+import time
+import numpy as np
+from collections import OrderedDict, deque
+from bson import ObjectId
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import ASCENDING, IndexModel, MongoClient
+from pymongo.errors import BulkWriteError, ConnectionFailure
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:  # Optional: assets are served gzip-compressed only
+    brotli = None
+
 # Import the proper energy models
 from models.refrigerator import Refrigerator
 from models.air_conditioner import AirConditioner
@@ -43,95 +64,574 @@ if os.getenv('DISABLE_MONGODB') == '1':
     client = None
     db = None
     surveys_collection = None
+    stats_collection = None
     print("MongoDB disabled by environment.")
 else:
     try:
         client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=3000)
         db = client['household_energy']
         surveys_collection = db['surveys']
+        stats_collection = db['survey_stats']
         print("MongoDB client initialized.")
     except Exception as e:
         print(f"MongoDB connection error: {e}")
         client = None
         db = None
         surveys_collection = None
+        stats_collection = None
+
+class MongoHealthProbe:
+    """
+    Pings MongoDB from a background thread and caches the outcome, so /health can
+    answer from memory instead of waiting on a server-selection timeout.
+    """
+
+    def __init__(self, ping, interval=10.0):
+        self.ping = ping  # Raises when the database is unreachable
+        self.interval = interval
+        self.connected = None  # Unknown until the first probe completes
+        self.last_checked = None
+        self.latency_ms = None
+        self.error = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def check(self):
+        started = time.perf_counter()
+        try:
+            self.ping()
+            connected, error = True, None
+        except Exception as e:
+            connected, error = False, str(e)
+        if connected != self.connected:
+            print(f"MongoDB {'reachable' if connected else f'ping failed: {error}'}")
+        self.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.connected, self.error = connected, error
+        self.last_checked = datetime.now()
+        return connected
+
+    def ensure_started(self):
+        # Also restarts the thread in a forked worker, where it does not survive the fork
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='mongodb-health', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        self.check()
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            'state': {True: 'connected', False: 'disconnected', None: 'unknown'}[self.connected],
+            'last_checked': self.last_checked.isoformat() if self.last_checked else None,
+            'latency_ms': self.latency_ms,
+            'error': self.error
+        }
+
+if client is not None:
+    mongodb_health = MongoHealthProbe(
+        lambda: client.admin.command('ping'),
+        interval=float(os.getenv('MONGODB_HEALTH_INTERVAL', 10))
+    )
+    mongodb_health.ensure_started()
+else:
+    mongodb_health = None
+
+# ==================== MONGODB CIRCUIT BREAKER ====================
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling MongoDB while the circuit is open"""
+
+class CircuitBreaker:
+    """
+    Circuit breaker for MongoDB operations.
+
+    closed: calls go through; failure_threshold consecutive connection failures open it.
+    open: calls fail immediately with CircuitOpenError for reset_timeout seconds.
+    half_open: one probe call is let through; success closes the circuit, failure reopens it.
+
+    Only trip_on exceptions count as failures, so errors from a reachable server
+    (duplicate keys, bad queries) do not open the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, trip_on=(ConnectionFailure,), history=20):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trip_on = trip_on
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at = None
+        self.transitions = deque(maxlen=history)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state, reason):
+        # Called with the lock held
+        self.transitions.append({
+            'from': self.state,
+            'to': state,
+            'at': datetime.now().isoformat(),
+            'reason': reason
+        })
+        print(f"MongoDB circuit {self.state} -> {state} ({reason})")
+        self.state = state
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
 
-def is_mongodb_connected():
-    if client is None:
-        return False
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN, 'reset timeout elapsed')
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probing):
+                self.rejected += 1
+                raise CircuitOpenError('Database unavailable (circuit open)')
+            if self.state == self.HALF_OPEN:
+                self._probing = True
+
+    def _after_call(self, error):
+        with self._lock:
+            self._probing = False
+            if error is None:
+                self.failures = 0
+                if self.state != self.CLOSED:
+                    self._transition(self.CLOSED, 'probe succeeded')
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self._transition(self.OPEN, f'probe failed: {error}')
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._transition(self.OPEN, f'{self.failures} consecutive failures: {error}')
+
+    def allow(self, count_rejection=True):
+        """True if a call would currently be let through (does not count as a probe)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                allowed = time.monotonic() - self.opened_at >= self.reset_timeout
+            else:
+                allowed = not (self.state == self.HALF_OPEN and self._probing)
+            if not allowed and count_rejection:
+                self.rejected += 1
+            return allowed
+
+    def record_failure(self, error):
+        """Counts a trip_on error raised outside call(), e.g. while a streamed cursor is iterated"""
+        if isinstance(error, self.trip_on):
+            self._after_call(error)
+
+    def call(self, operation, *args, **kwargs):
+        self._before_call()
+        try:
+            result = operation(*args, **kwargs)
+        except self.trip_on as e:
+            self._after_call(e)
+            raise
+        except BaseException:
+            self._after_call(None)  # The server answered, so the connection is fine
+            raise
+        self._after_call(None)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'rejected': self.rejected,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'transitions': list(self.transitions)
+            }
+
+# MONGODB_BREAKER_THRESHOLD consecutive connection failures open the circuit for
+# MONGODB_BREAKER_RESET seconds, after which a single request probes the database.
+mongodb_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('MONGODB_BREAKER_THRESHOLD', 5)),
+    reset_timeout=float(os.getenv('MONGODB_BREAKER_RESET', 30))
+)
+
+def database_unavailable():
+    """503 response for requests turned away while the MongoDB circuit is open"""
+    return jsonify({'error': 'Database unavailable, please retry'}), 503, {'Retry-After': str(int(mongodb_breaker.reset_timeout))}
+
+# ==================== SURVEY INDEXES ====================
+
+# Indexes backing the survey read paths: keyset paging on (submitted_at, _id) and
+# the city, pincode and home type fields used by analytics and statistics
+SURVEY_INDEXES = [
+    IndexModel([('submitted_at', ASCENDING), ('_id', ASCENDING)], name='submitted_at_id'),
+    IndexModel([('Q1_City', ASCENDING), ('submitted_at', ASCENDING)], name='city_submitted_at'),
+    IndexModel([('Q1_Pincode', ASCENDING)], name='pincode'),
+    IndexModel([('Q3_home_type', ASCENDING)], name='home_type'),
+]
+
+def ensure_survey_indexes(collection):
+    """Create any missing survey indexes (create_indexes is a no-op for existing ones)"""
+    return collection.create_indexes(SURVEY_INDEXES)
+
+def survey_index_usage(collection):
+    """Per-index operation counts since the server started tracking them ($indexStats)"""
+    return [
+        {
+            'name': stats['name'],
+            'key': dict(stats['key']),
+            'ops': stats['accesses']['ops'],
+            'since': stats['accesses']['since'].isoformat()
+        }
+        for stats in collection.aggregate([{'$indexStats': {}}])
+    ]
+
+def _create_survey_indexes_at_startup():
     try:
-        client.admin.command('ping')
-        return True
+        names = mongodb_breaker.call(ensure_survey_indexes, surveys_collection)
+        print(f"Survey indexes ready: {', '.join(names)}")
     except Exception as e:
-        print(f"MongoDB ping failed: {e}")
-        return False
+        print(f"Could not create survey indexes: {e}")
+
+# Runs in the background so an unreachable database does not hold up startup
+if surveys_collection is not None and os.getenv('SURVEY_CREATE_INDEXES', '1') == '1':
+    threading.Thread(target=_create_survey_indexes_at_startup, name='survey-indexes', daemon=True).start()
+
+# ==================== SURVEY STATISTICS ====================
+
+# Dataset-wide survey statistics live in a single rollup document that every saved
+# survey bumps with $inc, so reading them costs the same however many surveys exist.
+SURVEY_STATS_ID = 'totals'
+STATS_REBUILD_BATCH = 1000
+
+def _stats_key(value):
+    """Group name usable as a MongoDB field name (no '.', no leading '$')"""
+    key = str(value).strip() if value is not None else ''
+    if not key:
+        return 'Unknown'
+    key = key.replace('.', '\uff0e')
+    return '\uff04' + key[1:] if key.startswith('$') else key
+
+def _stats_label(key):
+    return key.replace('\uff0e', '.').replace('\uff04', '$')
+
+def survey_stats_increments(documents):
+    """Combined $inc for adding these surveys to the rollup"""
+    increments = {}
+
+    def bump(field, amount=1):
+        increments[field] = increments.get(field, 0) + amount
+
+    for document in documents:
+        bump('total')
+        submitted_at = document.get('submitted_at')
+        day = submitted_at.strftime('%Y-%m-%d') if isinstance(submitted_at, datetime) else None
+        bump(f"by_day.{_stats_key(day)}")
+        bump(f"by_city.{_stats_key(document.get('Q1_City'))}")
+        bump(f"by_home_type.{_stats_key(document.get('Q3_home_type'))}")
+        adults = document.get('Q2_num_adults')
+        if isinstance(adults, bool):
+            continue
+        try:
+            adults = float(adults)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(adults) and adults >= 0:
+            bump('adults_sum', adults)
+            bump('adults_count')
+    return increments
+
+def record_survey_stats(documents):
+    """Adds saved surveys to the rollup; a failure here never fails the submission itself"""
+    if stats_collection is None or not documents:
+        return
+    try:
+        mongodb_breaker.call(
+            stats_collection.update_one,
+            {'_id': SURVEY_STATS_ID},
+            {'$inc': survey_stats_increments(documents), '$set': {'updated_at': datetime.now()}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Could not update survey statistics: {e}")
+
+def rebuild_survey_stats():
+    """
+    Recomputes the rollup from every stored survey and replaces it.
+    Surveys saved while the rebuild is running may be missed or counted twice.
+    """
+    fields = {'_id': 0, 'submitted_at': 1, 'Q1_City': 1, 'Q2_num_adults': 1, 'Q3_home_type': 1}
+    totals = {}
+    surveys = iter(surveys_collection.find({}, fields).batch_size(STATS_REBUILD_BATCH))
+    for batch in iter(lambda: list(itertools.islice(surveys, STATS_REBUILD_BATCH)), []):
+        for field, amount in survey_stats_increments(batch).items():
+            totals[field] = totals.get(field, 0) + amount
+
+    rollup = {'_id': SURVEY_STATS_ID, 'updated_at': datetime.now()}
+    for field, amount in totals.items():
+        group, _, key = field.partition('.')
+        if key:
+            rollup.setdefault(group, {})[key] = amount
+        else:
+            rollup[field] = amount
+    stats_collection.replace_one({'_id': SURVEY_STATS_ID}, rollup, upsert=True)
+    return rollup
+
+def format_survey_stats(rollup):
+    rollup = rollup or {}
+    adults_count = rollup.get('adults_count', 0)
+
+    def groups(name):
+        return {_stats_label(key): count for key, count in sorted(rollup.get(name, {}).items())}
+
+    updated_at = rollup.get('updated_at')
+    return {
+        'total_surveys': rollup.get('total', 0),
+        'per_day': groups('by_day'),
+        'per_city': groups('by_city'),
+        'per_home_type': groups('by_home_type'),
+        'average_adults': round(rollup.get('adults_sum', 0) / adults_count, 2) if adults_count else None,
+        'updated_at': updated_at.isoformat() if isinstance(updated_at, datetime) else None
+    }
+
+# ==================== SURVEY WRITE BUFFER ====================
+
+class _PendingWrite:
+    def __init__(self, document):
+        self.document = document
+        self.error = None
+        self.done = threading.Event()
+
+class SurveyWriteBuffer:
+    """
+    Write-behind buffer for survey submissions.
+
+    Submissions go into a bounded in-process queue and a background thread drains it
+    with insert_many(ordered=False) whenever flush_batch documents are waiting or
+    flush_interval seconds have passed since the oldest one was queued. A full queue
+    pushes back on submitters, and whatever is still queued is flushed on shutdown.
+    """
+
+    def __init__(self, get_collection, queue_size=10000, flush_batch=100, flush_interval=1.0, on_written=None):
+        self.get_collection = get_collection
+        self.on_written = on_written  # Called with the documents saved by each batch
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, document, timeout=None):
+        """Queues a document, blocking up to timeout seconds while the queue is full (raises queue.Full)."""
+        if self._closed.is_set():
+            raise RuntimeError('Survey write buffer is closed')
+        self._ensure_started()
+        pending = _PendingWrite(document)
+        self._queue.put(pending, timeout=timeout)
+        return pending
+
+    def _ensure_started(self):
+        # Started on first use so that each gunicorn worker runs its own flusher
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='survey-write-buffer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not (self._closed.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._wait_for_database()
+                self._write(batch)
+
+    def _wait_for_database(self):
+        # Hold the batch while the MongoDB circuit is open rather than failing it outright
+        while not mongodb_breaker.allow(count_rejection=False) and not self._closed.wait(self.flush_interval):
+            pass
+
+    def _next_batch(self):
+        # A None entry is the wake-up close() sends to a flusher waiting on an empty queue
+        try:
+            pending = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [] if pending is None else [pending]
+        deadline = time.monotonic() + self.flush_interval
+        while pending is not None and len(batch) < self.flush_batch:
+            remaining = 0 if self._closed.is_set() else deadline - time.monotonic()
+            try:
+                pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                batch.append(pending)
+        return batch
+
+    def _write(self, batch):
+        errors = {}
+        try:
+            mongodb_breaker.call(
+                self.get_collection().insert_many, [pending.document for pending in batch], ordered=False
+            )
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                errors[write_error['index']] = write_error.get('errmsg', 'Write error')
+        except Exception as e:
+            errors = {index: str(e) for index in range(len(batch))}
+
+        for index, pending in enumerate(batch):
+            pending.error = errors.get(index)
+            pending.done.set()
+        self.batches += 1
+        self.failed += len(errors)
+        self.written += len(batch) - len(errors)
+        if self.on_written is not None and len(errors) < len(batch):
+            self.on_written([pending.document for index, pending in enumerate(batch) if index not in errors])
+        if errors:
+            print(f"Survey write buffer: {len(errors)} of {len(batch)} documents failed to save")
+
+    def flush(self):
+        """Synchronously writes everything still queued."""
+        batch = []
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                batch.append(pending)
+            if len(batch) == self.flush_batch:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def close(self, timeout=None):
+        """Stops accepting submissions and flushes the queue."""
+        self._closed.set()
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass  # The flusher has work queued, so it is not waiting
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches
+        }
+
+# SURVEY_WRITE_MODE=buffered enables the write-behind buffer. SURVEY_WRITE_ACK chooses
+# when a submission is acknowledged: 'queued' (once buffered) or 'flushed' (once saved).
+SURVEY_WRITE_MODE = os.getenv('SURVEY_WRITE_MODE', 'sync')
+SURVEY_WRITE_ACK = os.getenv('SURVEY_WRITE_ACK', 'queued')
+SURVEY_ENQUEUE_TIMEOUT = float(os.getenv('SURVEY_ENQUEUE_TIMEOUT', 1.0))
+SURVEY_ACK_TIMEOUT = float(os.getenv('SURVEY_ACK_TIMEOUT', 10.0))
+
+if SURVEY_WRITE_MODE == 'buffered' and surveys_collection is not None:
+    survey_write_buffer = SurveyWriteBuffer(
+        lambda: surveys_collection,
+        queue_size=int(os.getenv('SURVEY_QUEUE_SIZE', 10000)),
+        flush_batch=int(os.getenv('SURVEY_FLUSH_BATCH', 100)),
+        flush_interval=float(os.getenv('SURVEY_FLUSH_INTERVAL', 1.0)),
+        on_written=record_survey_stats
+    )
+    atexit.register(survey_write_buffer.close)
+    print(f"Survey writes buffered (acknowledged when {SURVEY_WRITE_ACK}).")
+else:
+    survey_write_buffer = None
 
 # ==================== ENERGY CALCULATION MODELS ====================
 
+# The calculate_* formulas take either one appliance section of a payload (a dict of
+# scalars) or a _BatchColumns view of that section across many households, in which
+# case every parameter is a NumPy column and the formula is evaluated column-wise.
+
+def _number(value):
+    """float() for a single payload value; batch columns are already float arrays."""
+    return value if isinstance(value, np.ndarray) else float(value)
+
+def _at_least(value, minimum):
+    return np.maximum(value, minimum) if isinstance(value, np.ndarray) else max(value, minimum)
+
 def calculate_refrigerator(data):
     """Refrigerator daily kWh based on wattage, duty cycle, quantity, and operating conditions."""
-    watts = float(data.get('watts', 150))
-    duty = float(data.get('duty', 0.65))
-    qty = float(data.get('qty', 1))
-    age_factor = float(data.get('age_factor', 1))
-    ambient_factor = float(data.get('ambient_factor', 1))
-    door_factor = float(data.get('door_factor', 1))
+    watts = _number(data.get('watts', 150))
+    duty = _number(data.get('duty', 0.65))
+    qty = _number(data.get('qty', 1))
+    age_factor = _number(data.get('age_factor', 1))
+    ambient_factor = _number(data.get('ambient_factor', 1))
+    door_factor = _number(data.get('door_factor', 1))
     return (watts * 24 * duty * qty * age_factor * ambient_factor * door_factor) / 1000
 
 def calculate_air_conditioner(data):
     """Air conditioner daily kWh adjusted by EER/profile, temperature, and maintenance factors."""
-    watts = float(data.get('watts', 1500))
-    eer = max(float(data.get('eer', 2.8)), 0.1)
-    star_factor = float(data.get('star_factor', 1))
-    hours = float(data.get('hours', 8))
-    qty = float(data.get('qty', 1))
-    temp_factor = float(data.get('temp_factor', 1))
-    setpoint_factor = float(data.get('setpoint_factor', 1))
-    maintenance_factor = float(data.get('maintenance_factor', 1))
+    watts = _number(data.get('watts', 1500))
+    eer = _at_least(_number(data.get('eer', 2.8)), 0.1)
+    star_factor = _number(data.get('star_factor', 1))
+    hours = _number(data.get('hours', 8))
+    qty = _number(data.get('qty', 1))
+    temp_factor = _number(data.get('temp_factor', 1))
+    setpoint_factor = _number(data.get('setpoint_factor', 1))
+    maintenance_factor = _number(data.get('maintenance_factor', 1))
     return (watts / eer * star_factor * hours * qty * temp_factor * setpoint_factor * maintenance_factor) / 1000
 
 def calculate_washing_machine(data):
     """Washing machine daily kWh from wattage, cycle duration, load, spin, and cycles."""
-    watts = float(data.get('watts', 500))
-    duration = float(data.get('duration', 45))
-    cycles = float(data.get('cycles', 1))
-    temp_factor = float(data.get('temp_factor', 1))
-    load_factor = float(data.get('load_factor', 1))
-    spin_factor = float(data.get('spin_factor', 1))
+    watts = _number(data.get('watts', 500))
+    duration = _number(data.get('duration', 45))
+    cycles = _number(data.get('cycles', 1))
+    temp_factor = _number(data.get('temp_factor', 1))
+    load_factor = _number(data.get('load_factor', 1))
+    spin_factor = _number(data.get('spin_factor', 1))
     return (watts * (duration / 60) * cycles * temp_factor * load_factor * spin_factor) / 1000
 
 def calculate_ceiling_fan(data):
     """Ceiling fan daily kWh from wattage, quantity, hours, and speed factor."""
-    watts = float(data.get('watts', 75))
-    qty = float(data.get('qty', 1))
-    hours = float(data.get('hours', 10))
-    speed = float(data.get('speed', 1))
-    motor_factor = float(data.get('motor_factor', 1))
+    watts = _number(data.get('watts', 75))
+    qty = _number(data.get('qty', 1))
+    hours = _number(data.get('hours', 10))
+    speed = _number(data.get('speed', 1))
+    motor_factor = _number(data.get('motor_factor', 1))
     return (watts * qty * hours * speed * motor_factor) / 1000
 
 def calculate_computer(data):
     """Computer, monitor, standby, and always-on router daily kWh."""
-    watts = float(data.get('watts', 200))
-    monitor = float(data.get('monitor', 50))
-    hours = float(data.get('hours', 8))
-    router = float(data.get('router', 20))
-    qty = float(data.get('qty', 1))
-    standby = float(data.get('standby', 5))
-    idle_hours = max(24 - hours, 0)
+    watts = _number(data.get('watts', 200))
+    monitor = _number(data.get('monitor', 50))
+    hours = _number(data.get('hours', 8))
+    router = _number(data.get('router', 20))
+    qty = _number(data.get('qty', 1))
+    standby = _number(data.get('standby', 5))
+    idle_hours = _at_least(24 - hours, 0)
     return (((watts + monitor) * hours * qty) + (standby * idle_hours * qty) + (router * 24)) / 1000
 
 def calculate_kitchen(data):
     """Kitchen daily kWh from common small cooking appliances."""
-    micro_watts = float(data.get('micro_watts', 1000))
-    micro_mins = float(data.get('micro_mins', 15))
-    induction_watts = float(data.get('induction_watts', 2000))
-    induction_hours = float(data.get('induction_hours', 1.5))
-    kettle_watts = float(data.get('kettle_watts', 0))
-    kettle_mins = float(data.get('kettle_mins', 0))
-    rice_watts = float(data.get('rice_watts', 0))
-    rice_hours = float(data.get('rice_hours', 0))
-    mixer_watts = float(data.get('mixer_watts', 0))
-    mixer_mins = float(data.get('mixer_mins', 0))
+    micro_watts = _number(data.get('micro_watts', 1000))
+    micro_mins = _number(data.get('micro_mins', 15))
+    induction_watts = _number(data.get('induction_watts', 2000))
+    induction_hours = _number(data.get('induction_hours', 1.5))
+    kettle_watts = _number(data.get('kettle_watts', 0))
+    kettle_mins = _number(data.get('kettle_mins', 0))
+    rice_watts = _number(data.get('rice_watts', 0))
+    rice_hours = _number(data.get('rice_hours', 0))
+    mixer_watts = _number(data.get('mixer_watts', 0))
+    mixer_mins = _number(data.get('mixer_mins', 0))
     daily_wh = (
         micro_watts * (micro_mins / 60)
         + induction_watts * induction_hours
@@ -143,51 +643,336 @@ def calculate_kitchen(data):
 
 def calculate_lighting(data):
     """Lighting daily kWh from bulb wattage, quantity, usage, daylight, and occupancy factors."""
-    watts = float(data.get('watts', 15))
-    qty = float(data.get('qty', 10))
-    hours = float(data.get('hours', 5))
-    daylight_factor = float(data.get('daylight_factor', 1))
-    occupancy_factor = float(data.get('occupancy_factor', 1))
+    watts = _number(data.get('watts', 15))
+    qty = _number(data.get('qty', 10))
+    hours = _number(data.get('hours', 5))
+    daylight_factor = _number(data.get('daylight_factor', 1))
+    occupancy_factor = _number(data.get('occupancy_factor', 1))
     return (watts * qty * hours * daylight_factor * occupancy_factor) / 1000
 
 def calculate_television(data):
     """Television daily kWh from wattage, quantity, viewing hours, and standby."""
-    watts = float(data.get('watts', 70))
-    qty = float(data.get('qty', 1))
-    hours = float(data.get('hours', 4))
-    standby = float(data.get('standby', 1.5))
-    return ((watts * qty * hours) + (standby * qty * max(24 - hours, 0))) / 1000
+    watts = _number(data.get('watts', 70))
+    qty = _number(data.get('qty', 1))
+    hours = _number(data.get('hours', 4))
+    standby = _number(data.get('standby', 1.5))
+    return ((watts * qty * hours) + (standby * qty * _at_least(24 - hours, 0))) / 1000
 
 def calculate_water_heater(data):
     """Water heater daily kWh from hot-water volume, temperature rise, efficiency, and losses."""
-    liters = float(data.get('liters', 50))
-    uses = float(data.get('uses', 2))
-    target_temp = float(data.get('target_temp', 55))
-    inlet_temp = float(data.get('inlet_temp', 25))
-    efficiency = max(float(data.get('efficiency', 85)) / 100, 0.1)
-    insulation_factor = float(data.get('insulation_factor', 1))
-    temp_rise = max(target_temp - inlet_temp, 0)
+    liters = _number(data.get('liters', 50))
+    uses = _number(data.get('uses', 2))
+    target_temp = _number(data.get('target_temp', 55))
+    inlet_temp = _number(data.get('inlet_temp', 25))
+    efficiency = _at_least(_number(data.get('efficiency', 85)) / 100, 0.1)
+    insulation_factor = _number(data.get('insulation_factor', 1))
+    temp_rise = _at_least(target_temp - inlet_temp, 0)
     return ((liters * uses * 4.186 * temp_rise) / (3600 * efficiency)) * insulation_factor
 
+APPLIANCE_CALCULATORS = [
+    ('fridge', 'Refrigerator', '', calculate_refrigerator),
+    ('ac', 'Air Conditioner', '', calculate_air_conditioner),
+    ('washer', 'Washing Machine', '', calculate_washing_machine),
+    ('fan', 'Ceiling Fan', '', calculate_ceiling_fan),
+    ('computer', 'Computer & Net', '', calculate_computer),
+    ('kitchen', 'Kitchen', '', calculate_kitchen),
+    ('lighting', 'Lighting', '', calculate_lighting),
+    ('tv', 'Television', '', calculate_television),
+    ('heater', 'Water Heater', '', calculate_water_heater),
+]
+
+MAX_BATCH_HOUSEHOLDS = int(os.getenv('MAX_BATCH_HOUSEHOLDS', 10000))
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+def summarize_household(results, tariff):
+    """Totals, cost and CO2 for one household's appliance results (the /api/calculate response)."""
+    total_daily = sum(r['daily'] for r in results)
+    total_monthly = total_daily * 30
+    total_annual = total_daily * 365
+    monthly_cost = total_monthly * tariff
+    co2_monthly = total_monthly * 0.82  # India grid emission factor
+
+    return {
+        'appliances': results,
+        'total_daily': round(total_daily, 3),
+        'total_monthly': round(total_monthly, 2),
+        'total_annual': round(total_annual, 2),
+        'monthly_cost': round(monthly_cost, 2),
+        'co2_monthly': round(co2_monthly, 2),
+        'tariff': tariff
+    }
+
+class _BatchColumns:
+    """One appliance section across a batch of households; get() returns a float column."""
+
+    def __init__(self, sections):
+        self.sections = sections
+        self.errors = {}  # position -> first conversion error
+
+    def get(self, name, default=None):
+        values = [section.get(name, default) for section in self.sections]
+        try:
+            # The whole column in one cast; it turns None into NaN instead of failing like
+            # float(None), so only the NaN positions are converted again one by one
+            column = np.fromiter(values, dtype=object, count=len(values)).astype(float)
+            positions = np.flatnonzero(np.isnan(column)).tolist()
+        except (TypeError, ValueError):
+            column = np.empty(len(values))
+            positions = range(len(values))
+        for position in positions:
+            try:
+                column[position] = float(values[position])
+            except (TypeError, ValueError) as e:
+                self.errors.setdefault(position, str(e))
+                column[position] = np.nan
+        return column
+
+def calculate_households(households):
+    """
+    Evaluates /api/calculate for a batch of payloads, running each calculate_* formula
+    once over the column of households that include that appliance.
+    Households that fail get {'error': ...} instead of a result.
+    """
+    results = [[] for _ in households]
+    errors = {}
+    for index, data in enumerate(households):
+        if not isinstance(data, dict):
+            errors[index] = f"'{type(data).__name__}' object has no attribute 'get'"
+
+    for key, name, icon, calc_func in APPLIANCE_CALCULATORS:
+        members, sections = [], []
+        for index, data in enumerate(households):
+            section = data.get(key) if index not in errors else None
+            if not section:
+                continue
+            if isinstance(section, dict):
+                members.append(index)
+                sections.append(section)
+            else:
+                errors[index] = f"'{type(section).__name__}' object has no attribute 'get'"
+        if not members:
+            continue
+
+        columns = _BatchColumns(sections)
+        with np.errstate(all='ignore'):
+            daily = np.broadcast_to(calc_func(columns), (len(members),)).tolist()
+        for position, (index, value) in enumerate(zip(members, daily)):
+            if position in columns.errors:
+                errors[index] = columns.errors[position]
+            else:
+                results[index].append({'name': name, 'icon': icon, 'daily': round(value, 4)})
+
+    responses = []
+    for index, data in enumerate(households):
+        if index in errors:
+            responses.append({'error': errors[index]})
+            continue
+        try:
+            responses.append(summarize_household(results[index], data.get('tariff', 6.5)))
+        except Exception as e:
+            responses.append({'error': str(e)})
+    return responses
+
+# ==================== RESPONSE CACHE ====================
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized responses with a time-to-live per entry."""
+
+    def __init__(self, maxsize=1024, ttl_seconds=300):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, body)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, body):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+CALCULATE_CACHE = ResponseCache(
+    maxsize=int(os.getenv('CALCULATE_CACHE_SIZE', 1024)),
+    ttl_seconds=float(os.getenv('CALCULATE_CACHE_TTL', 300))
+)
+
+def _normalize_parameter(value):
+    """Numeric parameters are read with float(), so "100", 100 and 100.0 are the same input."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+def calculate_cache_key(data):
+    """Canonical hash of the parts of an /api/calculate payload that affect the response."""
+    normalized = {'tariff': data.get('tariff', 6.5)}
+    for key, _, _, _ in APPLIANCE_CALCULATORS:
+        section = data.get(key)
+        if section:
+            if isinstance(section, dict):
+                section = {field: _normalize_parameter(value) for field, value in section.items()}
+            normalized[key] = section
+    canonical = json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=repr)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
 # ==================== ROUTES ====================
 
 # Serve HTML pages - Main routes
+# ==================== STATIC ASSETS ====================
+
+class _Asset:
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()
+        # Each encoding is a different representation, so each gets its own strong ETag
+        self.variants = {None: (body, f'"{self.digest[:32]}"')}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants['gzip'] = (compressed, f'"{self.digest[:32]}-gz"')
+        if brotli is not None:
+            compressed = brotli.compress(body)
+            if len(compressed) < len(body):
+                self.variants['br'] = (compressed, f'"{self.digest[:32]}-br"')
+
+class StaticAssets:
+    """
+    Frontend pages and assets held in memory with precomputed gzip (and brotli, when
+    installed) variants and strong ETags.
+
+    CSS and JS files are also served under content-hashed URLs
+    (/assets/css/styles.<hash>.css) marked immutable. Pages have their ../css/ and
+    ../js/ references rewritten to those URLs and are always revalidated, so a changed
+    asset reaches browsers with the next page load.
+    """
+
+    HASHED_PREFIX = 'assets/'
+    ASSET_REFERENCE = re.compile(r'''(["'])(?:\.\./|/)((?:css|js)/[^"'?#]+)\1''')
+    ENCODING_PREFERENCE = ('br', 'gzip')
+
+    def __init__(self, frontend_dir, pages_dir):
+        self.files = {}  # frontend-relative path -> _Asset
+        self.pages = {}  # page file name -> _Asset
+        self.hashed = {}  # hashed path -> _Asset
+        self.urls = {}  # frontend-relative path -> hashed URL
+
+        for path in sorted(Path(frontend_dir).rglob('*')):
+            relative = path.relative_to(frontend_dir).as_posix()
+            if path.is_file() and not relative.startswith('pages/'):
+                asset = _Asset(path.read_bytes(), mimetypes.guess_type(path.name)[0] or 'application/octet-stream')
+                self.files[relative] = asset
+                stem, dot, suffix = relative.rpartition('.')
+                if dot:
+                    hashed = f"{self.HASHED_PREFIX}{stem}.{asset.digest[:12]}.{suffix}"
+                    self.hashed[hashed] = asset
+                    self.urls[relative] = '/' + hashed
+
+        for path in sorted(Path(pages_dir).glob('*.html')):
+            html = self.ASSET_REFERENCE.sub(self._hashed_reference, path.read_text(encoding='utf-8'))
+            self.pages[path.name] = _Asset(html.encode('utf-8'), 'text/html')
+
+    def _hashed_reference(self, match):
+        quote, relative = match.groups()
+        return f"{quote}{self.urls[relative]}{quote}" if relative in self.urls else match.group(0)
+
+    def response(self, asset, immutable=False):
+        """Negotiated response for an asset, or 304 when the client's copy is current"""
+        encoding = next(
+            (name for name in self.ENCODING_PREFERENCE
+             if name in asset.variants and request.accept_encodings[name]),
+            None
+        )
+        body, etag = asset.variants[encoding]
+        headers = {
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': 'public, max-age=31536000, immutable' if immutable else 'no-cache'
+        }
+        known_tags = {tag for _, tag in asset.variants.values()}
+        if_none_match = request.headers.get('If-None-Match', '')
+        client_tags = {tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip() for tag in if_none_match.split(',')}
+        if '*' in client_tags or known_tags & client_tags:
+            return Response(status=304, headers=headers)
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return Response(body, mimetype=asset.mimetype, headers=headers)
+
+    def page(self, name):
+        asset = self.pages.get(name)
+        return self.response(asset) if asset is not None else None
+
+    def file(self, relative):
+        if relative in self.hashed:
+            return self.response(self.hashed[relative], immutable=True)
+        asset = self.files.get(relative)
+        return self.response(asset) if asset is not None else None
+
+# STATIC_ASSETS_CACHE=0 serves files straight from disk instead (for frontend development)
+if os.getenv('STATIC_ASSETS_CACHE', '1') == '1':
+    static_assets = StaticAssets(FRONTEND_DIR, PAGES_DIR)
+else:
+    static_assets = None
+
+def serve_page(name):
+    response = static_assets.page(name) if static_assets is not None else None
+    return response if response is not None else send_from_directory(PAGES_DIR, name)
+
+def serve_static(filename):
+    response = static_assets.file(filename) if static_assets is not None else None
+    return response if response is not None else app.send_static_file(filename)
+
+# Flask's static route (static_url_path='') matches frontend files before catch_all does
+app.view_functions['static'] = serve_static
+
 @app.route('/')
 def home():
-    return send_from_directory(PAGES_DIR, 'home.html')
+    return serve_page('home.html')
 
 @app.route('/index.html')
 @app.route('/survey')
 @app.route('/survey.html')
 def survey():
-    return send_from_directory(PAGES_DIR, 'index.html')
+    return serve_page('index.html')
 
 @app.route('/analyzer.html')
 @app.route('/analyzer')
 @app.route('/calculator')
 @app.route('/calculator.html')
 def analyzer():
-    return send_from_directory(PAGES_DIR, 'analyzer.html')
+    return serve_page('analyzer.html')
 
 @app.route('/thankyou.html')
 @app.route('/thankyou')
@@ -195,7 +980,7 @@ def analyzer():
 @app.route('/complete')
 @app.route('/complete.html')
 def thankyou():
-    return send_from_directory(PAGES_DIR, 'thankyou.html')
+    return serve_page('thankyou.html')
 
 # Catch-all route for any missing HTML files
 @app.route('/<path:filename>')
@@ -203,20 +988,20 @@ def catch_all(filename):
     # If it's an HTML file, try to serve it from pages directory
     if filename.endswith('.html'):
         try:
-            return send_from_directory(PAGES_DIR, filename)
+            return serve_page(filename)
         except FileNotFoundError:
             return f"Page '{filename}' not found", 404
 
-    # If it's a CSS, JS, or other static file, serve from frontend directory
+    # If it's a CSS, JS, or other static file, serve it like the static route does
     try:
-        return send_from_directory(FRONTEND_DIR, filename)
+        return serve_static(filename)
     except FileNotFoundError:
         return f"File '{filename}' not found", 404
 
 # Health check with navigation info
 @app.route('/health')
 def health():
-    return {
+    status = {
         'status': 'OK',
         'server': 'Flask',
         'port': 5000,
@@ -226,10 +1011,27 @@ def health():
             'analyzer': '/analyzer.html (or /analyzer)',
             'thankyou': '/thankyou.html (or /thankyou)',
             'api_calculate': '/api/calculate (POST)',
-            'api_submit': '/api/submit-survey (POST)'
+            'api_calculate_batch': '/api/calculate/batch (POST)',
+            'api_calculate_cache_stats': '/api/calculate/cache-stats (GET)',
+            'api_submit': '/api/submit-survey (POST)',
+            'api_surveys': '/api/surveys (GET, ?limit=&after= or ?format=ndjson)',
+            'api_stats': '/api/stats (GET)',
+            'api_admin_indexes': '/api/admin/indexes (GET)',
+            'api_admin_stats_rebuild': '/api/admin/stats/rebuild (POST, X-Admin-Token)'
         },
-        'mongodb': 'connected' if is_mongodb_connected() else 'disconnected'
-    }, 200
+        'mongodb': 'disconnected'
+    }
+    # Answered from the background prober's cached state, never by pinging inline
+    if mongodb_health is not None:
+        mongodb_health.ensure_started()
+        probe = mongodb_health.status()
+        status['mongodb'] = probe['state']
+        status['mongodb_probe'] = probe
+    if db is not None:
+        status['mongodb_circuit'] = mongodb_breaker.stats()
+    if survey_write_buffer is not None:
+        status['survey_write_buffer'] = survey_write_buffer.stats()
+    return status, 200
 
 # ==================== API ENDPOINTS ====================
 
@@ -242,22 +1044,17 @@ def calculate():
     try:
         data = request.get_json(silent=True)
         tariff = data.get('tariff', 6.5)
+
+        # Identical configurations (defaults, repeated recalculations) are served from the cache
+        cache_key = calculate_cache_key(data)
+        cached_body = CALCULATE_CACHE.get(cache_key)
+        if cached_body is not None:
+            return Response(cached_body, mimetype='application/json')
+
         results = []
 
         # Calculate each appliance
-        appliances = [
-            ('fridge', 'Refrigerator', '', calculate_refrigerator),
-            ('ac', 'Air Conditioner', '', calculate_air_conditioner),
-            ('washer', 'Washing Machine', '', calculate_washing_machine),
-            ('fan', 'Ceiling Fan', '', calculate_ceiling_fan),
-            ('computer', 'Computer & Net', '', calculate_computer),
-            ('kitchen', 'Kitchen', '', calculate_kitchen),
-            ('lighting', 'Lighting', '', calculate_lighting),
-            ('tv', 'Television', '', calculate_television),
-            ('heater', 'Water Heater', '', calculate_water_heater),
-        ]
-
-        for key, name, icon, calc_func in appliances:
+        for key, name, icon, calc_func in APPLIANCE_CALCULATORS:
             if data.get(key):
                 daily = calc_func(data[key])
                 results.append({
@@ -266,27 +1063,49 @@ def calculate():
                     'daily': round(daily, 4)
                 })
 
-        # Calculate totals
-        total_daily = sum(r['daily'] for r in results)
-        total_monthly = total_daily * 30
-        total_annual = total_daily * 365
-        monthly_cost = total_monthly * tariff
-        co2_monthly = total_monthly * 0.82  # India grid emission factor
-
-        return jsonify({
-            'appliances': results,
-            'total_daily': round(total_daily, 3),
-            'total_monthly': round(total_monthly, 2),
-            'total_annual': round(total_annual, 2),
-            'monthly_cost': round(monthly_cost, 2),
-            'co2_monthly': round(co2_monthly, 2),
-            'tariff': tariff
-        })
+        response = jsonify(summarize_household(results, tariff))
+        CALCULATE_CACHE.put(cache_key, response.get_data())
+        return response
 
     except Exception as e:
         print(f"Error in energy calculation: {e}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/calculate/cache-stats', methods=['GET'])
+def calculate_cache_stats():
+    """Hit-rate statistics of the /api/calculate response cache"""
+    return jsonify(CALCULATE_CACHE.stats()), 200
+
+@app.route('/api/calculate/batch', methods=['POST'])
+def calculate_batch():
+    """
+    Calculate energy consumption for many households in one request
+    POST a JSON array of /api/calculate payloads (or {"households": [...]}),
+    or NDJSON with one payload per line, which is answered as NDJSON
+    """
+    ndjson = request.mimetype in NDJSON_MIMETYPES
+    try:
+        if ndjson:
+            lines = request.get_data(as_text=True).splitlines()
+            households = [json.loads(line) for line in lines if line.strip()]
+        else:
+            households = request.get_json(silent=True)
+            if isinstance(households, dict):
+                households = households.get('households')
+        if not isinstance(households, list):
+            return jsonify({'error': 'Expected a list of household payloads'}), 400
+    except ValueError as e:
+        return jsonify({'error': f'Invalid NDJSON: {e}'}), 400
+
+    if len(households) > MAX_BATCH_HOUSEHOLDS:
+        return jsonify({'error': f'Batch exceeds {MAX_BATCH_HOUSEHOLDS} households'}), 413
+
+    results = calculate_households(households)
+    if ndjson:
+        body = ''.join(json.dumps(result) + '\n' for result in results)
+        return Response(body, mimetype='application/x-ndjson')
+    return jsonify({'count': len(results), 'results': results})
+
 @app.route('/api/submit-survey', methods=['POST'])
 def submit_survey():
     """Save survey form data to MongoDB"""
@@ -299,9 +1118,14 @@ def submit_survey():
         # Add timestamp
         data['submitted_at'] = datetime.now()
 
-        if db is not None:
-            result = surveys_collection.insert_one(data)
+        if db is not None and not mongodb_breaker.allow():
+            return database_unavailable()
+        elif db is not None and survey_write_buffer is not None:
+            return submit_survey_buffered(data)
+        elif db is not None:
+            result = mongodb_breaker.call(surveys_collection.insert_one, data)
             print(f"Survey saved to MongoDB: {result.inserted_id}")
+            record_survey_stats([data])
             return jsonify({
                 'message': 'Survey submitted successfully!',
                 'id': str(result.inserted_id)
@@ -310,32 +1134,207 @@ def submit_survey():
             print("MongoDB not available, but form received")
             return jsonify({'message': 'Survey received (DB offline)'}), 200
 
+    except CircuitOpenError:
+        return database_unavailable()
     except Exception as e:
         print(f"Error saving survey: {e}")
         return jsonify({'error': str(e)}), 500
 
+def submit_survey_buffered(data):
+    """Queue a survey on the write-behind buffer and acknowledge per SURVEY_WRITE_ACK"""
+    # Assign the id up front so it can be returned before the document is written
+    data['_id'] = ObjectId()
+    try:
+        pending = survey_write_buffer.submit(data, timeout=SURVEY_ENQUEUE_TIMEOUT)
+    except queue.Full:
+        print("Survey write buffer full, rejecting submission")
+        return jsonify({'error': 'Server busy, please retry'}), 503, {'Retry-After': '5'}
+
+    if SURVEY_WRITE_ACK == 'flushed':
+        if not pending.done.wait(SURVEY_ACK_TIMEOUT):
+            return jsonify({'message': 'Survey queued for saving', 'id': str(data['_id'])}), 202
+        if pending.error is not None:
+            return jsonify({'error': pending.error}), 500
+        return jsonify({
+            'message': 'Survey submitted successfully!',
+            'id': str(data['_id'])
+        }), 200
+
+    return jsonify({'message': 'Survey queued for saving', 'id': str(data['_id'])}), 202
+
+# Keyset order for paging through surveys
+SURVEY_ORDER = [('submitted_at', 1), ('_id', 1)]
+SURVEY_PROJECTION = {'_id': 1, 'submitted_at': 1}
+MAX_SURVEY_PAGE = int(os.getenv('MAX_SURVEY_PAGE', 1000))
+
+def _serialize_survey(survey):
+    survey['_id'] = str(survey['_id'])
+    if isinstance(survey.get('submitted_at'), datetime):
+        survey['submitted_at'] = survey['submitted_at'].isoformat()
+    return survey
+
+def encode_survey_cursor(survey):
+    """Opaque 'after' cursor for the survey following this one in SURVEY_ORDER"""
+    submitted_at = survey.get('submitted_at')
+    return f"{submitted_at.isoformat() if submitted_at else ''}_{survey['_id']}"
+
+def survey_keyset_filter(after):
+    """Filter for the surveys that sort after the given cursor (raises ValueError if malformed)"""
+    submitted_at, _, survey_id = after.rpartition('_')
+    survey_id = ObjectId(survey_id) if ObjectId.is_valid(survey_id) else None
+    if survey_id is None:
+        raise ValueError(f"Invalid cursor: {after}")
+    if not submitted_at:
+        # Surveys without a timestamp sort first
+        return {'$or': [
+            {'submitted_at': {'$ne': None}},
+            {'submitted_at': None, '_id': {'$gt': survey_id}}
+        ]}
+    submitted_at = datetime.fromisoformat(submitted_at)
+    return {'$or': [
+        {'submitted_at': {'$gt': submitted_at}},
+        {'submitted_at': submitted_at, '_id': {'$gt': survey_id}}
+    ]}
+
 @app.route('/api/surveys', methods=['GET'])
 def get_surveys():
-    """Retrieve all surveys (optional - for admin dashboard)"""
+    """
+    Retrieve surveys (optional - for admin dashboard)
+    ?limit=N[&after=cursor] returns one keyset-paginated page with a next_after cursor;
+    ?format=ndjson[&batch_size=N] streams every survey from the cursor as NDJSON.
+    Without parameters all surveys are returned in one response.
+    """
     try:
         if db is None:
             return jsonify({'error': 'Database not connected'}), 500
 
-        surveys = list(surveys_collection.find({}, {'_id': 1, 'submitted_at': 1}))
+        limit = request.args.get('limit', type=int)
+        after = request.args.get('after')
+        try:
+            query = survey_keyset_filter(after) if after else {}
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if request.args.get('format') == 'ndjson':
+            batch_size = min(max(request.args.get('batch_size', 500, type=int), 1), MAX_SURVEY_PAGE)
+            cursor = surveys_collection.find(query, SURVEY_PROJECTION).sort(SURVEY_ORDER).batch_size(batch_size)
+            if limit:
+                cursor = cursor.limit(limit)
+            # Fetch the first batch under the breaker so an unreachable database fails
+            # before the streaming response has started
+            surveys = iter(cursor)
+            first = mongodb_breaker.call(lambda: list(itertools.islice(surveys, 1)))
+
+            def generate():
+                try:
+                    for survey in itertools.chain(first, surveys):
+                        yield json.dumps(_serialize_survey(survey)) + '\n'
+                except Exception as e:
+                    # The response has started, so end the stream with an error line instead
+                    mongodb_breaker.record_failure(e)
+                    print(f"Error streaming surveys: {e}")
+                    yield json.dumps({'error': str(e)}) + '\n'
+
+            return Response(generate(), mimetype='application/x-ndjson')
+
+        if limit is not None or after:
+            limit = min(max(limit or MAX_SURVEY_PAGE, 1), MAX_SURVEY_PAGE)
+            # Fetch one extra survey to know whether another page follows
+            surveys = mongodb_breaker.call(
+                lambda: list(surveys_collection.find(query, SURVEY_PROJECTION).sort(SURVEY_ORDER).limit(limit + 1))
+            )
+            next_after = encode_survey_cursor(surveys[limit - 1]) if len(surveys) > limit else None
+            surveys = [_serialize_survey(survey) for survey in surveys[:limit]]
+            return jsonify({
+                'count': len(surveys),
+                'surveys': surveys,
+                'next_after': next_after
+            }), 200
+
+        surveys = mongodb_breaker.call(lambda: list(surveys_collection.find({}, SURVEY_PROJECTION)))
         for survey in surveys:
-            survey['_id'] = str(survey['_id'])
-            if 'submitted_at' in survey:
-                survey['submitted_at'] = survey['submitted_at'].isoformat()
+            _serialize_survey(survey)
         
         return jsonify({
             'total': len(surveys),
             'surveys': surveys
         }), 200
 
+    except CircuitOpenError:
+        return database_unavailable()
     except Exception as e:
         print(f"Error retrieving surveys: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/indexes', methods=['GET'])
+def get_survey_indexes():
+    """Report survey index usage so read paths can be checked for index coverage"""
+    try:
+        if db is None:
+            return jsonify({'error': 'Database not connected'}), 500
+
+        return jsonify({'indexes': mongodb_breaker.call(survey_index_usage, surveys_collection)}), 200
+
+    except CircuitOpenError:
+        return database_unavailable()
+    except Exception as e:
+        print(f"Error retrieving index usage: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stats', methods=['GET'])
+def get_survey_stats():
+    """Submissions per day, city and home type plus average adults per household"""
+    try:
+        if db is None:
+            return jsonify({'error': 'Database not connected'}), 500
+
+        rollup = mongodb_breaker.call(stats_collection.find_one, {'_id': SURVEY_STATS_ID})
+        return jsonify(format_survey_stats(rollup)), 200
+
+    except CircuitOpenError:
+        return database_unavailable()
+    except Exception as e:
+        print(f"Error retrieving survey statistics: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Token for the admin endpoints that change data; they are disabled while it is unset
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
+
+def admin_token_error():
+    """Error response unless the request carries ADMIN_API_TOKEN in X-Admin-Token."""
+    if not ADMIN_API_TOKEN:
+        return jsonify({'error': 'Page not found'}), 404
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+        return jsonify({'error': 'Invalid admin token'}), 401
+    return None
+
+@app.route('/api/admin/stats/rebuild', methods=['POST'])
+def rebuild_stats():
+    """Recompute the statistics rollup from all stored surveys (requires X-Admin-Token)"""
+    error = admin_token_error()
+    if error is not None:
+        return error
+    try:
+        if db is None:
+            return jsonify({'error': 'Database not connected'}), 500
+
+        rollup = mongodb_breaker.call(rebuild_survey_stats)
+        return jsonify(format_survey_stats(rollup)), 200
+
+    except CircuitOpenError:
+        return database_unavailable()
+    except Exception as e:
+        print(f"Error rebuilding survey statistics: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the survey statistics rollup from all stored surveys."""
+    if db is None:
+        raise SystemExit('Database not connected')
+    print(json.dumps(format_survey_stats(rebuild_survey_stats()), indent=2))
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
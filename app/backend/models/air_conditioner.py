@@ -1,4 +1,7 @@
 # Air conditioner model placeholder
+from models.thermostat import ABOVE, BELOW, simulate_thermostat
+
+
 class AirConditioner:
     def __init__(self):
         # --- Parameters (Change these for different 'Variants') ---
@@ -46,6 +49,28 @@ class AirConditioner:
 
         return self.temp_room, current_power
 
+    def simulate_events(self, steps, dt_minutes=1):
+        """
+        Same result as `steps` calls of simulate_step, but jumps from one thermostat switch to
+        the next instead of updating every minute. The per-minute activity_log is not filled;
+        the on/off stretches are returned instead.
+
+        Returns:
+            list: (start_step, end_step, power_watt) intervals, end_step exclusive.
+        """
+        result = simulate_thermostat(
+            self.temp_room, self.is_on, steps,
+            leak=self.insulation_k,
+            ambient=self.temp_outside,
+            drive_on=-(self.power_watt * self.cooling_eff) / 1000 * self.air_mass_const,
+            switch_on=(ABOVE, self.t_set + self.hysteresis),
+            switch_off=(BELOW, self.t_set - self.hysteresis),
+        )
+        self.temp_room = result['temp']
+        self.is_on = result['is_on']
+        self.energy_used_wh += result['on_steps'] * self.power_watt * (dt_minutes / 60)
+        return [(start, end, self.power_watt if on else 0) for start, end, on in result['intervals']]
+
 
 def calculate_daily(data):
     return (data['watts'] / data['eer'] * data['star_factor'] * data['hours'] * data['qty']) / 1000
\ No newline at end of file
@@ -1,4 +1,5 @@
 # Refrigerator model placeholder
+from models.thermostat import ABOVE, AT_OR_BELOW, simulate_thermostat
 
 class Refrigerator:
     def __init__(self):
@@ -31,6 +32,28 @@ class Refrigerator:
         # This is the "Activity" from your Reference 1!
         self.activity_log.append(abs(current_power))
 
+    def simulate_events(self, steps, dt_minutes=1):
+        """
+        Same result as `steps` calls of simulate_step, but jumps from one compressor switch to
+        the next instead of updating every minute. The per-minute activity_log is not filled;
+        the on/off stretches are returned instead.
+
+        Returns:
+            list: (start_step, end_step, power_watt) intervals, end_step exclusive.
+        """
+        threshold = self.t_set + self.hysteresis
+        result = simulate_thermostat(
+            self.temp_inside, False, steps,
+            leak=self.insulation_k,
+            ambient=self.temp_ambient,
+            drive_on=-0.5,
+            switch_on=(ABOVE, threshold),
+            switch_off=(AT_OR_BELOW, threshold),
+        )
+        self.temp_inside = result['temp']
+        self.energy_used += result['on_steps'] * self.power_watt * (dt_minutes / 60)
+        return [(start, end, self.power_watt if on else 0) for start, end, on in result['intervals']]
+
 
 def calculate_daily(data):
     return (data['watts'] * 24 * data['duty'] * data['qty']) / 1000
\ No newline at end of file
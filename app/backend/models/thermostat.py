@@ -0,0 +1,145 @@
+# Event-driven thermostat engine shared by the thermal appliance models
+import math
+import operator
+
+
+# Switching conditions: (comparison, threshold), e.g. (operator.gt, 23.0) for "temperature > 23"
+ABOVE = operator.gt
+AT_OR_ABOVE = operator.ge
+BELOW = operator.lt
+AT_OR_BELOW = operator.le
+
+# Switch-on temperatures this close are treated as the same point of a repeating on/off cycle
+CYCLE_TOLERANCE = 1e-9
+# Earlier switch-on events compared against when looking for a repeating cycle
+CYCLE_HISTORY = 16
+
+
+def temperature_after(temp, leak, ambient, drive, steps):
+    """
+    Temperature after `steps` updates of the models' first-order step
+        temp += leak * (ambient - temp) + drive
+    in closed form: the distance to the equilibrium shrinks by (1 - leak) per step.
+    """
+    if leak == 0:
+        return temp + steps * drive
+    equilibrium = ambient + drive / leak
+    return equilibrium + (temp - equilibrium) * (1 - leak) ** steps
+
+
+def steps_until(temp, leak, ambient, drive, condition, limit):
+    """
+    Number of steps n (1 <= n <= limit) until temperature_after(..., n) first meets condition,
+    or limit if it does not within limit steps. The crossing step is solved analytically and
+    then checked against the closed form, so rounding in the logarithm cannot shift it.
+    """
+    compare, threshold = condition
+
+    def crossed(n):
+        return compare(temperature_after(temp, leak, ambient, drive, n), threshold)
+
+    if limit <= 1 or crossed(1):
+        return min(limit, 1)
+    if not 0 <= leak < 1:
+        # Overshooting update (no monotone approach to equilibrium): walk it step by step
+        n = 2
+        while n < limit and not crossed(n):
+            n += 1
+        return n
+
+    if leak == 0:
+        ratio = None if drive == 0 else (threshold - temp) / drive
+        estimate = ratio if ratio is not None and ratio > 0 else None
+    else:
+        equilibrium = ambient + drive / leak
+        ratio = (threshold - equilibrium) / (temp - equilibrium) if temp != equilibrium else 0
+        # Only reachable between the current temperature and the equilibrium
+        estimate = math.log(ratio) / math.log1p(-leak) if 0 < ratio < 1 else None
+    if estimate is None:
+        return limit
+
+    n = min(max(1, math.ceil(estimate)), limit)
+    while n < limit and not crossed(n):
+        n += 1
+    while n > 1 and crossed(n - 1):
+        n -= 1
+    return n
+
+
+def simulate_thermostat(temp, is_on, steps, leak, ambient, drive_on, switch_on, switch_off,
+                        drive_off=0.0, disturbances=()):
+    """
+    Runs a hysteresis thermostat for `steps` model steps, jumping from one switch event to the
+    next instead of updating every step. Each step follows the models' own control order:
+        if switch_on condition: on   elif switch_off condition: off
+        temp += leak * (ambient - temp) + (drive_on if on else drive_off)
+    Once the appliance switches on at the same temperature as a few cycles earlier (within
+    CYCLE_TOLERANCE), the on/off pattern since then repeats exactly and whole periods are
+    replayed at once.
+
+    Args:
+        temp (float): Temperature at the start of the first step.
+        is_on (bool): State before the first control decision.
+        steps (int): Steps to simulate.
+        leak (float): Fraction of the gap to ambient closed per step.
+        ambient (float): Surrounding temperature.
+        drive_on (float): Temperature change per step from the appliance while on.
+        switch_on, switch_off (tuple): (comparison, threshold) conditions, e.g. (ABOVE, 23.0).
+        drive_off (float): Temperature change per step while off.
+        disturbances (iterable): (step, function) pairs applied to the temperature at the start
+                                 of that step, before the control decision (e.g. a hot water draw).
+
+    Returns:
+        dict: temp and is_on after the last step, on_steps, and intervals as
+              (start_step, end_step, is_on) with end_step exclusive.
+    """
+    pending = sorted(disturbances, key=lambda disturbance: disturbance[0])
+    next_disturbance = 0
+    intervals = []
+    on_steps = 0
+    step = 0
+    # (step, temperature, index into intervals) of recent switch-on events
+    switched_on = []
+    while step < steps:
+        while next_disturbance < len(pending) and pending[next_disturbance][0] <= step:
+            temp = pending[next_disturbance][1](temp)
+            next_disturbance += 1
+            switched_on = []
+
+        if switch_on[0](temp, switch_on[1]):
+            is_on = True
+        elif switch_off[0](temp, switch_off[1]):
+            is_on = False
+
+        horizon = steps if next_disturbance >= len(pending) else min(steps, pending[next_disturbance][0])
+        if is_on and intervals and not intervals[-1][2]:
+            for cycle_step, cycle_temp, cycle_index in reversed(switched_on):
+                if abs(temp - cycle_temp) <= CYCLE_TOLERANCE:
+                    period = step - cycle_step
+                    repeats = (horizon - step) // period
+                    pattern = intervals[cycle_index:]
+                    for repeat in range(1, repeats + 1):
+                        shift = repeat * period
+                        intervals.extend((start + shift, end + shift, on) for start, end, on in pattern)
+                    on_steps += repeats * sum(end - start for start, end, on in pattern if on)
+                    step += repeats * period
+                    break
+            switched_on = switched_on[-(CYCLE_HISTORY - 1):] + [(step, temp, len(intervals))]
+            if step >= horizon:
+                # The replayed periods end switched off; the next control decision is still to come
+                is_on = False
+                continue
+
+        drive = drive_on if is_on else drive_off
+        length = steps_until(temp, leak, ambient, drive, switch_off if is_on else switch_on, horizon - step)
+        temp = temperature_after(temp, leak, ambient, drive, length)
+
+        if intervals and intervals[-1][2] == is_on:
+            intervals[-1] = (intervals[-1][0], step + length, is_on)
+        else:
+            intervals.append((step, step + length, is_on))
+        if is_on:
+            on_steps += length
+        step += length
+
+    return {'temp': temp, 'is_on': is_on, 'on_steps': on_steps, 'intervals': intervals}
@@ -1,4 +1,12 @@
 # Water heater model placeholder
+import math
+
+from models.thermostat import AT_OR_ABOVE, BELOW, simulate_thermostat
+
+SHOWER_HOUR = 8
+SHOWER_LITERS = 15
+
+
 class WaterHeater:
     def __init__(self, capacity_liters=25, power_watt=3000):
         # --- Parameters ---
@@ -26,8 +34,8 @@ class WaterHeater:
     def simulate_step(self, hour, minute, dt_seconds=60):
         # 1. User Behavior: "The Shower Event"
         # Logic: Someone takes a 15L shower at 8:00 AM
-        if hour == 8 and minute == 0:
-            self.use_hot_water(15)
+        if hour == SHOWER_HOUR and minute == 0:
+            self.use_hot_water(SHOWER_LITERS)
 
         # 2. Thermostatic Control Logic
         if self.temp_water < (self.t_set - self.t_deadband):
@@ -52,6 +60,49 @@ class WaterHeater:
         
         return current_power
 
+    def _shower(self, temp):
+        self.temp_water = temp
+        self.use_hot_water(SHOWER_LITERS)
+        return self.temp_water
+
+    def simulate_events(self, steps, start_hour=0, start_minute=0, dt_seconds=60):
+        """
+        Same result as calling simulate_step `steps` times on a clock that starts at
+        start_hour:start_minute and advances dt_seconds per step, but jumps from one
+        thermostat switch (or shower) to the next instead of updating every step.
+        The per-step activity_log is not filled; the on/off stretches are returned instead.
+
+        Returns:
+            list: (start_step, end_step, power_watt) intervals, end_step exclusive.
+        """
+        heat_capacity = self.capacity * self.specific_heat_water
+        start_seconds = (start_hour * 60 + start_minute) * 60
+        # Every step whose clock reads SHOWER_HOUR:00 draws a shower, as in simulate_step
+        showers = []
+        day = 0
+        while True:
+            shower_start = day * 86400 + SHOWER_HOUR * 3600 - start_seconds
+            first = max(0, math.ceil(shower_start / dt_seconds))
+            if first >= steps:
+                break
+            last = min(steps, math.ceil((shower_start + 60) / dt_seconds))
+            showers.extend((step, self._shower) for step in range(first, last))
+            day += 1
+
+        result = simulate_thermostat(
+            self.temp_water, self.is_heating, steps,
+            leak=self.insulation_k * dt_seconds / heat_capacity,
+            ambient=self.temp_ambient,
+            drive_on=self.power_watt * dt_seconds / heat_capacity,
+            switch_on=(BELOW, self.t_set - self.t_deadband),
+            switch_off=(AT_OR_ABOVE, self.t_set),
+            disturbances=showers,
+        )
+        self.temp_water = result['temp']
+        self.is_heating = result['is_on']
+        self.energy_used_wh += result['on_steps'] * self.power_watt * (dt_seconds / 3600)
+        return [(start, end, self.power_watt if on else 0) for start, end, on in result['intervals']]
+
 
 def calculate_daily(data):
     return (data['watts'] * data['qty'] * data['hours']) / 1000
\ No newline at end of file
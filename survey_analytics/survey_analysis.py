@@ -1,17 +1,41 @@
 import os
-os.environ.setdefault(
-    "MPLCONFIGDIR",
-    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".matplotlib")
-)
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt  # Import matplotlib for plotting
-import matplotlib.cm as cm  # Import colormap for diverse colors
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import re
+import sys
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
 
+def _pyplot():
+    """
+    Imports matplotlib.pyplot on first use, so importing this module stays cheap for
+    callers that never plot. Without a display (and no MPLBACKEND set) the headless
+    Agg backend is selected, so plotting works in workers, CI and over SSH.
+    """
+    if 'matplotlib.pyplot' not in sys.modules:
+        os.environ.setdefault(
+            "MPLCONFIGDIR",
+            os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".matplotlib")
+        )
+        import matplotlib
+        headless = sys.platform.startswith('linux') and not (os.environ.get('DISPLAY')
+                                                              or os.environ.get('WAYLAND_DISPLAY'))
+        if headless and 'MPLBACKEND' not in os.environ:
+            matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
 # ==================== APPLIANCE SIMULATION MODELS ====================
 
 class AirConditionerModel:
@@ -338,6 +362,490 @@ class ApplianceSimulator:
         return efficiency
 
 
+class SimulationCache:
+    """
+    Bounded LRU cache of ApplianceSimulator.simulate_24_hours results.
+
+    The simulation is deterministic, so results are keyed by a fingerprint of the
+    appliances' initial configuration and identical configurations are simulated once
+    per process. The simulator passed in is only advanced on a cache miss.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    @staticmethod
+    def fingerprint(simulator):
+        """Canonical hash of every appliance's type and parameters (activity logs excluded)."""
+        configuration = {
+            name: [type(appliance).__name__,
+                   {attr: value for attr, value in vars(appliance).items() if attr != 'activity_log'}]
+            for name, appliance in simulator.appliances.items()
+        }
+        canonical = json.dumps(configuration, sort_keys=True, default=repr)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def simulate_24_hours(self, simulator):
+        """Same result as simulator.simulate_24_hours(), reusing an earlier run of the same configuration."""
+        key = self.fingerprint(simulator)
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)
+        else:
+            self.misses += 1
+            self._results[key] = simulator.simulate_24_hours()
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        daily_energy, hourly_df = self._results[key]
+        # Hand out copies so callers cannot alter the cached result
+        return dict(daily_energy), hourly_df.copy()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._results), 'maxsize': self.maxsize}
+
+    def clear(self):
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Process-wide cache shared by EnergyConsumptionCosts and DetailedHouseholdAnalysis
+SIMULATION_CACHE = SimulationCache()
+
+
+def _temperature_after(temp, leak, ambient, drive, steps):
+    """Temperature after `steps` updates of temp += leak * (ambient - temp) + drive, in closed form."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        equilibrium = ambient + drive / leak
+        return np.where(leak == 0, temp + steps * drive, equilibrium + (temp - equilibrium) * (1 - leak) ** steps)
+
+
+def _steps_until_switch(temp, is_on, leak, ambient, drive, switch_on, switch_off, limit):
+    """
+    Per appliance, the number of steps n (1 <= n <= limit, 0 where limit is 0) until the
+    temperature first meets the condition that flips its current state, or limit if it does
+    not within limit steps. Solved with a logarithm and then checked against the closed form,
+    as in the backend's steps_until.
+    """
+    threshold = np.where(is_on, switch_off[1], switch_on[1])
+
+    def crossed(n):
+        after = _temperature_after(temp, leak, ambient, drive, n)
+        return np.where(is_on, switch_off[0](after, switch_off[1]), switch_on[0](after, switch_on[1]))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        equilibrium = ambient + drive / leak
+        ratio = (threshold - equilibrium) / (temp - equilibrium)
+        estimate = np.where(leak == 0, (threshold - temp) / drive, np.log(ratio) / np.log1p(-leak))
+    # Only reachable between the current temperature and the equilibrium; an overshooting
+    # update (leak >= 1) is walked from the first step
+    reachable = np.where(leak == 0, estimate > 0, (ratio > 0) & (ratio < 1))
+    estimate = np.where((leak < 0) | (leak >= 1), 1, np.where(reachable, estimate, limit))
+    n = np.minimum(np.maximum(1, np.ceil(estimate)), limit).astype(np.int64)
+
+    while True:
+        later = n < limit
+        if later.any():
+            later &= ~crossed(n)
+        if not later.any():
+            break
+        n += later
+    while True:
+        earlier = n > 1
+        if earlier.any():
+            earlier &= crossed(n - 1)
+        if not earlier.any():
+            break
+        n -= earlier
+    return n
+
+
+def simulate_thermostats(temp, is_on, steps, leak, ambient, drive_on, switch_on, switch_off):
+    """
+    Runs many hysteresis thermostats for `steps` model steps at a constant ambient
+    temperature, jumping from one switch event to the next instead of updating every step
+    (the vectorized counterpart of the backend's simulate_thermostat). Each step follows the
+    models' own control order:
+        if switch_on condition: on   elif switch_off condition: off
+        temp += leak * (ambient - temp) + (drive_on if on else 0)
+
+    Args:
+        temp, is_on (np.ndarray): Temperature and state of each appliance before the first step.
+        steps (int): Steps to simulate.
+        leak, ambient, drive_on: Scalars or arrays with one entry per appliance.
+        switch_on, switch_off (tuple): (comparison ufunc, threshold), e.g. (np.greater, 23.0).
+
+    Returns:
+        tuple: temp and is_on after the last step, and the number of steps each appliance was on.
+    """
+    leak = np.broadcast_to(np.asarray(leak, dtype=float), temp.shape)
+    on_steps = np.zeros(temp.shape, dtype=np.int64)
+    done = np.zeros(temp.shape, dtype=np.int64)
+    while True:
+        active = done < steps
+        if not active.any():
+            break
+        is_on = np.where(active, switch_on[0](temp, switch_on[1]) | (~switch_off[0](temp, switch_off[1]) & is_on),
+                         is_on)
+        drive = np.where(is_on, drive_on, 0.0)
+        length = _steps_until_switch(temp, is_on, leak, ambient, drive, switch_on, switch_off, steps - done)
+        temp = np.where(active, _temperature_after(temp, leak, ambient, drive, length), temp)
+        on_steps += np.where(is_on, length, 0)
+        done += length
+    return temp, is_on, on_steps
+
+
+class BatchApplianceSimulator:
+    """
+    Simulates the ApplianceSimulator household for many households at once.
+
+    Appliance state is held as one NumPy array per quantity (room temperature, water
+    temperature, thermostat flags, ...) with one entry per household, and every time
+    step advances all households in a single vectorized update. With the default
+    parameters each household reproduces ApplianceSimulator.simulate_24_hours exactly.
+    """
+
+    # Same appliances and order as ApplianceSimulator.initialize_appliances
+    APPLIANCES = [
+        'AC', 'Ceiling_Fan', 'Living_Room_Lights', 'Bedroom_Lights', 'Refrigerator', 'Washing_Machine',
+        'Television', 'Laptop', 'Desktop', 'Water_Heater', 'Kitchen_Appliances'
+    ]
+    # Appliances that track energy use (ApplianceSimulator's daily_energy keys)
+    METERED_APPLIANCES = [
+        'AC', 'Ceiling_Fan', 'Living_Room_Lights', 'Bedroom_Lights', 'Refrigerator',
+        'Television', 'Laptop', 'Desktop', 'Water_Heater'
+    ]
+    STEP_MINUTES = 15
+    STEPS_PER_DAY = 24 * 60 // STEP_MINUTES
+    STEPS_PER_HOUR = 60 // STEP_MINUTES
+    HOURS_PER_YEAR = 365 * 24
+
+    def __init__(self, num_households, ac_power_watt=2000, ac_cop=3.5, living_room_bulbs=4, bedroom_bulbs=3,
+                 refrigerator_power_watt=150, tv_size_inches=55, tv_tech="LED",
+                 water_heater_capacity_liters=25, water_heater_power_watt=3000):
+        """
+        Args:
+            num_households (int): Number of households to simulate.
+            Remaining arguments are per-household parameters of the appliance models, given
+            either as a scalar shared by all households or as an array of length num_households.
+        """
+        self.num_households = num_households
+
+        def per_household(value, dtype=float):
+            return np.broadcast_to(np.asarray(value, dtype=dtype), (num_households,)).copy()
+
+        self.ac_power_watt = per_household(ac_power_watt)
+        self.ac_cop = per_household(ac_cop)
+        lighting = LightingSystemModel()
+        bulb_power = lighting.bulb_types[lighting.active_type]
+        self.living_room_lights_watt = per_household(living_room_bulbs) * bulb_power
+        self.bedroom_lights_watt = per_household(bedroom_bulbs) * bulb_power
+        self.refrigerator_power_watt = per_household(refrigerator_power_watt)
+        power_factor = np.where(per_household(tv_tech, dtype=object) == "OLED", 0.15, 0.12)
+        self.tv_active_power = per_household(tv_size_inches) * 2.0 * power_factor
+        self.water_heater_capacity = per_household(water_heater_capacity_liters)
+        self.water_heater_power_watt = per_household(water_heater_power_watt)
+
+    @staticmethod
+    def schedule(hour, minute):
+        """(lights_on, tv_on, computer_state) of the lighting, television and computer models at hour:minute."""
+        lights_on = (18 <= hour <= 23) or (7 <= hour <= 8)
+        tv_on = (7 == hour and minute >= 30) or (8 == hour and minute <= 30) or (19 <= hour <= 23)
+        if (9 <= hour <= 17) or (20 <= hour <= 23):
+            computer_state = "High_Work"
+        elif 0 <= hour <= 8:
+            computer_state = "Sleep"
+        else:
+            computer_state = "Idle"
+        return lights_on, tv_on, computer_state
+
+    def simulate_24_hours(self, dtype=np.float64):
+        """
+        Simulate all households for 24 hours in 15 minute steps.
+
+        Args:
+            dtype: Storage type of the power array (e.g. np.float32 to halve its memory).
+
+        Returns:
+            tuple:
+                daily_energy (pd.DataFrame): Households x METERED_APPLIANCES daily energy (Wh).
+                power (np.ndarray): Preallocated households x steps x APPLIANCES array of power draw (W).
+        """
+        n = self.num_households
+        power = np.zeros((n, self.STEPS_PER_DAY, len(self.APPLIANCES)), dtype=dtype)
+        column = {name: i for i, name in enumerate(self.APPLIANCES)}
+        energy = {name: np.zeros(n) for name in self.METERED_APPLIANCES}
+
+        # Initial model states (see the *Model classes)
+        ac = AirConditionerModel()
+        refrigerator = RefrigeratorModel()
+        water_heater = WaterHeaterModel()
+        ac_temp_room = np.full(n, ac.temp_room)
+        ac_on = np.zeros(n, dtype=bool)
+        fridge_temp_inside = np.full(n, refrigerator.temp_inside)
+        water_temp = np.full(n, water_heater.temp_water)
+        water_heating = np.zeros(n, dtype=bool)
+        laptop_states = ComputingLoadModel("Laptop").states
+        desktop_states = ComputingLoadModel("Desktop").states
+        dt_seconds = self.STEP_MINUTES * 60
+
+        for step in range(self.STEPS_PER_DAY):
+            hour, minute = divmod(step * self.STEP_MINUTES, 60)
+
+            # AC: hysteresis thermostat against the day/night outside temperature
+            outside_temp = 28 if 8 <= hour <= 18 else 24
+            ac_on = np.where(ac_temp_room > (ac.t_set + ac.hysteresis), True,
+                             np.where(ac_temp_room < (ac.t_set - ac.hysteresis), False, ac_on))
+            heat_gain = ac.insulation_k * (outside_temp - ac_temp_room)
+            cooling_power = np.where(ac_on, (self.ac_power_watt * self.ac_cop) / 1000, 0)
+            ac_temp_room = ac_temp_room + (heat_gain - cooling_power * ac.air_mass_const)
+            ac_power = np.where(ac_on, self.ac_power_watt, 0)
+            energy['AC'] += ac_power * (self.STEP_MINUTES / 60)
+
+            # Lighting, television and computers follow fixed daily schedules
+            lights_on, tv_on, computer_state = self.schedule(hour, minute)
+            living_room_power = self.living_room_lights_watt if lights_on else np.zeros(n)
+            bedroom_power = self.bedroom_lights_watt if lights_on else np.zeros(n)
+            energy['Living_Room_Lights'] += living_room_power * (1 / 60)
+            energy['Bedroom_Lights'] += bedroom_power * (1 / 60)
+
+            tv_power = self.tv_active_power if tv_on else np.full(n, 1.5)
+            energy['Television'] += tv_power * (1 / 60)
+
+            energy['Laptop'] += laptop_states[computer_state] * (1 / 60)
+            energy['Desktop'] += desktop_states[computer_state] * (1 / 60)
+
+            # Refrigerator: compressor runs whenever the inside is above the set point band
+            fridge_on = fridge_temp_inside > (refrigerator.t_set + refrigerator.hysteresis)
+            heat_leak = refrigerator.insulation_k * (refrigerator.temp_ambient - fridge_temp_inside)
+            fridge_temp_inside = fridge_temp_inside + (heat_leak - np.where(fridge_on, 0.5, 0))
+            fridge_power = np.where(fridge_on, self.refrigerator_power_watt, 0)
+            energy['Refrigerator'] += fridge_power * (self.STEP_MINUTES / 60)
+
+            # Water heater: morning shower draw, then deadband thermostat
+            if hour == 8 and minute == 0:
+                fraction_replaced = np.minimum(15 / self.water_heater_capacity, 1.0)
+                water_temp = (water_temp * (1 - fraction_replaced)) + (25.0 * fraction_replaced)
+            water_heating = np.where(water_temp < (water_heater.t_set - water_heater.t_deadband), True,
+                                     np.where(water_temp >= water_heater.t_set, False, water_heating))
+            q_in = np.where(water_heating, self.water_heater_power_watt * dt_seconds, 0)
+            q_loss = water_heater.insulation_k * (water_temp - water_heater.temp_ambient) * dt_seconds
+            water_temp = water_temp + (q_in - q_loss) / (self.water_heater_capacity
+                                                         * water_heater.specific_heat_water)
+            water_heater_power = np.where(water_heating, self.water_heater_power_watt, 0)
+            energy['Water_Heater'] += water_heater_power * (dt_seconds / 3600)
+
+            # Ceiling fan, washing machine and kitchen appliances draw nothing in the 24-hour run
+            step_power = power[:, step, :]
+            step_power[:, column['AC']] = ac_power
+            step_power[:, column['Living_Room_Lights']] = living_room_power
+            step_power[:, column['Bedroom_Lights']] = bedroom_power
+            step_power[:, column['Refrigerator']] = fridge_power
+            step_power[:, column['Television']] = tv_power
+            step_power[:, column['Laptop']] = laptop_states[computer_state]
+            step_power[:, column['Desktop']] = desktop_states[computer_state]
+            step_power[:, column['Water_Heater']] = water_heater_power
+
+        return pd.DataFrame(energy, columns=self.METERED_APPLIANCES), power
+
+    @classmethod
+    def hourly_data(cls, power, household):
+        """One household's power array as the hourly DataFrame ApplianceSimulator.simulate_24_hours returns."""
+        steps = np.arange(power.shape[1])
+        hourly_df = pd.DataFrame(power[household], columns=cls.APPLIANCES)
+        hourly_df.insert(0, 'total_power_w', hourly_df.sum(axis=1))
+        hourly_df.insert(0, 'minute', steps * cls.STEP_MINUTES % 60)
+        hourly_df.insert(0, 'hour', steps * cls.STEP_MINUTES // 60)
+        return hourly_df
+
+    def simulate_year(self, outdoor_temp, water_inlet_temp=None, ambient_temp=None, water_heater_substeps=15,
+                      dtype=np.float64):
+        """
+        Simulate all households hour by hour over a year of outdoor temperatures.
+
+        The AC works against each hour's outdoor temperature instead of the fixed day/night
+        profile of simulate_24_hours, and the water heater refills with cold water that follows
+        the weather, so cooling and water heating vary with the season. Thermostat
+        states carry over from day to day. Appliances on fixed daily schedules are simulated
+        for one day and repeated; only the AC and water heater are simulated through the year,
+        the water heater event by event (see simulate_thermostats).
+
+        Args:
+            outdoor_temp (array-like): Hourly outdoor temperature (°C), either one series shared
+                                       by all households or a households x hours array (see
+                                       outdoor_temperatures). The length must be whole days,
+                                       normally HOURS_PER_YEAR.
+            water_inlet_temp (array-like, optional): Hourly cold water temperature (°C) in the same
+                                                     shapes; defaults to each day's mean outdoor temperature.
+            ambient_temp (array-like, optional): Hourly temperature of the room around the water heater
+                                                 (°C), which its standby loss works against, in the
+                                                 same shapes; defaults to the model's temp_ambient.
+            water_heater_substeps (int): Thermostat updates of the water heater per STEP_MINUTES step.
+                                         The default 15 is the model's own one-minute control; 1
+                                         matches simulate_24_hours, but one 15 minute heating step
+                                         adds about 26 °C, so every reheat then costs the same
+                                         energy whatever the inlet temperature.
+            dtype: Storage type of the profile and intermediate hourly arrays (e.g. np.float32
+                   to halve their memory).
+
+        Returns:
+            tuple:
+                annual_energy (pd.DataFrame): Households x METERED_APPLIANCES energy (Wh) over the series.
+                profiles (np.ndarray): Preallocated households x hours x APPLIANCES array of
+                                       mean power per hour (W, i.e. Wh in that hour).
+        """
+        n = self.num_households
+        outdoor_temp = np.asarray(outdoor_temp, dtype=float)
+        hours = outdoor_temp.shape[-1]
+        if hours == 0 or hours % 24:
+            raise ValueError(f"outdoor_temp must cover whole days of 24 hours, got {hours} hours")
+        days = hours // 24
+        # Hours first, so each hour's temperatures for all households are contiguous
+        outdoor = np.ascontiguousarray(np.broadcast_to(outdoor_temp, (n, hours)).T)
+        if water_inlet_temp is None:
+            inlet = np.repeat(outdoor.reshape(days, 24, n).mean(axis=1), 24, axis=0)
+        else:
+            inlet = np.ascontiguousarray(np.broadcast_to(np.asarray(water_inlet_temp, dtype=float), (n, hours)).T)
+        water_heater = WaterHeaterModel()
+        if ambient_temp is None:
+            ambient_temp = water_heater.temp_ambient
+        ambient = np.ascontiguousarray(np.broadcast_to(np.asarray(ambient_temp, dtype=float), (n, hours)).T)
+
+        profiles = np.zeros((n, hours, len(self.APPLIANCES)), dtype=dtype)
+        column = {name: i for i, name in enumerate(self.APPLIANCES)}
+        # Same array viewed per day, for repeating one day's scheduled loads
+        daily_profiles = profiles.reshape(n, days, 24, len(self.APPLIANCES))
+
+        # Lighting, television and computers: the same day every day
+        laptop_states = ComputingLoadModel("Laptop").states
+        desktop_states = ComputingLoadModel("Desktop").states
+        lights_fraction = np.zeros(24)
+        tv_fraction = np.zeros(24)
+        laptop_power = np.zeros(24)
+        desktop_power = np.zeros(24)
+        for step in range(self.STEPS_PER_DAY):
+            hour, minute = divmod(step * self.STEP_MINUTES, 60)
+            lights_on, tv_on, computer_state = self.schedule(hour, minute)
+            lights_fraction[hour] += lights_on / self.STEPS_PER_HOUR
+            tv_fraction[hour] += tv_on / self.STEPS_PER_HOUR
+            laptop_power[hour] += laptop_states[computer_state] / self.STEPS_PER_HOUR
+            desktop_power[hour] += desktop_states[computer_state] / self.STEPS_PER_HOUR
+        daily_profiles[:, :, :, column['Living_Room_Lights']] = (
+            self.living_room_lights_watt[:, None] * lights_fraction)[:, None, :]
+        daily_profiles[:, :, :, column['Bedroom_Lights']] = (
+            self.bedroom_lights_watt[:, None] * lights_fraction)[:, None, :]
+        daily_profiles[:, :, :, column['Television']] = (
+            self.tv_active_power[:, None] * tv_fraction + 1.5 * (1 - tv_fraction))[:, None, :]
+        daily_profiles[:, :, :, column['Laptop']] = laptop_power
+        daily_profiles[:, :, :, column['Desktop']] = desktop_power
+
+        # Refrigerator: its temperature does not depend on the household, so one run serves all
+        refrigerator = RefrigeratorModel()
+        fridge_temp_inside = refrigerator.temp_inside
+        fridge_fraction = np.zeros(hours)
+        for hour in range(hours):
+            for _ in range(self.STEPS_PER_HOUR):
+                fridge_on = fridge_temp_inside > (refrigerator.t_set + refrigerator.hysteresis)
+                heat_leak = refrigerator.insulation_k * (refrigerator.temp_ambient - fridge_temp_inside)
+                fridge_temp_inside += heat_leak - (0.5 if fridge_on else 0)
+                fridge_fraction[hour] += fridge_on
+        profiles[:, :, column['Refrigerator']] = (
+            self.refrigerator_power_watt[:, None] * (fridge_fraction / self.STEPS_PER_HOUR))
+
+        # AC: thermostat stepped through the weather series at the model's 15 minute step
+        ac = AirConditionerModel()
+        ac_temp_room = np.full(n, ac.temp_room)
+        ac_on = np.zeros(n, dtype=bool)
+        ac_cooling = (self.ac_power_watt * self.ac_cop) / 1000 * ac.air_mass_const
+        ac_switch_on, ac_switch_off = ac.t_set + ac.hysteresis, ac.t_set - ac.hysteresis
+        heat_flow = np.empty(n)
+        ac_steps_on = np.zeros(n)
+        ac_share = np.empty((hours, n), dtype=dtype)
+        # Water heater: thermostat jumped from one switch to the next with simulate_thermostats,
+        # so the step count costs nothing
+        water_temp = np.full(n, water_heater.temp_water)
+        water_heating = np.zeros(n, dtype=bool)
+        water_steps = self.STEPS_PER_HOUR * water_heater_substeps
+        dt_seconds = self.STEP_MINUTES * 60 / water_heater_substeps
+        water_heat_capacity = self.water_heater_capacity * water_heater.specific_heat_water
+        water_leak = water_heater.insulation_k * dt_seconds / water_heat_capacity
+        water_drive = self.water_heater_power_watt * dt_seconds / water_heat_capacity
+        water_switch_on = (np.less, water_heater.t_set - water_heater.t_deadband)
+        water_switch_off = (np.greater_equal, water_heater.t_set)
+        fraction_replaced = np.minimum(15 / self.water_heater_capacity, 1.0)
+        water_share = np.empty((hours, n), dtype=dtype)
+        for hour in range(hours):
+            outside_temp = outdoor[hour]
+            ac_steps_on[:] = 0
+            for _ in range(self.STEPS_PER_HOUR):
+                # Same update as simulate_24_hours, computed in place
+                ac_on = (ac_temp_room > ac_switch_on) | (ac_on & (ac_temp_room >= ac_switch_off))
+                np.subtract(outside_temp, ac_temp_room, out=heat_flow)
+                heat_flow *= ac.insulation_k
+                heat_flow -= ac_cooling * ac_on
+                ac_temp_room += heat_flow
+                ac_steps_on += ac_on
+            ac_share[hour] = ac_steps_on
+
+            if hour % 24 == 8:
+                water_temp = (water_temp * (1 - fraction_replaced)) + (inlet[hour] * fraction_replaced)
+            water_temp, water_heating, water_steps_on = simulate_thermostats(
+                water_temp, water_heating, water_steps, water_leak, ambient[hour], water_drive,
+                water_switch_on, water_switch_off)
+            water_share[hour] = water_steps_on
+        profiles[:, :, column['AC']] = ac_share.T * (self.ac_power_watt[:, None] / self.STEPS_PER_HOUR)
+        profiles[:, :, column['Water_Heater']] = water_share.T * (self.water_heater_power_watt[:, None] / water_steps)
+
+        # Mean power per hour summed over the hours is energy in Wh
+        metered = [column[name] for name in self.METERED_APPLIANCES]
+        annual_energy = pd.DataFrame(profiles[:, :, metered].sum(axis=1, dtype=float),
+                                     columns=self.METERED_APPLIANCES)
+        return annual_energy, profiles
+
+
+def read_hourly_climatology(file_path):
+    """
+    Reads an hourly outdoor-temperature climatology for simulate_year.
+
+    The CSV has one row per hour of the year (8760 rows) and one column of temperatures
+    (°C) per city, named as in the survey's Q1_City answers. An 'hour' column, if present,
+    is used as the index.
+
+    Returns:
+        pd.DataFrame: Hours x cities temperatures.
+    """
+    climatology = pd.read_csv(file_path)
+    if 'hour' in climatology.columns:
+        climatology = climatology.set_index('hour')
+    if len(climatology) == 0 or len(climatology) % 24:
+        raise ValueError(f"Climatology {file_path} must cover whole days of 24 hours, got {len(climatology)} rows")
+    return climatology.astype(float)
+
+
+def outdoor_temperatures(cities, climatology):
+    """
+    Households x hours outdoor temperatures for BatchApplianceSimulator.simulate_year.
+
+    Each household gets its city's column of the climatology (matched ignoring case and
+    surrounding whitespace); households in cities without a column, or without a city,
+    get the mean across all cities.
+
+    Args:
+        cities (iterable): Q1_City answer of each household.
+        climatology (pd.DataFrame): Hours x cities temperatures, see read_hourly_climatology.
+    """
+    columns = {str(city).strip().casefold(): i for i, city in enumerate(climatology.columns)}
+    series = climatology.to_numpy(dtype=float).T
+    # The last row is the all-city mean used for unknown cities
+    series = np.vstack([series, series.mean(axis=0)])
+    rows = [columns.get(city.strip().casefold(), len(columns)) if isinstance(city, str) else len(columns)
+            for city in cities]
+    return series[rows]
+
+
 # --- Appliance and Usage Data (Typical Values Only) ---
 # Appliance power consumption in Watts (now single typical value)
 APPLIANCE_POWER_TYPICAL = {
@@ -440,6 +948,72 @@ def safe_numeric_conversion(value, default=0):
         return default
 
 
+# Survey answers the analysis reads through safe_numeric_conversion
+NUMERIC_SURVEY_COLUMNS = (
+    'Q2_num_adults', 'Q7_sq_ft_home', 'Q9_num_refrigerators', 'Q13_num_stoves', 'Q15_num_wall_ovens',
+    'Q17_wall_oven_usage', 'Q20_clothes_washer_usage', 'Q26_num_televisions', 'Q29_tv_daily_hours',
+    'Q30_num_desktop_computers', 'Q30_num_laptop_computers', 'Q30_num_tablets_ereaders',
+    'Q30_num_printers_scanners_etc', 'Q30_num_smart_phones', 'Q30_num_other_cell_phones',
+    'Q41_temp_summer_day_home', 'Q41_temp_summer_day_away', 'Q41_temp_summer_night',
+    'Q42_num_ceiling_fans', 'Q42_num_floor_window_fans', 'Q42_num_whole_house_fans', 'Q42_num_attic_fans',
+    'Q47_num_light_bulbs_total', 'Q48_num_light_bulbs_4hr_plus', 'Q57_fuel_oil_num_deliveries_past_year',
+    'Q57_fuel_oil_tank_size', 'Q60_num_lpg_propane_cylinders_year',
+)
+
+
+def _clean_numeric_series(series, default=0):
+    """
+    safe_numeric_conversion applied to a whole column with pandas string operations,
+    returning the converted values as floats.
+    """
+    values = series.to_numpy(dtype=object)
+    converted = np.full(len(values), float(default))
+    is_str = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+
+    if is_str.any():
+        cleaned = (pd.Series(values[is_str], dtype=object)
+                   .str.replace('₹', '', regex=False)
+                   .str.replace(',', '', regex=False)
+                   .str.strip())
+        numeric = cleaned.str.replace('.', '', n=1, regex=False).str.isdigit().to_numpy(dtype=bool)
+        positions = np.flatnonzero(is_str)[numeric]
+        converted[positions] = pd.to_numeric(cleaned[numeric], errors='coerce').to_numpy(dtype=float)
+
+    if not is_str.all():
+        # Missing answers and numbers, converted once per distinct value
+        codes, uniques = pd.factorize(pd.Series(values[~is_str], dtype=object), use_na_sentinel=False)
+        results = [safe_numeric_conversion(value, default) for value in uniques]
+        converted[~is_str] = np.array(results, dtype=float)[codes]
+
+    return converted
+
+
+def clean_numeric_columns(df, columns=NUMERIC_SURVEY_COLUMNS, default=0):
+    """
+    Converts the numeric survey answers of a DataFrame in one pass per column.
+
+    Every cell gets the value safe_numeric_conversion would return for it ('₹' and
+    commas stripped, non-numeric answers replaced by default), as a float. Columns
+    missing from df are added as NaN, like row.get() returning None. The result can be
+    passed to estimate_annual_electricity_consumption_frame in place of the raw frame.
+
+    Args:
+        df (pd.DataFrame): Survey data, one household per row.
+        columns (iterable): Columns to convert; defaults to NUMERIC_SURVEY_COLUMNS.
+        default: Value for answers that are not numbers.
+
+    Returns:
+        pd.DataFrame: A copy of df with the converted columns.
+    """
+    cleaned = df.copy()
+    for column in columns:
+        if column not in df.columns:
+            cleaned[column] = np.nan
+        elif not (pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column])):
+            cleaned[column] = _clean_numeric_series(df[column], default)
+    return cleaned
+
+
 # --- Define Classes for Each Category ---
 class HouseholdInformation:
     def __init__(self, row):
@@ -608,12 +1182,12 @@ class EnergyConsumptionCosts:
 
     def _calculate_kwh_typical(self, typical_value, num_units=1):
         """Helper to calculate typical kWh for an appliance."""
-        return round(typical_value * num_units, 2)
+        return round_kwh(typical_value * num_units)
 
     def simulate_household_appliances(self):
         """Simulate all household appliances for 24-hour period"""
         simulator = ApplianceSimulator()
-        daily_energy, hourly_df = simulator.simulate_24_hours()
+        daily_energy, hourly_df = SIMULATION_CACHE.simulate_24_hours(simulator)
         peak_load = simulator.get_peak_load_analysis(hourly_df)
         efficiency = simulator.get_appliance_efficiency_ratings(daily_energy)
         
@@ -644,38 +1218,14 @@ class EnergyConsumptionCosts:
         refrigerator_age = str(self._row.get('Q12_refrigerator_age')).lower()
 
         if num_refrigerators > 0:
-            power_w_refrigerator = 0  # Initialize
-            if 'half-size or compact' in refrigerator_size:
-                power_w_refrigerator = APPLIANCE_POWER_TYPICAL['Refrigerator_Half_Compact']
-            elif 'small (17.5 cubic feet or less)' in refrigerator_size:
-                power_w_refrigerator = APPLIANCE_POWER_TYPICAL['Refrigerator_Small']
-            elif 'medium (17.6 to 22.5 cubic feet)' in refrigerator_size:
-                power_w_refrigerator = APPLIANCE_POWER_TYPICAL['Refrigerator_Medium']
-            elif 'large (22.6 to 29.5 cubic feet)' in refrigerator_size:
-                power_w_refrigerator = APPLIANCE_POWER_TYPICAL['Refrigerator_Large']
-            elif 'very large (bigger than 29.5 cubic feet)' in refrigerator_size:
-                power_w_refrigerator = APPLIANCE_POWER_TYPICAL['Refrigerator_XLarge']
-            else:
-                # Default if size not recognized, use medium as a fallback
-                power_w_refrigerator = APPLIANCE_POWER_TYPICAL['Refrigerator_Medium']
+            # Unrecognized sizes fall back to medium
+            power_w_refrigerator = REFRIGERATOR_SIZE_CODES.factor(refrigerator_size)
 
             typical_kwh_refrigerator = power_w_refrigerator * 24 * 365 / 1000  # Base kWh
 
             # Adjust for age (older refrigerators are less efficient)
-            age_factor = 1.0  # Default to no age adjustment
-            if 'less than 2 years old' in refrigerator_age:
-                age_factor = APPLIANCE_POWER_TYPICAL['Refrigerator_Age_Less_2_Factor']
-            elif '2 to 4 years old' in refrigerator_age:
-                age_factor = APPLIANCE_POWER_TYPICAL['Refrigerator_Age_2_4_Factor']
-            elif '5 to 9 years old' in refrigerator_age:
-                age_factor = APPLIANCE_POWER_TYPICAL['Refrigerator_Age_5_9_Factor']
-            elif '10 to 14 years old' in refrigerator_age:
-                age_factor = APPLIANCE_POWER_TYPICAL['Refrigerator_Age_10_14_Factor']
-            elif '15 to 19 years old' in refrigerator_age:
-                age_factor = APPLIANCE_POWER_TYPICAL['Refrigerator_Age_15_19_Factor']
-            elif '20 or more years old' in refrigerator_age:
-                age_factor = APPLIANCE_POWER_TYPICAL['Refrigerator_Age_20_Plus_Factor']
-            # 'Don't know' or unhandled ages will use the default age_factor of 1.0
+            # 'Don't know' or unhandled ages get no age adjustment (1.0)
+            age_factor = REFRIGERATOR_AGE_CODES.factor(refrigerator_age)
 
             typical_kwh_refrigerator *= age_factor
 
@@ -692,19 +1242,7 @@ class EnergyConsumptionCosts:
             typical_kwh_ac = (APPLIANCE_POWER_TYPICAL['AC'] * USAGE_HOURS_TYPICAL['AC_Daily_Hours'] * 365) / 1000
 
             # Apply AC age factor - NEW
-            ac_age_factor = 1.0  # Default
-            if 'less than 2 years old' in central_ac_age:
-                ac_age_factor = APPLIANCE_POWER_TYPICAL['AC_Age_Less_2_Factor']
-            elif '2 to 4 years old' in central_ac_age:
-                ac_age_factor = APPLIANCE_POWER_TYPICAL['AC_Age_2_4_Factor']
-            elif '5 to 9 years old' in central_ac_age:
-                ac_age_factor = APPLIANCE_POWER_TYPICAL['AC_Age_5_9_Factor']
-            elif '10 to 14 years old' in central_ac_age:
-                ac_age_factor = APPLIANCE_POWER_TYPICAL['AC_Age_10_14_Factor']
-            elif '15 to 19 years old' in central_ac_age:
-                ac_age_factor = APPLIANCE_POWER_TYPICAL['AC_Age_15_19_Factor']
-            elif '20 or more years old' in central_ac_age:
-                ac_age_factor = APPLIANCE_POWER_TYPICAL['AC_Age_20_Plus_Factor']
+            ac_age_factor = AC_AGE_CODES.factor(central_ac_age)
 
             typical_kwh_ac *= ac_age_factor  # Apply age factor
             typical_kwh_ac = self._calculate_kwh_typical(typical_kwh_ac, 1)
@@ -747,7 +1285,7 @@ class EnergyConsumptionCosts:
                 lighting_kwh_typical += self._calculate_kwh_typical(
                     (avg_bulb_power_w_typical * usage_other_hours_typical * 365) / 1000, remaining_bulbs)
 
-            breakdown['Lighting'] = round(lighting_kwh_typical, 2)
+            breakdown['Lighting'] = round_kwh(lighting_kwh_typical)
             total_typical_kwh += breakdown['Lighting']
 
         # Televisions
@@ -758,38 +1296,11 @@ class EnergyConsumptionCosts:
 
         if num_televisions > 0 and tv_daily_hours_reported > 0:
             # Determine base power based on TV type
-            power_w_type = 0  # Initialize
-            if 'crt' in tv_type:
-                power_w_type = APPLIANCE_POWER_TYPICAL['TV_Type_CRT']
-            elif 'lcd' in tv_type:
-                power_w_type = APPLIANCE_POWER_TYPICAL['TV_Type_LCD']
-            elif 'led' in tv_type:
-                power_w_type = APPLIANCE_POWER_TYPICAL['TV_Type_LED']
-            elif 'plasma' in tv_type:
-                power_w_type = APPLIANCE_POWER_TYPICAL['TV_Type_Plasma']
-            elif 'oled' in tv_type:
-                power_w_type = APPLIANCE_POWER_TYPICAL['TV_Type_OLED']
-            else:
-                # Fallback if type not recognized, use LED as a modern default
-                power_w_type = APPLIANCE_POWER_TYPICAL['TV_Type_LED']
-
-            # Adjust power based on TV size (as a multiplier or direct override if sizes are distinct enough)
-            # For simplicity, let's apply a size factor to the base type wattage
-            size_factor = 1.0  # Default for medium
-            if 'less than 27 inches' in tv_size:
-                # Assuming TV_Size_Less_27_inches is a direct wattage, let's use it if available,
-                # otherwise apply a factor to the type wattage.
-                # For this implementation, let's prioritize the type wattage and apply a size factor.
-                # If you want to use the TV_Size_X_inches as the primary wattage, the logic needs to change.
-                # For now, let's make it a factor to the type wattage for more granular control.
-                size_factor = APPLIANCE_POWER_TYPICAL['TV_Size_Less_27_inches'] / APPLIANCE_POWER_TYPICAL[
-                    'TV_Size_27_39_inches']  # Factor relative to medium
-            elif '40 to 59 inches' in tv_size:
-                size_factor = APPLIANCE_POWER_TYPICAL['TV_Size_40_59_inches'] / APPLIANCE_POWER_TYPICAL[
-                    'TV_Size_27_39_inches']
-            elif '60 inches or larger' in tv_size:
-                size_factor = APPLIANCE_POWER_TYPICAL['TV_Size_60_or_larger_inches'] / APPLIANCE_POWER_TYPICAL[
-                    'TV_Size_27_39_inches']
+            # Unrecognized types fall back to LED as a modern default
+            power_w_type = TV_TYPE_CODES.factor(tv_type)
+
+            # Size factor relative to a medium (27 to 39 inch) set, applied to the type wattage
+            size_factor = TV_SIZE_CODES.factor(tv_size)
 
             # Combine type and size influence
             power_w_final = power_w_type * size_factor
@@ -859,7 +1370,7 @@ class EnergyConsumptionCosts:
                 (APPLIANCE_POWER_TYPICAL['Wireless_Router'] * 24 * 365) / 1000, 1)
 
         if computer_kwh_typical > 0:  # Only add if there's actual consumption
-            breakdown['Computers & Connectivity'] = round(computer_kwh_typical, 2)
+            breakdown['Computers & Connectivity'] = round_kwh(computer_kwh_typical)
             total_typical_kwh += breakdown['Computers & Connectivity']
 
         # Small Kitchen Appliances
@@ -891,7 +1402,7 @@ class EnergyConsumptionCosts:
                                                                        1)
 
         if small_appliance_kwh_typical > 0:
-            breakdown['Other Small Kitchen Appliances'] = round(small_appliance_kwh_typical, 2)
+            breakdown['Other Small Kitchen Appliances'] = round_kwh(small_appliance_kwh_typical)
             total_typical_kwh += breakdown['Other Small Kitchen Appliances']
 
         # Other Use (formerly Miscellaneous)
@@ -905,7 +1416,7 @@ class EnergyConsumptionCosts:
         breakdown['Other Use'] = other_use_kwh_typical
         total_typical_kwh += other_use_kwh_typical
 
-        return round(total_typical_kwh, 2), breakdown
+        return round_kwh(total_typical_kwh), breakdown
 
     def calculate_btu_equivalents(self):
         """
@@ -974,6 +1485,550 @@ class EnergyConsumptionCosts:
         return btu_equivalents
 
 
+# ==================== VECTORIZED DATASET ESTIMATION ====================
+
+# Breakdown categories in the order EnergyConsumptionCosts.estimate_annual_electricity_consumption adds them
+ELECTRICITY_CATEGORIES = [
+    'Refrigerator',
+    'Air Conditioning',
+    'Ceiling Fans',
+    'Lighting',
+    'Televisions',
+    'Water Heater (Electric)',
+    'Clothes Washer',
+    'Clothes Dryer (Electric)',
+    'Computers & Connectivity',
+    'Coffee maker',
+    'Other Small Kitchen Appliances',
+    'Other Use',
+]
+
+# Substring ladders behind the answer code tables (first match wins), as (answer substring, APPLIANCE_POWER_TYPICAL key)
+REFRIGERATOR_SIZE_RULES = [
+    ('half-size or compact', 'Refrigerator_Half_Compact'),
+    ('small (17.5 cubic feet or less)', 'Refrigerator_Small'),
+    ('medium (17.6 to 22.5 cubic feet)', 'Refrigerator_Medium'),
+    ('large (22.6 to 29.5 cubic feet)', 'Refrigerator_Large'),
+    ('very large (bigger than 29.5 cubic feet)', 'Refrigerator_XLarge'),
+]
+REFRIGERATOR_AGE_RULES = [
+    ('less than 2 years old', 'Refrigerator_Age_Less_2_Factor'),
+    ('2 to 4 years old', 'Refrigerator_Age_2_4_Factor'),
+    ('5 to 9 years old', 'Refrigerator_Age_5_9_Factor'),
+    ('10 to 14 years old', 'Refrigerator_Age_10_14_Factor'),
+    ('15 to 19 years old', 'Refrigerator_Age_15_19_Factor'),
+    ('20 or more years old', 'Refrigerator_Age_20_Plus_Factor'),
+]
+AC_AGE_RULES = [
+    ('less than 2 years old', 'AC_Age_Less_2_Factor'),
+    ('2 to 4 years old', 'AC_Age_2_4_Factor'),
+    ('5 to 9 years old', 'AC_Age_5_9_Factor'),
+    ('10 to 14 years old', 'AC_Age_10_14_Factor'),
+    ('15 to 19 years old', 'AC_Age_15_19_Factor'),
+    ('20 or more years old', 'AC_Age_20_Plus_Factor'),
+]
+TV_TYPE_RULES = [
+    ('crt', 'TV_Type_CRT'),
+    ('lcd', 'TV_Type_LCD'),
+    ('led', 'TV_Type_LED'),
+    ('plasma', 'TV_Type_Plasma'),
+    ('oled', 'TV_Type_OLED'),
+]
+TV_SIZE_RULES = [
+    ('less than 27 inches', 'TV_Size_Less_27_inches'),
+    ('40 to 59 inches', 'TV_Size_40_59_inches'),
+    ('60 inches or larger', 'TV_Size_60_or_larger_inches'),
+]
+
+
+def _map_text_column(df, column, func):
+    """Applies func to each distinct lower-cased answer of a column and broadcasts the results to every row."""
+    if column not in df.columns:
+        return np.full(len(df), func('none'))
+    codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+    mapped = np.array([func(str(value).lower()) for value in uniques])
+    if len(mapped) == 0:
+        return np.full(len(df), func('none'))
+    return mapped[codes]
+
+
+class AnswerCodeTable:
+    """
+    Categorical lookup table for one multiple-choice survey answer.
+
+    Each distinct answer is classified once against a substring ladder (first match
+    wins, like the estimator's original if/elif chains) and cached as a small integer
+    code: code i stands for the i-th rule's APPLIANCE_POWER_TYPICAL factor and
+    len(rules) for the default. Whole columns are then mapped with one factorize and an
+    array lookup, and answers that fell back to the default can be reported.
+
+    Args:
+        column (str): Survey column holding the answer.
+        rules (list): (answer substring, APPLIANCE_POWER_TYPICAL key) pairs in priority order.
+        default (float): Factor for answers no rule matches.
+        relative_to (str, optional): APPLIANCE_POWER_TYPICAL key every factor is divided by.
+        expected_defaults (tuple): Lower-cased answers that are meant to get the default
+                                   (e.g. "don't know") and so are not reported.
+    """
+
+    MISSING_ANSWERS = ('', 'nan', 'none')
+
+    def __init__(self, column, rules, default, relative_to=None, expected_defaults=()):
+        self.column = column
+        self.rules = rules
+        factors = [APPLIANCE_POWER_TYPICAL[key] for _, key in rules] + [default]
+        if relative_to is not None:
+            factors = [factor / APPLIANCE_POWER_TYPICAL[relative_to] for factor in factors]
+        # Python floats, so per-row arithmetic rounds exactly as it did with the ladders
+        self.factors = [float(factor) for factor in factors]
+        self.default_code = len(rules)
+        self.expected_defaults = set(expected_defaults) | set(self.MISSING_ANSWERS)
+        self._factor_array = np.array(self.factors)
+        self._codes = {}  # lower-cased answer -> code
+
+    def code(self, answer):
+        text = str(answer).lower()
+        code = self._codes.get(text)
+        if code is None:
+            code = next((i for i, (substring, _) in enumerate(self.rules) if substring in text), self.default_code)
+            self._codes[text] = code
+        return code
+
+    def factor(self, answer):
+        """Factor for a single answer, as a Python float"""
+        return self.factors[self.code(answer)]
+
+    def _factorize(self, df):
+        if self.column not in df.columns:
+            # row.get() returns None for every household
+            return np.zeros(len(df), dtype=np.intp), np.array([None], dtype=object)
+        return pd.factorize(df[self.column], use_na_sentinel=False)
+
+    def codes(self, df):
+        """Code of every household's answer"""
+        positions, uniques = self._factorize(df)
+        return np.array([self.code(answer) for answer in uniques], dtype=np.int8)[positions]
+
+    def lookup(self, df):
+        """Factor of every household's answer"""
+        return self._factor_array[self.codes(df)]
+
+    def unrecognized(self, df):
+        """Answers in df that matched no rule (other than missing or expected ones), with their counts"""
+        positions, uniques = self._factorize(df)
+        counts = np.bincount(positions, minlength=len(uniques))
+        return {str(answer): int(count) for answer, count in zip(uniques, counts)
+                if self.code(answer) == self.default_code and str(answer).lower() not in self.expected_defaults}
+
+
+REFRIGERATOR_SIZE_CODES = AnswerCodeTable('Q10_refrigerator_size', REFRIGERATOR_SIZE_RULES,
+                                          APPLIANCE_POWER_TYPICAL['Refrigerator_Medium'])
+REFRIGERATOR_AGE_CODES = AnswerCodeTable('Q12_refrigerator_age', REFRIGERATOR_AGE_RULES, 1.0,
+                                         expected_defaults=("don't know",))
+AC_AGE_CODES = AnswerCodeTable('Q40_central_ac_age', AC_AGE_RULES, 1.0, expected_defaults=("don't know",))
+TV_TYPE_CODES = AnswerCodeTable('Q28_tv_type', TV_TYPE_RULES, APPLIANCE_POWER_TYPICAL['TV_Type_LED'],
+                                expected_defaults=('other (please specify)',))
+TV_SIZE_CODES = AnswerCodeTable('Q27_tv_size', TV_SIZE_RULES, APPLIANCE_POWER_TYPICAL['TV_Size_27_39_inches'],
+                                relative_to='TV_Size_27_39_inches', expected_defaults=('27 to 39 inches',))
+ANSWER_CODE_TABLES = (REFRIGERATOR_SIZE_CODES, REFRIGERATOR_AGE_CODES, AC_AGE_CODES, TV_TYPE_CODES, TV_SIZE_CODES)
+
+
+def count_unrecognized_answers(df):
+    """Answers the code tables do not recognize, as {column: {answer: households}}"""
+    unrecognized = {}
+    for table in ANSWER_CODE_TABLES:
+        answers = table.unrecognized(df)
+        if answers:
+            unrecognized[table.column] = answers
+    return unrecognized
+
+
+def _text_equals(df, column, expected):
+    return _map_text_column(df, column, lambda text: text == expected).astype(bool)
+
+
+def _numeric_column(df, column):
+    """Column-wise safe_numeric_conversion (see _clean_numeric_series), as floats."""
+    if column not in df.columns:
+        # row.get() returns None, which pd.to_numeric turns into NaN
+        return np.full(len(df), np.nan)
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    return _clean_numeric_series(series)
+
+
+def _round2(values):
+    """kWh rounded to 2 decimals: np.round on float64, the one rule both estimators use."""
+    return np.round(np.asarray(values, dtype=float), 2)
+
+
+def round_kwh(value):
+    """_round2 for a single value, as a Python float (used by the per-row estimator)."""
+    return float(_round2(value))
+
+
+def estimate_annual_electricity_consumption_frame(df):
+    """
+    Frame-level equivalent of EnergyConsumptionCosts.estimate_annual_electricity_consumption.
+
+    Every breakdown category is computed for all households at once with NumPy column
+    operations, reproducing the per-row arithmetic exactly. Both estimators round with
+    _round2, so the result does not depend on how the rows or columns were typed.
+
+    Args:
+        df (pd.DataFrame): Survey data, one household per row, raw or as returned by
+                           clean_numeric_columns.
+
+    Returns:
+        tuple:
+            total_typical_kwh (pd.Series): Annual total per household, indexed like df.
+            breakdown (pd.DataFrame): Households x ELECTRICITY_CATEGORIES kWh matrix. Categories
+                                      the per-row estimator would omit for a household are NaN.
+    """
+    breakdown = {}
+
+    # Refrigerator
+    num_refrigerators = _numeric_column(df, 'Q9_num_refrigerators')
+    power_w_refrigerator = REFRIGERATOR_SIZE_CODES.lookup(df)
+    age_factor = REFRIGERATOR_AGE_CODES.lookup(df)
+    typical_kwh_refrigerator = power_w_refrigerator * 24 * 365 / 1000
+    typical_kwh_refrigerator = typical_kwh_refrigerator * age_factor
+    breakdown['Refrigerator'] = np.where(
+        num_refrigerators > 0,
+        _round2(typical_kwh_refrigerator * num_refrigerators), np.nan)
+
+    # Air Conditioning (central AC only)
+    uses_ac = _text_equals(df, 'Q37_has_ac', 'yes') & _text_equals(df, 'Q38_uses_central_ac', 'yes')
+    ac_age_factor = AC_AGE_CODES.lookup(df)
+    typical_kwh_ac = (APPLIANCE_POWER_TYPICAL['AC'] * USAGE_HOURS_TYPICAL['AC_Daily_Hours'] * 365) / 1000
+    breakdown['Air Conditioning'] = np.where(uses_ac, _round2(typical_kwh_ac * ac_age_factor * 1), np.nan)
+
+    # Ceiling Fans
+    num_ceiling_fans = _numeric_column(df, 'Q42_num_ceiling_fans')
+    typical_kwh_fans = (APPLIANCE_POWER_TYPICAL['Ceiling_Fan'] * USAGE_HOURS_TYPICAL[
+        'Ceiling_Fan_Daily_Hours'] * 365) / 1000
+    breakdown['Ceiling Fans'] = np.where(
+        num_ceiling_fans > 0, _round2(typical_kwh_fans * num_ceiling_fans), np.nan)
+
+    # Lighting
+    num_light_bulbs_total = _numeric_column(df, 'Q47_num_light_bulbs_total')
+    num_light_bulbs_4hr_plus = _numeric_column(df, 'Q48_num_light_bulbs_4hr_plus')
+    avg_bulb_power_w_typical = np.select(
+        [_text_equals(df, 'Q49_LED__light_emitting_diode_', 'yes'), _text_equals(df, 'Q49_Incandescent', 'yes')],
+        [float(APPLIANCE_POWER_TYPICAL['Lighting_LED']), float(APPLIANCE_POWER_TYPICAL['Lighting_Incandescent'])],
+        default=float(APPLIANCE_POWER_TYPICAL['Lighting_CFL']))
+    lighting_4hr_plus = _round2(
+        (avg_bulb_power_w_typical * USAGE_HOURS_TYPICAL['Lighting_4hr+_Daily_Hours'] * 365) / 1000
+        * num_light_bulbs_4hr_plus)
+    remaining_bulbs = num_light_bulbs_total - num_light_bulbs_4hr_plus
+    lighting_other = _round2(
+        (avg_bulb_power_w_typical * USAGE_HOURS_TYPICAL['Lighting_Other_Daily_Hours'] * 365) / 1000
+        * remaining_bulbs)
+    lighting_kwh_typical = (np.where(num_light_bulbs_4hr_plus > 0, lighting_4hr_plus, 0.0)
+                            + np.where(remaining_bulbs > 0, lighting_other, 0.0))
+    breakdown['Lighting'] = np.where(num_light_bulbs_total > 0, _round2(lighting_kwh_typical), np.nan)
+
+    # Televisions
+    num_televisions = _numeric_column(df, 'Q26_num_televisions')
+    tv_daily_hours_reported = _numeric_column(df, 'Q29_tv_daily_hours')
+    power_w_type = TV_TYPE_CODES.lookup(df)
+    size_factor = TV_SIZE_CODES.lookup(df)
+    tv_usage_hours_typical = tv_daily_hours_reported * USAGE_HOURS_TYPICAL['TV_Daily_Hours_Factor']
+    typical_kwh_tv = (power_w_type * size_factor * tv_usage_hours_typical * 365) / 1000
+    breakdown['Televisions'] = np.where((num_televisions > 0) & (tv_daily_hours_reported > 0),
+                                        _round2(typical_kwh_tv * num_televisions), np.nan)
+
+    # Water Heater (Electric Geyser)
+    electric_geyser = (_text_equals(df, 'Q43_has_water_heater', 'yes')
+                       & _text_equals(df, 'Q46_water_heater_fuel', 'electricity'))
+    typical_kwh_geyser = (APPLIANCE_POWER_TYPICAL['Water_Heater_Electric'] * USAGE_HOURS_TYPICAL[
+        'Water_Heater_Daily_Hours'] * 365) / 1000
+    breakdown['Water Heater (Electric)'] = np.where(electric_geyser, _round2(typical_kwh_geyser * 1), np.nan)
+
+    # Clothes Washer (Electric)
+    clothes_washer_usage = _numeric_column(df, 'Q20_clothes_washer_usage')
+    washer_usage_per_week_typical = clothes_washer_usage * USAGE_HOURS_TYPICAL['Clothes_Washer_Weekly_Use_Factor']
+    typical_kwh_washer = (APPLIANCE_POWER_TYPICAL['Clothes_Washer'] * 1 * washer_usage_per_week_typical * 52) / 1000
+    breakdown['Clothes Washer'] = np.where(
+        _text_equals(df, 'Q19_has_clothes_washer', 'yes') & (clothes_washer_usage > 0),
+        _round2(typical_kwh_washer * 1), np.nan)
+
+    # Clothes Dryer (Electric)
+    electric_dryer = (_text_equals(df, 'Q22_has_clothes_dryer', 'yes')
+                      & _text_equals(df, 'Q24_clothes_dryer_fuel', 'electricity'))
+    typical_kwh_dryer = (APPLIANCE_POWER_TYPICAL['Clothes_Dryer_Electric'] * USAGE_HOURS_TYPICAL[
+        'Clothes_Dryer_Weekly_Hours'] * 52) / 1000
+    breakdown['Clothes Dryer (Electric)'] = np.where(electric_dryer, _round2(typical_kwh_dryer * 1), np.nan)
+
+    # Computers & Connectivity
+    num_desktop_computers = _numeric_column(df, 'Q30_num_desktop_computers')
+    num_laptop_computers = _numeric_column(df, 'Q30_num_laptop_computers')
+    desktop_kwh = _round2(
+        (APPLIANCE_POWER_TYPICAL['Desktop_Computer'] * USAGE_HOURS_TYPICAL['Desktop_Daily_Hours'] * 365) / 1000
+        * num_desktop_computers)
+    laptop_kwh = _round2(
+        (APPLIANCE_POWER_TYPICAL['Laptop_Computer'] * USAGE_HOURS_TYPICAL['Laptop_Daily_Hours'] * 365) / 1000
+        * num_laptop_computers)
+    router_kwh = _round2((APPLIANCE_POWER_TYPICAL['Wireless_Router'] * 24 * 365) / 1000 * 1)
+    computer_kwh_typical = (np.where(num_desktop_computers > 0, desktop_kwh, 0.0)
+                            + np.where(num_laptop_computers > 0, laptop_kwh, 0.0)
+                            + np.where(_text_equals(df, 'Q32_has_wireless_router', 'yes'), router_kwh, 0.0))
+    breakdown['Computers & Connectivity'] = np.where(computer_kwh_typical > 0,
+                                                     _round2(computer_kwh_typical), np.nan)
+
+    # Small Kitchen Appliances
+    daily_hours_factor_typical = USAGE_HOURS_TYPICAL['Small_Appliance_Daily_Hours_Factor']
+    toaster_kwh = _round2(
+        (APPLIANCE_POWER_TYPICAL['Small_Appliance_Toaster'] * 0.1 * daily_hours_factor_typical * 365) / 1000 * 1)
+    blender_kwh = _round2(
+        (APPLIANCE_POWER_TYPICAL['Small_Appliance_Blender'] * 0.05 * daily_hours_factor_typical * 365) / 1000 * 1)
+    rice_cooker_kwh = _round2(
+        (APPLIANCE_POWER_TYPICAL['Small_Appliance_Rice_Cooker'] * 0.5 * daily_hours_factor_typical * 365) / 1000
+        * 1)
+    breakdown['Coffee maker'] = np.where(_text_equals(df, 'Q18_Coffee_maker', 'yes'), _round2(60 * 1), np.nan)
+    small_appliance_kwh_typical = (np.where(_text_equals(df, 'Q18_Toaster', 'yes'), toaster_kwh, 0.0)
+                                   + np.where(_text_equals(df, 'Q18_Blender_or_juicer', 'yes'), blender_kwh, 0.0)
+                                   + np.where(_text_equals(df, 'Q18_Rice_cooker', 'yes'), rice_cooker_kwh, 0.0))
+    breakdown['Other Small Kitchen Appliances'] = np.where(small_appliance_kwh_typical > 0,
+                                                           _round2(small_appliance_kwh_typical), np.nan)
+
+    # Other Use
+    num_adults = _numeric_column(df, 'Q2_num_adults')
+    other_use_kwh_typical = np.where(num_adults > 0,
+                                     USAGE_HOURS_TYPICAL['Other_Use_Per_Adult_KWH'] * num_adults,
+                                     USAGE_HOURS_TYPICAL['Other_Use_Default_KWH'])
+    breakdown['Other Use'] = _round2(other_use_kwh_typical * 1)
+
+    # Accumulate in the same order as the per-row estimator so the float sums match
+    total_typical_kwh = np.zeros(len(df))
+    for category in ELECTRICITY_CATEGORIES:
+        present = ~np.isnan(breakdown[category])
+        total_typical_kwh = total_typical_kwh + np.where(present, breakdown[category], 0.0)
+
+    breakdown_df = pd.DataFrame(breakdown, index=df.index, columns=ELECTRICITY_CATEGORIES)
+    return pd.Series(_round2(total_typical_kwh), index=df.index, name='total_kwh'), breakdown_df
+
+
+def breakdown_row_to_dict(breakdown_row):
+    """Converts one row of the frame-level breakdown back to the per-row estimator's dict (Python floats)."""
+    return {category: float(kwh) for category, kwh in breakdown_row.items() if pd.notna(kwh)}
+
+
+# ==================== MONTE CARLO UNCERTAINTY ====================
+
+# Distributions of the estimator's typical constants, as multipliers of the typical value:
+# (numpy.random.Generator method, *arguments). Wattages and usage hours are uncertain by
+# themselves; age factors scale the factor looked up from the household's answer.
+MONTE_CARLO_DISTRIBUTIONS = {
+    'Refrigerator_Power': ('triangular', 0.8, 1.0, 1.3),
+    'Refrigerator_Age_Factor': ('triangular', 0.9, 1.0, 1.15),
+    'AC_Power': ('triangular', 0.75, 1.0, 1.35),
+    'AC_Daily_Hours': ('triangular', 0.5, 1.0, 1.5),
+    'AC_Age_Factor': ('triangular', 0.9, 1.0, 1.15),
+    'Ceiling_Fan_Power': ('triangular', 0.6, 1.0, 1.2),
+    'Ceiling_Fan_Daily_Hours': ('triangular', 0.5, 1.0, 1.5),
+    'Lighting_Bulb_Power': ('triangular', 0.7, 1.0, 1.3),
+    'Lighting_4hr+_Daily_Hours': ('triangular', 0.7, 1.0, 1.5),
+    'Lighting_Other_Daily_Hours': ('triangular', 0.5, 1.0, 2.0),
+    'TV_Power': ('triangular', 0.7, 1.0, 1.4),
+    'TV_Daily_Hours_Factor': ('normal', 1.0, 0.15),
+    'Water_Heater_Power': ('triangular', 0.75, 1.0, 1.5),
+    'Water_Heater_Daily_Hours': ('triangular', 0.5, 1.0, 2.0),
+    'Clothes_Washer_Power': ('triangular', 0.6, 1.0, 1.4),
+    'Clothes_Washer_Weekly_Use_Factor': ('normal', 1.0, 0.15),
+    'Clothes_Dryer_Power': ('triangular', 0.7, 1.0, 1.2),
+    'Clothes_Dryer_Weekly_Hours': ('triangular', 0.5, 1.0, 2.0),
+    'Desktop_Power': ('triangular', 0.6, 1.0, 2.0),
+    'Desktop_Daily_Hours': ('triangular', 0.5, 1.0, 1.5),
+    'Laptop_Power': ('triangular', 0.6, 1.0, 1.5),
+    'Laptop_Daily_Hours': ('triangular', 0.5, 1.0, 1.5),
+    'Wireless_Router_Power': ('uniform', 0.6, 1.4),
+    'Coffee_Maker_Energy': ('lognormal', 0.0, 0.4),
+    'Small_Appliance_Power': ('triangular', 0.7, 1.0, 1.3),
+    'Small_Appliance_Daily_Hours_Factor': ('lognormal', 0.0, 0.5),
+    'Other_Use_Energy': ('lognormal', 0.0, 0.3),
+}
+
+MONTE_CARLO_SAMPLERS = ('triangular', 'uniform', 'normal', 'lognormal')
+
+# Households x draws evaluated at once (float64), bounding the engine's working memory
+MONTE_CARLO_BLOCK_ELEMENTS = 4_000_000
+
+
+def electricity_terms_frame(df):
+    """
+    The typical-value electricity estimate of every household split into terms that are each
+    linear in a few uncertain constants: (category, kWh per household, MONTE_CARLO_DISTRIBUTIONS
+    keys multiplying it). Summed per category they give
+    estimate_annual_electricity_consumption_frame's breakdown (unrounded, absent categories 0).
+    """
+    def count(column):
+        values = _numeric_column(df, column)
+        return np.where(values > 0, values, 0.0)
+
+    terms = []
+    terms.append(('Refrigerator', REFRIGERATOR_SIZE_CODES.lookup(df) * 24 * 365 / 1000
+                  * REFRIGERATOR_AGE_CODES.lookup(df) * count('Q9_num_refrigerators'),
+                  ('Refrigerator_Power', 'Refrigerator_Age_Factor')))
+
+    uses_ac = _text_equals(df, 'Q37_has_ac', 'yes') & _text_equals(df, 'Q38_uses_central_ac', 'yes')
+    terms.append(('Air Conditioning', np.where(uses_ac, APPLIANCE_POWER_TYPICAL['AC'] * USAGE_HOURS_TYPICAL[
+        'AC_Daily_Hours'] * 365 / 1000 * AC_AGE_CODES.lookup(df), 0.0), ('AC_Power', 'AC_Daily_Hours', 'AC_Age_Factor')))
+
+    terms.append(('Ceiling Fans', APPLIANCE_POWER_TYPICAL['Ceiling_Fan'] * USAGE_HOURS_TYPICAL[
+        'Ceiling_Fan_Daily_Hours'] * 365 / 1000 * count('Q42_num_ceiling_fans'),
+        ('Ceiling_Fan_Power', 'Ceiling_Fan_Daily_Hours')))
+
+    num_light_bulbs_total = _numeric_column(df, 'Q47_num_light_bulbs_total')
+    num_light_bulbs_4hr_plus = _numeric_column(df, 'Q48_num_light_bulbs_4hr_plus')
+    avg_bulb_power_w_typical = np.select(
+        [_text_equals(df, 'Q49_LED__light_emitting_diode_', 'yes'), _text_equals(df, 'Q49_Incandescent', 'yes')],
+        [float(APPLIANCE_POWER_TYPICAL['Lighting_LED']), float(APPLIANCE_POWER_TYPICAL['Lighting_Incandescent'])],
+        default=float(APPLIANCE_POWER_TYPICAL['Lighting_CFL']))
+    has_bulbs = num_light_bulbs_total > 0
+    remaining_bulbs = num_light_bulbs_total - num_light_bulbs_4hr_plus
+    terms.append(('Lighting', np.where(has_bulbs & (num_light_bulbs_4hr_plus > 0), avg_bulb_power_w_typical * USAGE_HOURS_TYPICAL[
+        'Lighting_4hr+_Daily_Hours'] * 365 / 1000 * num_light_bulbs_4hr_plus, 0.0),
+        ('Lighting_Bulb_Power', 'Lighting_4hr+_Daily_Hours')))
+    terms.append(('Lighting', np.where(has_bulbs & (remaining_bulbs > 0), avg_bulb_power_w_typical * USAGE_HOURS_TYPICAL[
+        'Lighting_Other_Daily_Hours'] * 365 / 1000 * remaining_bulbs, 0.0),
+        ('Lighting_Bulb_Power', 'Lighting_Other_Daily_Hours')))
+
+    terms.append(('Televisions', TV_TYPE_CODES.lookup(df) * TV_SIZE_CODES.lookup(df) * count('Q29_tv_daily_hours')
+                  * USAGE_HOURS_TYPICAL['TV_Daily_Hours_Factor'] * 365 / 1000 * count('Q26_num_televisions'),
+                  ('TV_Power', 'TV_Daily_Hours_Factor')))
+
+    electric_geyser = (_text_equals(df, 'Q43_has_water_heater', 'yes')
+                       & _text_equals(df, 'Q46_water_heater_fuel', 'electricity'))
+    terms.append(('Water Heater (Electric)', np.where(electric_geyser, APPLIANCE_POWER_TYPICAL[
+        'Water_Heater_Electric'] * USAGE_HOURS_TYPICAL['Water_Heater_Daily_Hours'] * 365 / 1000, 0.0),
+        ('Water_Heater_Power', 'Water_Heater_Daily_Hours')))
+
+    has_washer = _text_equals(df, 'Q19_has_clothes_washer', 'yes')
+    terms.append(('Clothes Washer', np.where(has_washer, APPLIANCE_POWER_TYPICAL['Clothes_Washer'] * USAGE_HOURS_TYPICAL[
+        'Clothes_Washer_Weekly_Use_Factor'] * 52 / 1000 * count('Q20_clothes_washer_usage'), 0.0),
+        ('Clothes_Washer_Power', 'Clothes_Washer_Weekly_Use_Factor')))
+
+    electric_dryer = (_text_equals(df, 'Q22_has_clothes_dryer', 'yes')
+                      & _text_equals(df, 'Q24_clothes_dryer_fuel', 'electricity'))
+    terms.append(('Clothes Dryer (Electric)', np.where(electric_dryer, APPLIANCE_POWER_TYPICAL[
+        'Clothes_Dryer_Electric'] * USAGE_HOURS_TYPICAL['Clothes_Dryer_Weekly_Hours'] * 52 / 1000, 0.0),
+        ('Clothes_Dryer_Power', 'Clothes_Dryer_Weekly_Hours')))
+
+    terms.append(('Computers & Connectivity', APPLIANCE_POWER_TYPICAL['Desktop_Computer'] * USAGE_HOURS_TYPICAL[
+        'Desktop_Daily_Hours'] * 365 / 1000 * count('Q30_num_desktop_computers'),
+        ('Desktop_Power', 'Desktop_Daily_Hours')))
+    terms.append(('Computers & Connectivity', APPLIANCE_POWER_TYPICAL['Laptop_Computer'] * USAGE_HOURS_TYPICAL[
+        'Laptop_Daily_Hours'] * 365 / 1000 * count('Q30_num_laptop_computers'),
+        ('Laptop_Power', 'Laptop_Daily_Hours')))
+    terms.append(('Computers & Connectivity', np.where(_text_equals(df, 'Q32_has_wireless_router', 'yes'),
+                                                       APPLIANCE_POWER_TYPICAL['Wireless_Router'] * 24 * 365 / 1000,
+                                                       0.0), ('Wireless_Router_Power',)))
+
+    terms.append(('Coffee maker', np.where(_text_equals(df, 'Q18_Coffee_maker', 'yes'), 60.0, 0.0),
+                  ('Coffee_Maker_Energy',)))
+
+    daily_hours_factor_typical = USAGE_HOURS_TYPICAL['Small_Appliance_Daily_Hours_Factor']
+    terms.append(('Other Small Kitchen Appliances',
+                  (np.where(_text_equals(df, 'Q18_Toaster', 'yes'), APPLIANCE_POWER_TYPICAL['Small_Appliance_Toaster'] * 0.1, 0.0)
+                   + np.where(_text_equals(df, 'Q18_Blender_or_juicer', 'yes'),
+                              APPLIANCE_POWER_TYPICAL['Small_Appliance_Blender'] * 0.05, 0.0)
+                   + np.where(_text_equals(df, 'Q18_Rice_cooker', 'yes'),
+                              APPLIANCE_POWER_TYPICAL['Small_Appliance_Rice_Cooker'] * 0.5, 0.0))
+                  * daily_hours_factor_typical * 365 / 1000,
+                  ('Small_Appliance_Power', 'Small_Appliance_Daily_Hours_Factor')))
+
+    num_adults = _numeric_column(df, 'Q2_num_adults')
+    terms.append(('Other Use', np.where(num_adults > 0, USAGE_HOURS_TYPICAL['Other_Use_Per_Adult_KWH'] * num_adults,
+                                        float(USAGE_HOURS_TYPICAL['Other_Use_Default_KWH'])), ('Other_Use_Energy',)))
+    return terms
+
+
+def sample_parameter_multipliers(draws, rng, distributions=None):
+    """
+    Draws every uncertain constant's multiplier (see MONTE_CARLO_DISTRIBUTIONS) draws times.
+
+    Args:
+        draws (int): Samples per parameter.
+        rng (np.random.Generator): Source of randomness.
+        distributions (dict, optional): Overrides of MONTE_CARLO_DISTRIBUTIONS entries.
+
+    Returns:
+        dict: Parameter name -> array of draws non-negative multipliers.
+    """
+    distributions = {**MONTE_CARLO_DISTRIBUTIONS, **(distributions or {})}
+    multipliers = {}
+    for name, (sampler, *args) in distributions.items():
+        if sampler not in MONTE_CARLO_SAMPLERS:
+            raise ValueError(f"Unsupported distribution for {name}: {sampler!r} "
+                             f"(expected one of {', '.join(MONTE_CARLO_SAMPLERS)})")
+        multipliers[name] = np.maximum(getattr(rng, sampler)(*args, size=draws), 0.0)
+    return multipliers
+
+
+def _draw_quantiles(base, multipliers, quantiles, block_elements):
+    """
+    Quantiles over the draws of base @ multipliers for every row of base (households x terms).
+
+    Households with the same terms share their quantiles, so only distinct rows are evaluated,
+    block_elements households x draws at a time. A single term is a positive scale of one
+    multiplier, whose quantiles it simply scales.
+    """
+    if base.shape[1] == 1:
+        return base * np.quantile(multipliers[0], quantiles)[np.newaxis, :]
+    unique_rows, inverse = np.unique(base, axis=0, return_inverse=True)
+    result = np.empty((len(unique_rows), len(quantiles)))
+    block = max(1, block_elements // multipliers.shape[1])
+    for start in range(0, len(unique_rows), block):
+        result[start:start + block] = np.quantile(unique_rows[start:start + block] @ multipliers,
+                                                  quantiles, axis=1).T
+    return result[inverse.reshape(-1)]
+
+
+def simulate_electricity_ranges(df, draws=1000, seed=None, distributions=None, percentiles=(10, 50, 90),
+                                block_elements=MONTE_CARLO_BLOCK_ELEMENTS):
+    """
+    Monte Carlo version of estimate_annual_electricity_consumption_frame: instead of one typical
+    kWh figure per category, percentiles of the annual kWh over draws of the uncertain wattages,
+    usage hours and age factors (MONTE_CARLO_DISTRIBUTIONS).
+
+    The parameter draws are made once and shared by every household (and by every chunk of a
+    survey, given the same seed), so results do not depend on how the survey is chunked or
+    sharded. Each household's percentiles are those of its own distribution; the draws model
+    uncertainty in the typical constants, so they are correlated between households.
+
+    Args:
+        df (pd.DataFrame): Survey data, one household per row.
+        draws (int): Monte Carlo samples per household.
+        seed (int, optional): Seed of the random generator, for reproducible ranges.
+        distributions (dict, optional): Overrides of MONTE_CARLO_DISTRIBUTIONS entries.
+        percentiles (tuple): Percentiles to report.
+        block_elements (int): Households x draws evaluated at once.
+
+    Returns:
+        pd.DataFrame: Indexed like df, with (category, 'P10'/'P50'/'P90') columns for
+                      ELECTRICITY_CATEGORIES and 'Total'. Categories a household does not
+                      have are NaN.
+    """
+    sampled = sample_parameter_multipliers(draws, np.random.default_rng(seed), distributions)
+    terms = electricity_terms_frame(df)
+    base = np.column_stack([kwh for _, kwh, _ in terms]) if len(df) else np.zeros((0, len(terms)))
+    multipliers = np.vstack([np.prod([sampled[name] for name in names], axis=0) for _, _, names in terms])
+    quantiles = np.asarray(percentiles) / 100
+    labels = [f'P{percentile:g}' for percentile in percentiles]
+
+    columns = {}
+    for category in ELECTRICITY_CATEGORIES + ['Total']:
+        selected = [i for i, (term_category, _, _) in enumerate(terms) if category in (term_category, 'Total')]
+        category_base = base[:, selected]
+        values = _draw_quantiles(category_base, multipliers[selected], quantiles, block_elements)
+        values[~(category_base > 0).any(axis=1)] = np.nan
+        for label, column in zip(labels, values.T):
+            columns[(category, label)] = column
+    return pd.DataFrame(columns, index=df.index)
+
+
 class DetailedHouseholdAnalysis:
     """Provides comprehensive household energy analysis with recommendations"""
     
@@ -1074,7 +2129,7 @@ class DetailedHouseholdAnalysis:
     def get_load_profile_analysis(self):
         """Analyze household load profile patterns"""
         simulator = ApplianceSimulator()
-        daily_energy, hourly_df = simulator.simulate_24_hours()
+        daily_energy, hourly_df = SIMULATION_CACHE.simulate_24_hours(simulator)
         
         hourly_profile = hourly_df.groupby('hour')[['total_power_w']].mean()
         hourly_profile['peak_w'] = hourly_df.groupby('hour')['total_power_w'].max()
@@ -1085,7 +2140,8 @@ class DetailedHouseholdAnalysis:
 
 # --- Class for Plotting Energy Use (Parent Class for EnhancedPlotting) ---
 class PlotElectricityUse:
-    def plot_combined_energy_breakdowns(self, electricity_breakdown_data, total_energy_breakdown_data):
+    def plot_combined_energy_breakdowns(self, electricity_breakdown_data, total_energy_breakdown_data,
+                                        output_path=None):
         """
         Plots both electricity consumption and total energy consumption breakdowns
         on a single figure with two subplots. Each subplot will have distinct colors,
@@ -1096,7 +2152,10 @@ class PlotElectricityUse:
                                                and values are their estimated annual electricity consumption (typical values).
             total_energy_breakdown_data (dict): A dictionary where keys are category names
                                                 and values are their estimated annual total energy consumption (typical values).
+            output_path (str, optional): Save the figure to this file (format from its extension)
+                                         instead of showing it.
         """
+        plt = _pyplot()
         fig, axes = plt.subplots(1, 2, figsize=(20, 10))
 
         colors = plt.colormaps.get_cmap('tab20')
@@ -1157,14 +2216,28 @@ class PlotElectricityUse:
                            loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
 
         plt.tight_layout(rect=[0, 0, 0.9, 1])
-        plt.show()
-
-    def plot_energy_by_year_built(self, aggregated_data):
+        return self._finish(plt, fig, output_path)
+
+    @staticmethod
+    def _finish(plt, fig, output_path):
+        """Shows the figure, or writes it to output_path; either way it is released afterwards"""
+        try:
+            if output_path is None:
+                plt.show()
+                return None
+            fig.savefig(output_path, bbox_inches='tight')
+            return output_path
+        finally:
+            # Without this a headless run (where show() returns at once) keeps every figure open
+            plt.close(fig)
+
+    def plot_energy_by_year_built(self, aggregated_data, output_path=None):
         """
         Plots Average BTU and Average Sq Ft by Year Range.
 
         Args:
             aggregated_data (pd.DataFrame): DataFrame with 'Year Range', 'Average BTU', and 'Average Sq Ft' columns.
+            output_path (str, optional): Save the figure to this file instead of showing it.
         """
         if aggregated_data.empty:
             print("No data available to plot energy consumption by year built/moved-in.")
@@ -1177,6 +2250,7 @@ class PlotElectricityUse:
         aggregated_data['Year Range'] = pd.Categorical(aggregated_data['Year Range'], categories=year_order, ordered=True)
         aggregated_data = aggregated_data.sort_values('Year Range')
 
+        plt = _pyplot()
         fig, ax1 = plt.subplots(figsize=(12, 7))
 
         color_sqft = 'tab:blue'
@@ -1197,14 +2271,15 @@ class PlotElectricityUse:
         fig.tight_layout()
         plt.grid(True, linestyle='--', alpha=0.7)
         plt.xticks(rotation=45, ha='right')
-        plt.show()
+        return self._finish(plt, fig, output_path)
 
 
 class EnhancedPlotting(PlotElectricityUse):
     """Enhanced plotting with additional visualization capabilities"""
     
-    def plot_hourly_load_profile(self, hourly_profile):
-        """Plot hourly load profile throughout the day"""
+    def plot_hourly_load_profile(self, hourly_profile, output_path=None):
+        """Plot hourly load profile throughout the day (saved to output_path if given)"""
+        plt = _pyplot()
         fig, ax = plt.subplots(figsize=(14, 7))
         
         hours = hourly_profile.index
@@ -1226,382 +2301,1143 @@ class EnhancedPlotting(PlotElectricityUse):
         ax.grid(alpha=0.3)
         
         plt.tight_layout()
-        plt.show()
+        return self._finish(plt, fig, output_path)
+
+
+def _init_render_worker():
+    """Process-pool initializer: render workers never open windows, even when a display is available."""
+    _pyplot()
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _render_plot(plot_name, args, output_path):
+    """Process-pool worker: draws one EnhancedPlotting figure straight to a file."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    return getattr(EnhancedPlotting(), plot_name)(*args, output_path=output_path)
+
+
+class PlotExporter:
+    """
+    Renders plots to image files in a background process pool instead of showing them.
+
+    submit() only queues a figure, so the analysis and report carry on while workers
+    draw; wait() collects the written paths. Figures for a segment (a city, a home
+    type, ...) go to their own subdirectory of output_dir.
+
+    Args:
+        output_dir (str): Directory for the image files (created if needed).
+        formats (tuple): Image formats to write, from FORMATS.
+        segments (tuple): Segment kinds ('city', 'home_type') to draw per-segment figures for.
+        max_workers (int): Rendering processes.
+    """
+
+    FORMATS = ('png', 'svg')
+
+    def __init__(self, output_dir, formats=('png',), segments=(), max_workers=1):
+        unsupported = [fmt for fmt in formats if fmt not in self.FORMATS]
+        if unsupported:
+            raise ValueError(f"Unsupported plot format(s): {', '.join(unsupported)}")
+        unknown = [segment for segment in segments if segment not in SEGMENT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown plot segment(s): {', '.join(unknown)}")
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.segments = tuple(segments)
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker)
+        self._pending = []  # (output path, future)
+
+    def submit(self, plot_name, name, *args, segment=None):
+        """Queues EnhancedPlotting.<plot_name>(*args) to be written as <name>.<format>."""
+        directory = self.output_dir
+        if segment is not None:
+            kind, label = segment
+            directory = os.path.join(directory, kind, _file_safe(label))
+        for fmt in self.formats:
+            output_path = os.path.join(directory, f"{name}.{fmt}")
+            self._pending.append((output_path, self._executor.submit(_render_plot, plot_name, args, output_path)))
+
+    def wait(self):
+        """Blocks until every queued figure is rendered; returns (written paths, {path: error})."""
+        written, failed = [], {}
+        for output_path, future in self._pending:
+            try:
+                written.append(future.result())
+            except Exception as e:
+                failed[output_path] = str(e)
+        self._pending = []
+        return written, failed
+
+    def close(self):
+        self._executor.shutdown()
+
+
+def _file_safe(label):
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in str(label)) or 'Unknown'
 
 
 class Metadata:
     def __init__(self, row):
         self._id = row.get('__v')
 
-# --- Main function to process and print data ---
+# --- Running aggregates for the analytics driver ---
+
+# Fixed kWh to BTU conversion factor
+KWH_TO_BTU = 3412.14
 
-def print_personal_appliance_data(file_path):
+
+# Segment kind -> survey column, for per-segment figure batches
+SEGMENT_COLUMNS = {'city': 'Q1_City', 'home_type': 'Q3_home_type'}
+
+
+def household_segments(row_data):
+    """(segment kind, label) pairs a household belongs to, e.g. ('city', 'Pune')."""
+    segments = []
+    for kind, column in SEGMENT_COLUMNS.items():
+        value = row_data.get(column)
+        label = str(value).strip() if pd.notna(value) else ''
+        segments.append((kind, label or 'Unknown'))
+    return segments
+
+
+class SurveyAggregates:
     """
-    Loads a CSV file, processes electricity and fuel consumption for each person,
-    and then prints only the relevant energy use details (typical values).
-    Applies proportional scaling to estimated electricity consumption to match
-    reported total electricity.
-    Finally, generates combined plots for electricity consumption (kWh)
-    and total energy consumption (BTU by all categories) across all users,
-    using typical values for plotting.
+    Running totals for the combined plots and the final summary.
+
+    Households are folded in one at a time, so the survey rows can be discarded as
+    soon as they have been reported and memory stays flat regardless of file size.
+    """
+
+    # Row numbers kept per distinct error for the summary
+    ERROR_EXAMPLE_ROWS = 5
+
+    def __init__(self):
+        # Total electricity consumption (kWh) for each appliance category across all users
+        self.electricity_kwh_breakdown = {}
+        # Total energy consumption (BTU) for all categories (appliances + fuels) across all users
+        self.total_btu_breakdown = {}
+        # Year range -> [total BTU sum, square feet sum, household count]
+        self.year_range_totals = {}
+        self.num_households = 0
+        # Hourly load profile of the first household that could be simulated
+        self.sample_load_profile = None
+        # Column -> {answer: households} for answers the code tables did not recognize
+        self.unrecognized_answers = {}
+        # (segment kind, label) -> category totals, for per-city / per-home-type figures
+        self.segment_electricity_kwh = {}
+        self.segment_total_btu = {}
+        # Error message -> [households, first row numbers] for households that could not be analyzed
+        self.household_errors = {}
+
+    def add_electricity(self, appliance, kwh, segments=()):
+        self.electricity_kwh_breakdown[appliance] = self.electricity_kwh_breakdown.get(appliance, 0) + kwh
+        self.total_btu_breakdown[appliance] = self.total_btu_breakdown.get(appliance, 0) + (kwh * KWH_TO_BTU)
+        for segment in segments:
+            electricity = self.segment_electricity_kwh.setdefault(segment, {})
+            electricity[appliance] = electricity.get(appliance, 0) + kwh
+            total_btu = self.segment_total_btu.setdefault(segment, {})
+            total_btu[appliance] = total_btu.get(appliance, 0) + (kwh * KWH_TO_BTU)
+
+    def add_fuel(self, fuel_type, btu, segments=()):
+        self.total_btu_breakdown[fuel_type] = self.total_btu_breakdown.get(fuel_type, 0) + btu
+        for segment in segments:
+            total_btu = self.segment_total_btu.setdefault(segment, {})
+            total_btu[fuel_type] = total_btu.get(fuel_type, 0) + btu
+
+    def add_year_record(self, year_range, total_btu, sq_ft):
+        totals = self.year_range_totals.setdefault(year_range, [0, 0, 0])
+        totals[0] += total_btu
+        totals[1] += sq_ft
+        totals[2] += 1
+
+    def add_unrecognized_answers(self, unrecognized):
+        for column, answers in unrecognized.items():
+            counts = self.unrecognized_answers.setdefault(column, {})
+            for answer, households in answers.items():
+                counts[answer] = counts.get(answer, 0) + households
+
+    def add_household_error(self, row_number, error, households=1, rows=None):
+        entry = self.household_errors.setdefault(f"{type(error).__name__}: {error}"
+                                                 if isinstance(error, Exception) else error, [0, []])
+        entry[0] += households
+        for row in (rows if rows is not None else [row_number]):
+            if len(entry[1]) < self.ERROR_EXAMPLE_ROWS:
+                entry[1].append(row)
+
+    def aggregated_year_data(self):
+        """Average BTU (millions) and square footage per year range, as plot_energy_by_year_built expects."""
+        return pd.DataFrame(
+            [{'Year Range': year_range,
+              'Average BTU': btu_sum / count / 1_000_000,
+              'Average Sq Ft': sq_ft_sum / count}
+             for year_range, (btu_sum, sq_ft_sum, count) in sorted(self.year_range_totals.items())],
+            columns=['Year Range', 'Average BTU', 'Average Sq Ft'])
+
+    def merge(self, other):
+        """Folds the partial aggregates of a later shard into these ones."""
+        for appliance, kwh in other.electricity_kwh_breakdown.items():
+            self.electricity_kwh_breakdown[appliance] = self.electricity_kwh_breakdown.get(appliance, 0) + kwh
+        for category, btu in other.total_btu_breakdown.items():
+            self.total_btu_breakdown[category] = self.total_btu_breakdown.get(category, 0) + btu
+        for year_range, (btu_sum, sq_ft_sum, count) in other.year_range_totals.items():
+            totals = self.year_range_totals.setdefault(year_range, [0, 0, 0])
+            totals[0] += btu_sum
+            totals[1] += sq_ft_sum
+            totals[2] += count
+        self.add_unrecognized_answers(other.unrecognized_answers)
+        for message, (households, rows) in other.household_errors.items():
+            self.add_household_error(None, message, households, rows)
+        for mine, theirs in ((self.segment_electricity_kwh, other.segment_electricity_kwh),
+                             (self.segment_total_btu, other.segment_total_btu)):
+            for segment, breakdown in theirs.items():
+                totals = mine.setdefault(segment, {})
+                for category, value in breakdown.items():
+                    totals[category] = totals.get(category, 0) + value
+        self.num_households += other.num_households
+        if self.sample_load_profile is None:
+            self.sample_load_profile = other.sample_load_profile
+        return self
+
+    def to_dict(self):
+        """JSON-serializable copy of the aggregates (see from_dict)."""
+        profile = self.sample_load_profile
+        return {
+            'electricity_kwh_breakdown': self.electricity_kwh_breakdown,
+            'total_btu_breakdown': self.total_btu_breakdown,
+            'year_range_totals': self.year_range_totals,
+            'num_households': self.num_households,
+            'sample_load_profile': None if profile is None else {
+                'index_name': profile.index.name, 'index': profile.index.tolist(),
+                'columns': profile.columns.tolist(), 'data': profile.values.tolist()},
+            'unrecognized_answers': self.unrecognized_answers,
+            'segment_electricity_kwh': [[list(segment), totals]
+                                        for segment, totals in self.segment_electricity_kwh.items()],
+            'segment_total_btu': [[list(segment), totals] for segment, totals in self.segment_total_btu.items()],
+            'household_errors': self.household_errors,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregates = cls()
+        aggregates.electricity_kwh_breakdown = data['electricity_kwh_breakdown']
+        aggregates.total_btu_breakdown = data['total_btu_breakdown']
+        aggregates.year_range_totals = data['year_range_totals']
+        aggregates.num_households = data['num_households']
+        profile = data['sample_load_profile']
+        if profile is not None:
+            aggregates.sample_load_profile = pd.DataFrame(
+                profile['data'], columns=profile['columns'], index=pd.Index(profile['index'], name=profile['index_name']))
+        aggregates.unrecognized_answers = data['unrecognized_answers']
+        aggregates.segment_electricity_kwh = {tuple(segment): totals for segment, totals in data['segment_electricity_kwh']}
+        aggregates.segment_total_btu = {tuple(segment): totals for segment, totals in data['segment_total_btu']}
+        aggregates.household_errors = data['household_errors']
+        return aggregates
+
+
+# Export order of the backend's survey collection (and of its CSV downloads)
+SURVEY_KEY_COLUMNS = ['submitted_at', '_id']
+
+# Where app/backend/app.py stores the survey submissions
+SURVEY_DATABASE = 'household_energy'
+SURVEY_COLLECTION = 'surveys'
+# Documents per cursor batch (and DataFrame chunk) when no chunksize is given
+SURVEY_COLLECTION_BATCH = 5000
+
+# Survey answers the analysis reads; everything else stays on the MongoDB server
+SURVEY_FIELDS = (
+    '_id', 'submitted_at',
+    'Q0_name', 'Q1_City', 'Q1_Pincode', 'Q2_num_adults', 'Q3_home_type', 'Q4_ownership', 'Q5_year_built',
+    'Q6_move_in_year', 'Q7_sq_ft_home', 'Q8_sq_ft_attic', 'Q8_sq_ft_basement', 'Q8_sq_ft_garage',
+    'Q9_num_refrigerators', 'Q10_refrigerator_size', 'Q11_refrigerator_type', 'Q12_refrigerator_age',
+    'Q13_num_stoves', 'Q14_stove_fuel', 'Q14_other', 'Q15_num_wall_ovens', 'Q16_wall_oven_fuel', 'Q16_other',
+    'Q17_wall_oven_usage', 'Q18_Blender_or_juicer', 'Q18_Coffee_maker', 'Q18_Crock_pot_or_slow_cooker',
+    'Q18_Food_processor', 'Q18_Rice_cooker', 'Q18_Toaster', 'Q18_Toaster_oven', 'Q18_Other__please_specify_',
+    'Q18_Other__please_specify__other', 'Q19_has_clothes_washer', 'Q20_clothes_washer_usage',
+    'Q21_clothes_washer_age', 'Q22_has_clothes_dryer', 'Q23_uses_clothes_dryer_type', 'Q24_clothes_dryer_fuel',
+    'Q24_other', 'Q25_clothes_dryer_age', 'Q26_num_televisions', 'Q27_tv_size', 'Q28_tv_type', 'Q28_other',
+    'Q29_tv_daily_hours', 'Q30_num_desktop_computers', 'Q30_num_laptop_computers', 'Q30_num_tablets_ereaders',
+    'Q30_num_printers_scanners_etc', 'Q30_num_smart_phones', 'Q30_num_other_cell_phones', 'Q31_access_internet',
+    'Q32_has_wireless_router', 'Q33_is_home_heated', 'Q34_main_heating_equipment', 'Q34_other',
+    'Q35_main_heating_equipment_age', 'Q36_main_heating_fuel', 'Q36_other', 'Q37_has_ac', 'Q38_uses_central_ac',
+    'Q39_central_ac_is_heat_pump', 'Q40_central_ac_age', 'Q41_temp_summer_day_home', 'Q41_temp_summer_day_away',
+    'Q41_temp_summer_night', 'Q42_num_ceiling_fans', 'Q42_num_floor_window_fans', 'Q42_num_whole_house_fans',
+    'Q42_num_attic_fans', 'Q43_has_water_heater', 'Q44_water_heater_size', 'Q45_water_heater_age',
+    'Q46_water_heater_fuel', 'Q46_other', 'Q47_num_light_bulbs_total', 'Q48_num_light_bulbs_4hr_plus',
+    'Q49_Incandescent', 'Q49_CFL__compact_fluorescent_lamp_', 'Q49_LED__light_emitting_diode_',
+    'Q49_Natural_gas_lights', 'Q50_electricity_payment_responsibility', 'Q50_other',
+    'Q51_natural_gas_payment_responsibility', 'Q51_other', 'Q52_fuel_oil_payment_responsibility', 'Q52_other',
+    'Q53_has_backup_generator', 'Q54_on_site_electricity_generation', 'Q54_other',
+    'Q55_avg_annual_electricity_spending', 'Q56_receives_fuel_oil_deliveries',
+    'Q57_fuel_oil_num_deliveries_past_year', 'Q57_fuel_oil_tank_size', 'Q57_fuel_oil_total_cost_past_year',
+    'Q58_uses_wood_for_fuel', 'Q59_wood_total_cost_past_year', 'Q59_wood_pellets_total_amount_past_year',
+    'Q60_num_lpg_propane_cylinders_year', 'Q61_last_electricity_bill_amount', 'Q62_last_electricity_consumption',
+)
+
+
+def is_mongodb_source(source):
+    """True for a mongodb:// URI or a (pymongo-like) collection object instead of a CSV path."""
+    if isinstance(source, (str, os.PathLike)):
+        return str(source).startswith(('mongodb://', 'mongodb+srv://'))
+    return hasattr(source, 'find')
+
+
+def survey_documents_frame(documents, fields=SURVEY_FIELDS):
+    """
+    One batch of survey documents as a DataFrame shaped like the CSV export of the same
+    surveys: ids and timestamps as strings, empty answers as NaN, numeric columns numeric.
+    """
+    df = pd.DataFrame.from_records(documents, columns=list(fields))
+    if '_id' in df:
+        df['_id'] = df['_id'].map(lambda value: None if value is None or pd.isna(value) else str(value))
+    if 'submitted_at' in df:
+        df['submitted_at'] = df['submitted_at'].map(
+            lambda value: value.isoformat() if isinstance(value, datetime) else value)
+    return df.replace('', np.nan).infer_objects()
+
+
+def read_survey_collection(source, chunksize=None, query=None, fields=SURVEY_FIELDS):
+    """
+    Yields the surveys of the backend's MongoDB collection as DataFrame chunks, without a CSV export.
+
+    Only the analyzed fields are projected on the server, documents come in cursor batches
+    in export order (submitted_at, _id) and each batch becomes one chunk.
 
     Args:
-        file_path (str): The path to the CSV file.
+        source: A mongodb:// URI (the default database in the URI, else household_energy,
+                collection surveys) or a collection object.
+        chunksize (int, optional): Documents per cursor batch and chunk (default SURVEY_COLLECTION_BATCH).
+        query (dict, optional): Filter on the server, e.g. from AnalysisCheckpoint.resume_query().
     """
+    chunksize = chunksize or SURVEY_COLLECTION_BATCH
+    client = None
+    if isinstance(source, str):
+        try:
+            from pymongo import MongoClient
+        except ImportError as e:
+            raise ImportError("Reading surveys from MongoDB requires pymongo (pip install pymongo)") from e
+        client = MongoClient(source, serverSelectionTimeoutMS=5000)
+        collection = client.get_default_database(SURVEY_DATABASE)[SURVEY_COLLECTION]
+    else:
+        collection = source
     try:
-        # Load the CSV file into a pandas DataFrame
-        df = pd.read_csv(file_path)
-
-        print("Successfully loaded the CSV file.")
-        print("\n--- DataFrame Overview ---")
-        print(f"Total rows: {len(df)}")
-        print(f"Total columns: {len(df.columns)}")
-
-        # Map category names to their respective classes
-        category_classes = {
-            'Household Information': HouseholdInformation,
-            'Home Characteristics': HomeCharacteristics,
-            'Refrigerator': Refrigerator,
-            'Stove': Stove,
-            'Wall Oven': WallOven,
-            'Small Kitchen Appliances (Q18)': SmallKitchenAppliances,
-            'Clothes Washer': ClothesWasher,
-            'Clothes Dryer': ClothesDryer,
-            'Televisions': Televisions,
-            'Computers & Connectivity': ComputersConnectivity,
-            'Heating Equipment': HeatingEquipment,
-            'Cooling Equipment': CoolingEquipment,
-            'Water Heater': WaterHeater,
-            'Lighting': Lighting,
-            'Energy Consumption & Costs': EnergyConsumptionCosts,
-            'Metadata': Metadata
-        }
+        cursor = collection.find(query or {}, {field: 1 for field in fields})
+        cursor = cursor.sort([(column, 1) for column in SURVEY_KEY_COLUMNS]).batch_size(chunksize)
+        documents = iter(cursor)
+        rows_read = 0
+        while True:
+            batch = list(itertools.islice(documents, chunksize))
+            if not batch:
+                break
+            df = survey_documents_frame(batch, fields)
+            # Number the rows across batches, like read_csv does across chunks
+            df.index = pd.RangeIndex(rows_read, rows_read + len(df))
+            rows_read += len(df)
+            yield df
+    finally:
+        if client is not None:
+            client.close()
+
+
+def read_survey_chunks(file_path, chunksize=None, skip_rows=0, query=None):
+    """
+    Yields the survey CSV as DataFrames.
 
-        # Create an instance of the plotting class
-        plotter = PlotElectricityUse()
-        enhanced_plotter = EnhancedPlotting()
+    Args:
+        file_path (str): The path to the CSV file. A MongoDB source (see is_mongodb_source) is
+                         read with read_survey_collection instead.
+        chunksize (int, optional): Rows per chunk. None loads the whole file as a single chunk.
+        skip_rows (int): Data rows at the start of the file to skip (the header is kept). The
+                         remaining rows keep their position in the file as index.
+        query (dict, optional): Server-side filter for a MongoDB source.
+    """
+    if is_mongodb_source(file_path):
+        yield from read_survey_collection(file_path, chunksize, query)
+        return
+    options = {'dtype': {column: str for column in SURVEY_KEY_COLUMNS}}
+    if skip_rows:
+        options['skiprows'] = range(1, skip_rows + 1)
+    chunks = [pd.read_csv(file_path, **options)] if chunksize is None else pd.read_csv(
+        file_path, chunksize=chunksize, **options)
+    for df in chunks:
+        # read_csv numbers the rows it returns from 0; row numbers and fallback household ids
+        # must not repeat those of the rows skipped
+        df.index = df.index + skip_rows
+        yield df
+
+
+def _survey_keys(df, columns):
+    return [df[column].fillna('').astype(str) for column in columns]
+
+
+class AnalysisCheckpoint:
+    """
+    Where the last incremental analysis run stopped in a survey file, together with the
+    aggregates of every household up to there, so the next run only analyzes new rows.
 
-        # Dictionary to accumulate total electricity consumption (kWh) for each appliance category across all users
-        # Stores typical values
-        all_users_combined_electricity_kwh_breakdown = {}
-        # Dictionary to accumulate total energy consumption (BTU) for all categories (appliances + fuels) across all users
-        # Stores typical values
-        all_users_combined_total_btu_breakdown = {}
+    Rows are ordered like the backend exports them, by (submitted_at, _id); the checkpoint
+    keeps the greatest key seen. Files without those columns are treated as append-only and
+    resumed by row count. The checkpoint is a JSON file, replaced atomically on save.
+    """
 
-        # List to accumulate data for the year built/moved-in plot
-        year_data_for_plot = []
+    VERSION = 1
+
+    def __init__(self, rows=0, last_key=None, key_columns=(), aggregates=None, updated_at=None):
+        self.rows = rows
+        self.last_key = last_key
+        self.key_columns = list(key_columns)
+        self.aggregates = aggregates if aggregates is not None else SurveyAggregates()
+        self.updated_at = updated_at
+
+    @classmethod
+    def load(cls, path):
+        """Reads a checkpoint, or returns None if there is none yet."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {path}: {data.get('version')}")
+        return cls(data['rows'], data['last_key'], data['key_columns'],
+                   SurveyAggregates.from_dict(data['aggregates']), data['updated_at'])
+
+    def save(self, path):
+        self.updated_at = datetime.now().isoformat(timespec='seconds')
+        data = {'version': self.VERSION, 'rows': self.rows, 'last_key': self.last_key,
+                'key_columns': self.key_columns, 'updated_at': self.updated_at,
+                'aggregates': self.aggregates.to_dict()}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, default=self._json_default)
+            os.replace(temporary_path, path)
+        finally:
+            # Only left behind if writing failed; the existing checkpoint stays untouched
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    @staticmethod
+    def _json_default(value):
+        # numpy scalars end up in the totals; .item() turns them into plain numbers
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def resume_position(self, file_path):
+        """
+        Data rows that can be skipped without parsing: everything the last run read, as long
+        as the row it stopped at still holds the checkpoint key (i.e. rows were only appended).
+        Otherwise 0, and new rows are picked out by key.
+        """
+        if not self.rows or is_mongodb_source(file_path):
+            return 0
+        columns = [column for column in SURVEY_KEY_COLUMNS if column in pd.read_csv(file_path, nrows=0).columns]
+        if columns != self.key_columns:
+            raise ValueError(f"{file_path} is not ordered by the checkpoint's columns {self.key_columns}; "
+                             f"run a full rebuild")
+        if not columns:
+            return self.rows
+        last_read = pd.read_csv(file_path, skiprows=range(1, self.rows), nrows=1, usecols=columns,
+                                dtype={column: str for column in columns})
+        if len(last_read) == 1 and [key.iloc[0] for key in _survey_keys(last_read, columns)] == self.last_key:
+            return self.rows
+        return 0
+
+    def resume_query(self):
+        """MongoDB filter for the documents from the checkpoint on; new_rows() drops the ties."""
+        if self.key_columns != SURVEY_KEY_COLUMNS or self.last_key is None or not self.last_key[0]:
+            return None
+        try:
+            return {'submitted_at': {'$gte': datetime.fromisoformat(self.last_key[0])}}
+        except ValueError:
+            return None
+
+    def new_rows(self, df):
+        """The rows of a chunk that come after the checkpoint."""
+        if self.last_key is None or not self.key_columns:
+            return df
+        keys = _survey_keys(df, self.key_columns)
+        newer = pd.Series(False, index=df.index)
+        tied = pd.Series(True, index=df.index)
+        for key, last in zip(keys, self.last_key):
+            newer |= tied & (key > last)
+            tied &= key == last
+        return df[newer]
+
+    def advance(self, df):
+        """Moves the checkpoint past a chunk that has been read."""
+        self.rows += len(df)
+        self.key_columns = [column for column in SURVEY_KEY_COLUMNS if column in df.columns]
+        if self.key_columns and len(df):
+            keys = pd.DataFrame(dict(zip(self.key_columns, _survey_keys(df, self.key_columns))))
+            greatest = list(keys.sort_values(self.key_columns).iloc[-1])
+            if self.last_key is None or greatest > self.last_key:
+                self.last_key = greatest
+
+
+def sample_load_profile(row_data):
+    """Hourly load profile for one household, or None if it cannot be analyzed."""
+    try:
+        energy_costs_instance = EnergyConsumptionCosts(row_data)
+        total_kwh, breakdown = energy_costs_instance.estimate_annual_electricity_consumption()
+        fuel_btu = energy_costs_instance.calculate_btu_equivalents()
 
-        # Define BTU conversion factor for kWh (fixed)
-        KWH_TO_BTU = 3412.14
+        detailed_analysis = DetailedHouseholdAnalysis(energy_costs_instance, breakdown, fuel_btu)
 
-        # Iterate through each row (person) in the DataFrame
-        for index, row_data in df.iterrows():
-            person_name = row_data.get('Q0_name', 'N/A')  # Get the name
-            print(f"\n{'=' * 50}")
-            print(f"Energy Consumption Data for Person: {person_name} (Row {index + 1})")
-            print(f"{'=' * 50}")
+        # Get hourly simulation data
+        energy_costs_instance.simulate_household_appliances()
+        return detailed_analysis.get_load_profile_analysis()
+    except Exception:
+        return None
 
-            # Process Energy Consumption & Costs category
-            energy_costs_instance = EnergyConsumptionCosts(row_data)
-            home_char_instance = HomeCharacteristics(row_data) # Also need home characteristics for year built/sq ft
 
-            try:
-                # --- Initial Electricity Consumption Estimates (kWh) ---
-                total_uncalibrated_typical_kwh_all_appliances, \
-                    electricity_appliance_breakdown_uncalibrated_kwh = \
-                    energy_costs_instance.estimate_annual_electricity_consumption()
-
-                # --- Proportional Scaling for Electricity Consumption ---
-                electricity_appliance_breakdown_calibrated_kwh = electricity_appliance_breakdown_uncalibrated_kwh.copy()
-
-                reported_annual_kwh = safe_numeric_conversion(energy_costs_instance.last_electricity_consumption)
-                if pd.notna(reported_annual_kwh) and reported_annual_kwh > 0:
-                    # Corrected: Multiply by 6 for a 2-month bill to get annual
-                    reported_annual_kwh *= 6  # Convert last bill (2-month) to annual
-
-                    print(f"\n--- Applying Proportional Scaling for Electricity ---")
-                    print(f"  Reported Annual Electricity (from bill): {round(reported_annual_kwh, 2)} kWh")
-                    print(
-                        f"  Total Estimated Uncalibrated Electricity (All Appliances): {round(total_uncalibrated_typical_kwh_all_appliances, 2)} kWh")
-
-                    if total_uncalibrated_typical_kwh_all_appliances > 0:
-                        scaling_factor = reported_annual_kwh / total_uncalibrated_typical_kwh_all_appliances
-                        print(f"  Calculated Scaling Factor: {round(scaling_factor, 4)}")
-
-                        for appliance_name, typical_kwh_uncalibrated in electricity_appliance_breakdown_uncalibrated_kwh.items():
-                            calibrated_typical_kwh = typical_kwh_uncalibrated * scaling_factor
-                            # Ensure non-negative consumption
-                            calibrated_typical_kwh = max(0, calibrated_typical_kwh)
-                            electricity_appliance_breakdown_calibrated_kwh[appliance_name] = round(
-                                calibrated_typical_kwh, 2)
-                            print(f"    {appliance_name} Calibrated: {round(calibrated_typical_kwh, 2)} kWh/year")
-                    else:
-                        print("  Total uncalibrated electricity is zero. Cannot apply scaling.")
-                        # If uncalibrated is zero, calibrated also remains zero
-                        electricity_appliance_breakdown_calibrated_kwh = {k: 0 for k in
-                                                                          electricity_appliance_breakdown_calibrated_kwh}
-                else:
-                    print(
-                        "\n--- Proportional Scaling Skipped: No valid reported electricity consumption for scaling. ---")
-                    # If no reported bill, use uncalibrated values as is
-                    electricity_appliance_breakdown_calibrated_kwh = electricity_appliance_breakdown_uncalibrated_kwh.copy()
-
-                # --- Recalculate Overall Total kWh after Scaling ---
-                # Removed the extra rounding here to match the sum of individually rounded values
-                total_typical_kwh_calibrated = sum(electricity_appliance_breakdown_calibrated_kwh.values())
-
-                # --- Print Calibrated Electricity Consumption Details (kWh) ---
-                print(f"\n--- Calibrated Annual Electricity Consumption (kWh) ---")
-                for appliance, kwh_typical in electricity_appliance_breakdown_calibrated_kwh.items():
-                    print(f"    {appliance}: {kwh_typical} kWh/year")
-                    # Accumulate for the combined kWh plot (using calibrated values)
-                    all_users_combined_electricity_kwh_breakdown[appliance] = \
-                        all_users_combined_electricity_kwh_breakdown.get(appliance, 0) + kwh_typical
-
-                    # Accumulate for the combined total BTU plot (electricity appliances)
-                    all_users_combined_total_btu_breakdown[appliance] = \
-                        all_users_combined_total_btu_breakdown.get(appliance, 0) + (kwh_typical * KWH_TO_BTU)
-
-                print(
-                    f"\n  Total Calibrated Annual Electricity Consumption: {round(total_typical_kwh_calibrated, 2)} kWh/year")
-
-                # Re-print reported if available
-                if pd.notna(reported_annual_kwh) and reported_annual_kwh > 0:
-                    print(
-                        f"  Reported Annual Electricity Consumption (from bill): {round(reported_annual_kwh, 2)} kWh/year")
-                    print(
-                        f"  Difference (Calibrated Typical - Reported): {round(total_typical_kwh_calibrated - reported_annual_kwh, 2)} kWh/year")
-
-                # --- BTU Equivalents for Other Fuels (MOVED BEFORE DETAILED ANALYSIS) ---
-                print(f"\n--- Estimated Annual Energy Consumption (BTU Equivalents by Fuel Type) ---")
-                fuel_btu_equivalents = energy_costs_instance.calculate_btu_equivalents()
-
-                total_fuel_btu = 0
-                for fuel_type, btu_typical in fuel_btu_equivalents.items():
-                    if fuel_type != 'Electricity (Total)':
-                        print(f"    {fuel_type}: {btu_typical} BTU/year")
-                        all_users_combined_total_btu_breakdown[fuel_type] = \
-                            all_users_combined_total_btu_breakdown.get(fuel_type, 0) + btu_typical
-                        total_fuel_btu += btu_typical
-
-                # --- DETAILED HOUSEHOLD ANALYSIS ---
-                print(f"\n--- Detailed Household Energy Analysis ---")
-                detailed_analysis = DetailedHouseholdAnalysis(
-                    energy_costs_instance,
-                    electricity_appliance_breakdown_calibrated_kwh,
-                    fuel_btu_equivalents
-                )
-
-                # Cost breakdown
-                print(f"\n--- Annual Cost Breakdown by Appliance ---")
-                cost_breakdown = detailed_analysis.calculate_annual_cost_breakdown()
-                for appliance, cost in sorted(cost_breakdown.items(), key=lambda x: x[1], reverse=True):
-                    print(f"    {appliance}: ${cost:.2f}")
-                total_annual_cost = sum(cost_breakdown.values())
-                print(f"  Total Estimated Annual Cost: ${total_annual_cost:.2f}")
-
-                # Major energy consumers
-                print(f"\n--- Top 5 Energy Consumers ---")
-                major_consumers = detailed_analysis.get_major_energy_consumers(5)
-                for i, (appliance, kwh) in enumerate(major_consumers, 1):
-                    percentage = (kwh / total_typical_kwh_calibrated * 100) if total_typical_kwh_calibrated > 0 else 0
-                    print(f"    {i}. {appliance}: {kwh} kWh/year ({percentage:.1f}%)")
-
-                # Efficiency recommendations
-                print(f"\n--- Energy Efficiency Recommendations ---")
-                recommendations = detailed_analysis.generate_efficiency_recommendations()
-                if recommendations:
-                    for i, rec in enumerate(recommendations, 1):
-                        print(f"    {i}. {rec['appliance']}")
-                        print(f"       Current: {rec['current_kwh']} kWh/year")
-                        print(f"       Recommendation: {rec['recommendation']}")
-                        print(f"       Potential Savings: {rec['estimated_savings_kwh']:.0f} kWh/year (${rec['estimated_savings_kwh'] * 0.12:.2f})")
-                else:
-                    print("    No major inefficiencies detected.")
-
-                # Carbon footprint
-                print(f"\n--- Carbon Footprint Analysis ---")
-                carbon_data = detailed_analysis.calculate_carbon_footprint()
-                print(f"    Electricity CO2: {carbon_data['electricity_co2_kg']} kg")
-                print(f"    Fuel CO2: {carbon_data['fuel_co2_kg']} kg")
-                print(f"    Total CO2: {carbon_data['total_co2_kg']} kg ({carbon_data['total_co2_metric_tons']} metric tons/year)")
-                equivalent_trees = carbon_data['total_co2_kg'] / 20  # 1 tree absorbs ~20 kg CO2/year
-                print(f"    Equivalent to: {equivalent_trees:.1f} trees needed to offset")
-
-                # --- Appliance-Level Detailed Simulation ---
-                print(f"\n--- Detailed Appliance Simulation (24-Hour Profile) ---")
-                try:
-                    simulator_results = energy_costs_instance.simulate_household_appliances()
-                    daily_energy = simulator_results['daily_energy']
-                    peak_load = simulator_results['peak_load']
-                    efficiency_ratings = simulator_results['efficiency_ratings']
-                    
-                    print(f"    Daily Energy Consumption by Appliance:")
-                    for appliance, energy_wh in sorted(daily_energy.items(), key=lambda x: x[1], reverse=True):
-                        energy_kwh = energy_wh / 1000
-                        print(f"      {appliance}: {energy_kwh:.2f} kWh/day ({energy_kwh*365:.1f} kWh/year)")
-                    
-                    print(f"\n    Peak Load Analysis:")
-                    print(f"      Average Peak Hour: {peak_load['max'].mean():.0f}W")
-                    print(f"      Average Hourly Load: {peak_load['mean'].mean():.0f}W")
-                    print(f"      Minimum Hourly Load: {peak_load['min'].mean():.0f}W")
-                    print(f"      Peak-to-minimum ratio: {peak_load['max'].mean() / peak_load['min'].mean():.2f}x")
-                    
-                    print(f"\n    Appliance Efficiency Ratings (Higher is better):")
-                    for appliance, rating in sorted(efficiency_ratings.items(), key=lambda x: x[1], reverse=True)[:5]:
-                        print(f"      {appliance}: {rating:.1f}%")
-                except Exception as sim_error:
-                    print(f"    Note: Appliance simulation unavailable ({str(sim_error)[:50]}...)")
-
-                # --- Data for Year Built/Moved-in Plot ---
-                # Determine the relevant year based on ownership
-                relevant_year_str = None
-                if home_char_instance.ownership and isinstance(home_char_instance.ownership, str):
-                    if 'own' in home_char_instance.ownership.lower():
-                        relevant_year_str = home_char_instance.year_built
-                    elif 'rent' in home_char_instance.ownership.lower() or 'lease' in home_char_instance.ownership.lower():
-                        relevant_year_str = home_char_instance.move_in_year
-
-                # Handle "2020 or later" and other non-standard year strings
-                if relevant_year_str:
-                    if '2020 or later' in str(relevant_year_str).lower():
-                        year_range = '2020 or later'
-                    elif 'before' in str(relevant_year_str).lower():
-                        year_range = 'Before 1950'  # Standardize "Before X" to "Before 1950" if needed
-                    elif '-' in str(relevant_year_str):
-                        year_range = str(relevant_year_str)  # Keep ranges like "1950-1959" as is
-                    else:
-                        # Attempt to convert to int and then to a range
-                        try:
-                            year = int(relevant_year_str)
-                            if year < 1950:
-                                year_range = 'Before 1950'
-                            elif 1950 <= year <= 1959:
-                                year_range = '1950-1959'
-                            elif 1960 <= year <= 1969:
-                                year_range = '1960-1969'
-                            elif 1970 <= year <= 1979:
-                                year_range = '1970-1979'
-                            elif 1980 <= year <= 1989:
-                                year_range = '1980-1989'
-                            elif 1990 <= year <= 1999:
-                                year_range = '1990-1999'
-                            elif 2000 <= year <= 2009:
-                                year_range = '2000-2009'
-                            elif 2010 <= year <= 2019:
-                                year_range = '2010-2019'
-                            else:  # 2020 and beyond
-                                year_range = '2020 or later'
-                        except ValueError:
-                            year_range = None  # Cannot parse year
-                else:
-                    year_range = None
+# --- Columnar results store ---
 
-                sq_ft_home = safe_numeric_conversion(home_char_instance.sq_ft_home)
+FUEL_CATEGORIES = ['Natural Gas', 'Fuel Oil', 'LPG/Propane', 'Wood']
 
-                # Convert calibrated kWh to BTU for total energy calculation
-                electricity_btu = total_typical_kwh_calibrated * KWH_TO_BTU
-                total_household_btu = electricity_btu + total_fuel_btu
 
-                if year_range and pd.notna(total_household_btu) and pd.notna(sq_ft_home) and sq_ft_home > 0:
-                    year_data_for_plot.append({
-                        'Year Range': year_range,
-                        'Total BTU': total_household_btu,
-                        'Sq Ft': sq_ft_home
-                    })
+def _result_column(prefix, category):
+    return f"{prefix}_{re.sub(r'[^a-z0-9]+', '_', category.lower()).strip('_')}"
 
 
-            except Exception as e:
-                print(f"  An error occurred processing energy consumption for {person_name}: {e}")
-                import traceback
-                traceback.print_exc()  # Print full traceback for debugging
+def results_schema():
+    """
+    Explicit Arrow schema of the per-household results, so every batch and partition
+    agrees on column types even when a batch happens to hold only nulls for a column.
+    """
+    import pyarrow as pa
+    return pa.schema(
+        [('household', pa.string()), ('row_number', pa.int64()), ('name', pa.string()),
+         ('city', pa.string()), ('home_type', pa.string()), ('run_date', pa.string()),
+         ('reported_annual_kwh', pa.float64()), ('total_kwh_uncalibrated', pa.float64()),
+         ('total_kwh_calibrated', pa.float64()), ('total_kwh_p10', pa.float64()),
+         ('total_kwh_p50', pa.float64()), ('total_kwh_p90', pa.float64())]
+        + [(_result_column('kwh', category), pa.float64()) for category in ELECTRICITY_CATEGORIES]
+        + [(_result_column('btu', fuel), pa.float64()) for fuel in FUEL_CATEGORIES]
+        + [('total_fuel_btu', pa.float64()), ('total_btu', pa.float64()),
+           ('annual_cost', pa.map_(pa.string(), pa.float64())), ('total_annual_cost', pa.float64()),
+           ('top_consumers', pa.list_(pa.struct([('appliance', pa.string()), ('kwh', pa.float64())]))),
+           ('electricity_co2_kg', pa.float64()), ('fuel_co2_kg', pa.float64()), ('total_co2_kg', pa.float64()),
+           ('year_range', pa.string()), ('sq_ft_home', pa.float64())]
+    )
+
+
+def _float_or_none(value):
+    return float(value) if value is not None and pd.notna(value) else None
+
+
+class ResultsStore:
+    """
+    Writes per-household analysis results to a Parquet dataset partitioned by city and
+    run date (hive layout: <root>/city=<city>/run_date=<YYYY-MM-DD>/part-*.parquet).
 
-        # --- Plotting the combined electricity consumption breakdown (kWh) and total energy consumption (BTU) for all users ---
-        print(f"\n\n{'=' * 50}")
-        print("Generating Combined Energy Consumption Plots for All Users")
-        print(f"{'=' * 50}")
-        plotter.plot_combined_energy_breakdowns(
-            all_users_combined_electricity_kwh_breakdown,
-            all_users_combined_total_btu_breakdown
+    Records are buffered and written batch_size at a time with the explicit
+    results_schema(). pyarrow is only needed when a store is created.
+    """
+
+    PARTITION_COLUMNS = ['city', 'run_date']
+
+    def __init__(self, root_path, batch_size=5000, run_date=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Writing a results store requires pyarrow (pip install pyarrow)") from e
+        self._pa, self._pq = pa, pq
+        self.root_path = root_path
+        self.batch_size = batch_size
+        self.run_date = run_date or datetime.now().strftime('%Y-%m-%d')
+        self.schema = results_schema()
+        self.rows_written = 0
+        self._run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self._batches = 0
+        self._buffer = []
+
+    def add(self, records):
+        self._buffer.extend(records)
+        while len(self._buffer) >= self.batch_size:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            self._write(batch)
+
+    def _write(self, records):
+        for record in records:
+            record['run_date'] = self.run_date
+        table = self._pa.Table.from_pylist(records, schema=self.schema)
+        self._pq.write_to_dataset(
+            table, self.root_path, partition_cols=self.PARTITION_COLUMNS,
+            basename_template=f"part-{self._run_id}-{self._batches}-{{i}}.parquet"
         )
+        self._batches += 1
+        self.rows_written += len(records)
 
-        # --- Generate Enhanced Analysis Plots ---
-        print(f"\n\n{'=' * 50}")
-        print("Generating Advanced Energy Analysis Visualizations")
-        print(f"{'=' * 50}")
-        
-        # Get sample household for detailed analysis (first valid record)
-        for index, row_data in df.iterrows():
-            try:
-                energy_costs_instance = EnergyConsumptionCosts(row_data)
-                total_kwh, breakdown = energy_costs_instance.estimate_annual_electricity_consumption()
-                fuel_btu = energy_costs_instance.calculate_btu_equivalents()
-                
-                detailed_analysis = DetailedHouseholdAnalysis(energy_costs_instance, breakdown, fuel_btu)
-                
-                # Get hourly simulation data
-                simulator_results = energy_costs_instance.simulate_household_appliances()
-                hourly_df = simulator_results['hourly_data']
-                
-                # Plot hourly load profile
-                print("Generating hourly load profile chart...")
-                load_profile = detailed_analysis.get_load_profile_analysis()
-                enhanced_plotter.plot_hourly_load_profile(load_profile)
-                
-                break  # Only for first valid record
-            except:
-                continue
+    def close(self):
+        """Writes whatever is still buffered."""
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
 
-        # --- Process and Plot Data for 'Energy by Year Built/Moved-in' ---
-        print(f"\n\n{'=' * 50}")
-        print("Generating Energy Consumption by Year Built/Moved-in Plot")
-        print(f"{'=' * 50}")
 
-        # Convert the list of dicts to a DataFrame for easier aggregation
-        year_built_moved_in_df = pd.DataFrame(year_data_for_plot)
+class JsonLinesReportWriter:
+    """
+    Writes per-household results (the same records as ResultsStore) to a JSON lines file,
+    one household per line, buffering the encoded lines and writing them batch_size at a time.
+    """
 
-        if not year_built_moved_in_df.empty:
-            # Group by 'Year Range' and calculate averages
-            aggregated_year_data = year_built_moved_in_df.groupby('Year Range').agg(
-                Average_BTU=('Total BTU', 'mean'),
-                Average_Sq_Ft=('Sq Ft', 'mean')
-            ).reset_index()
+    def __init__(self, path, batch_size=5000):
+        self.path = path
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        self._buffer = []
+
+    def add(self, records):
+        for record in records:
+            record = dict(record, annual_cost=dict(record['annual_cost']))
+            self._buffer.append(json.dumps(record, ensure_ascii=False) + '\n')
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        self._file.writelines(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        """Writes whatever is still buffered and closes the file."""
+        if not self._file.closed:
+            self._flush()
+            self._file.close()
+
+
+class ProgressIndicator:
+    """
+    One-line progress of a quiet run on stderr, redrawn at most every interval seconds
+    (on a terminal the line is rewritten in place, otherwise a new line is written).
+    """
 
-            # Convert BTU to million BTU for plotting as per the image
-            aggregated_year_data['Average_BTU'] = aggregated_year_data['Average_BTU'] / 1_000_000
+    def __init__(self, total=None, stream=None, interval=0.5):
+        self.total = total or None
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.count = 0
+        self._started = time.monotonic()
+        self._last_shown = None
+        self._in_place = hasattr(self.stream, 'isatty') and self.stream.isatty()
+
+    def update(self, households=1):
+        self.count += households
+        now = time.monotonic()
+        if self._last_shown is None or now - self._last_shown >= self.interval:
+            self._show(now)
+
+    def _show(self, now, end=None):
+        self._last_shown = now
+        elapsed = now - self._started
+        line = f"Analyzed {self.count:,}" + ('' if self.total is None else f"/{self.total:,}") + " households"
+        if self.total is not None:
+            line += f" ({self.count / self.total:.0%})"
+        if elapsed > 0:
+            line += f", {self.count / elapsed:,.0f}/s"
+        if end is None:
+            end = '\r' if self._in_place else '\n'
+        self.stream.write(('\r' + line if self._in_place else line) + end)
+        self.stream.flush()
+
+    def close(self):
+        self._show(time.monotonic(), end='\n')
+
+
+def household_result_record(index, row_data, segments, total_uncalibrated_kwh, reported_annual_kwh,
+                            calibrated_kwh, fuel_btu, cost_breakdown, major_consumers, carbon_data,
+                            year_range, sq_ft_home, kwh_range=None):
+    """
+    One household's results as a row matching results_schema(). kwh_range is the Monte Carlo
+    (P10, P50, P90) of its uncalibrated annual kWh, if simulated.
+    """
+    segment_labels = dict(segments)
+    record = {
+        'household': str(row_data.get('_id')) if pd.notna(row_data.get('_id')) else str(index),
+        'row_number': int(index) + 1,
+        'name': None if pd.isna(row_data.get('Q0_name')) else str(row_data.get('Q0_name')),
+        'city': segment_labels['city'],
+        'home_type': segment_labels['home_type'],
+        'reported_annual_kwh': _float_or_none(reported_annual_kwh) if reported_annual_kwh > 0 else None,
+        'total_kwh_uncalibrated': _float_or_none(total_uncalibrated_kwh),
+        'total_kwh_calibrated': float(sum(calibrated_kwh.values())),
+    }
+    for label, kwh in zip(('p10', 'p50', 'p90'), kwh_range or (None, None, None)):
+        record[f'total_kwh_{label}'] = _float_or_none(kwh)
+    for category in ELECTRICITY_CATEGORIES:
+        record[_result_column('kwh', category)] = _float_or_none(calibrated_kwh.get(category))
+    for fuel in FUEL_CATEGORIES:
+        record[_result_column('btu', fuel)] = _float_or_none(fuel_btu.get(fuel))
+    record['total_fuel_btu'] = float(sum(btu for fuel, btu in fuel_btu.items() if fuel != 'Electricity (Total)'))
+    record['total_btu'] = record['total_kwh_calibrated'] * KWH_TO_BTU + record['total_fuel_btu']
+    record['annual_cost'] = [(item, float(cost)) for item, cost in cost_breakdown.items()]
+    record['total_annual_cost'] = float(sum(cost_breakdown.values()))
+    record['top_consumers'] = [{'appliance': appliance, 'kwh': float(kwh)} for appliance, kwh in major_consumers]
+    for key in ('electricity_co2_kg', 'fuel_co2_kg', 'total_co2_kg'):
+        record[key] = float(carbon_data[key])
+    record['year_range'] = year_range
+    record['sq_ft_home'] = _float_or_none(sq_ft_home)
+    return record
 
-            # Rename columns for clarity in the plotting function
-            aggregated_year_data.rename(columns={
-                'Average_BTU': 'Average BTU',
-                'Average_Sq_Ft': 'Average Sq Ft'
-            }, inplace=True)
 
-            plotter.plot_energy_by_year_built(aggregated_year_data)
+# --- Main function to process and print data ---
+
+def household_year_range(home_char_instance):
+    """Year range of the household's home (year built if owned, move-in year if rented), or None."""
+    # Determine the relevant year based on ownership
+    relevant_year_str = None
+    if home_char_instance.ownership and isinstance(home_char_instance.ownership, str):
+        if 'own' in home_char_instance.ownership.lower():
+            relevant_year_str = home_char_instance.year_built
+        elif 'rent' in home_char_instance.ownership.lower() or 'lease' in home_char_instance.ownership.lower():
+            relevant_year_str = home_char_instance.move_in_year
+
+    # Handle "2020 or later" and other non-standard year strings
+    if not relevant_year_str:
+        return None
+    if '2020 or later' in str(relevant_year_str).lower():
+        return '2020 or later'
+    if 'before' in str(relevant_year_str).lower():
+        return 'Before 1950'  # Standardize "Before X" to "Before 1950" if needed
+    if '-' in str(relevant_year_str):
+        return str(relevant_year_str)  # Keep ranges like "1950-1959" as is
+    # Attempt to convert to int and then to a range
+    try:
+        year = int(relevant_year_str)
+    except ValueError:
+        return None  # Cannot parse year
+    if year < 1950:
+        return 'Before 1950'
+    if year >= 2020:
+        return '2020 or later'
+    decade = year - year % 10
+    return f'{decade}-{decade + 9}'
+
+
+def compute_household_report(index, row_data, total_uncalibrated_kwh, uncalibrated_breakdown_kwh,
+                             energy_costs_instance=None):
+    """
+    Calibrates one household's electricity estimate against its bill and derives its fuel use,
+    costs, top consumers, recommendations and carbon footprint, without printing anything.
+
+    Returns:
+        dict: The household's report, as print_household_report and household_result_record read it.
+    """
+    energy_costs_instance = energy_costs_instance or EnergyConsumptionCosts(row_data)
+    home_char_instance = HomeCharacteristics(row_data)  # Also need home characteristics for year built/sq ft
+
+    # --- Proportional Scaling for Electricity Consumption ---
+    scaling_factor = None
+    reported_annual_kwh = safe_numeric_conversion(energy_costs_instance.last_electricity_consumption)
+    if pd.notna(reported_annual_kwh) and reported_annual_kwh > 0:
+        # Corrected: Multiply by 6 for a 2-month bill to get annual
+        reported_annual_kwh *= 6  # Convert last bill (2-month) to annual
+        if total_uncalibrated_kwh > 0:
+            scaling_factor = reported_annual_kwh / total_uncalibrated_kwh
+            # Ensure non-negative consumption
+            calibrated_kwh = {appliance: round(max(0, kwh * scaling_factor), 2)
+                              for appliance, kwh in uncalibrated_breakdown_kwh.items()}
         else:
-            print("No valid year built/moved-in data found for plotting.")
-
-        # --- FINAL SUMMARY REPORT ---
-        print(f"\n\n{'=' * 70}")
-        print("COMPREHENSIVE SURVEY ANALYSIS - FINAL SUMMARY")
-        print(f"{'=' * 70}")
-        print(f"\nTotal Households Analyzed: {len(df)}")
-        print(f"\nAggregate Energy Statistics:")
-        print(f"  Total Electricity Consumption: {sum(all_users_combined_electricity_kwh_breakdown.values()):.0f} kWh/year")
-        print(f"  Total Energy (All Fuels): {sum(all_users_combined_total_btu_breakdown.values())/1_000_000:,.0f} Million BTU/year")
-        
-        if all_users_combined_electricity_kwh_breakdown:
-            avg_kwh_per_household = sum(all_users_combined_electricity_kwh_breakdown.values()) / len(df)
-            print(f"  Average per Household: {avg_kwh_per_household:.0f} kWh/year")
-        
-        print(f"\nTop 5 Energy Consuming Categories (Aggregate):")
-        sorted_categories = sorted(all_users_combined_electricity_kwh_breakdown.items(), key=lambda x: x[1], reverse=True)
-        for i, (category, kwh) in enumerate(sorted_categories[:5], 1):
-            percentage = (kwh / sum(all_users_combined_electricity_kwh_breakdown.values()) * 100) if all_users_combined_electricity_kwh_breakdown else 0
-            print(f"  {i}. {category}: {kwh:.0f} kWh/year ({percentage:.1f}%)")
-        
-        print(f"\nAnalysis Complete! Generated visualizations and detailed recommendations.")
-        print(f"{'=' * 70}\n")
+            # If uncalibrated is zero, calibrated also remains zero
+            calibrated_kwh = {appliance: 0 for appliance in uncalibrated_breakdown_kwh}
+    else:
+        # If no reported bill, use uncalibrated values as is
+        calibrated_kwh = uncalibrated_breakdown_kwh.copy()
+
+    # Removed the extra rounding here to match the sum of individually rounded values
+    total_kwh_calibrated = sum(calibrated_kwh.values())
+
+    fuel_btu = energy_costs_instance.calculate_btu_equivalents()
+    total_fuel_btu = sum(btu for fuel_type, btu in fuel_btu.items() if fuel_type != 'Electricity (Total)')
+
+    detailed_analysis = DetailedHouseholdAnalysis(energy_costs_instance, calibrated_kwh, fuel_btu)
+    sq_ft_home = safe_numeric_conversion(home_char_instance.sq_ft_home)
+    return {
+        'index': index,
+        'person_name': row_data.get('Q0_name', 'N/A'),
+        'segments': household_segments(row_data),
+        'reported_annual_kwh': reported_annual_kwh,
+        'total_uncalibrated_kwh': total_uncalibrated_kwh,
+        'uncalibrated_kwh': uncalibrated_breakdown_kwh,
+        'scaling_factor': scaling_factor,
+        'calibrated_kwh': calibrated_kwh,
+        'total_kwh_calibrated': total_kwh_calibrated,
+        'fuel_btu': fuel_btu,
+        'total_fuel_btu': total_fuel_btu,
+        'cost_breakdown': detailed_analysis.calculate_annual_cost_breakdown(),
+        'major_consumers': detailed_analysis.get_major_energy_consumers(5),
+        'recommendations': detailed_analysis.generate_efficiency_recommendations(),
+        'carbon_data': detailed_analysis.calculate_carbon_footprint(),
+        'year_range': household_year_range(home_char_instance),
+        'sq_ft_home': sq_ft_home,
+        # Convert calibrated kWh to BTU for total energy calculation
+        'total_household_btu': total_kwh_calibrated * KWH_TO_BTU + total_fuel_btu,
+    }
+
+
+def aggregate_household_report(report, aggregates):
+    """Folds one household's report into the running aggregates."""
+    # Accumulate for the combined kWh and total BTU plots (using calibrated values)
+    for appliance, kwh_typical in report['calibrated_kwh'].items():
+        aggregates.add_electricity(appliance, kwh_typical, report['segments'])
+    for fuel_type, btu_typical in report['fuel_btu'].items():
+        if fuel_type != 'Electricity (Total)':
+            aggregates.add_fuel(fuel_type, btu_typical, report['segments'])
+
+    year_range, total_household_btu, sq_ft_home = (report['year_range'], report['total_household_btu'],
+                                                   report['sq_ft_home'])
+    if year_range and pd.notna(total_household_btu) and pd.notna(sq_ft_home) and sq_ft_home > 0:
+        aggregates.add_year_record(year_range, total_household_btu, sq_ft_home)
+
+
+def print_household_report(report, energy_costs_instance):
+    """Prints the energy use details of one computed household report."""
+    reported_annual_kwh = report['reported_annual_kwh']
+    total_uncalibrated_kwh = report['total_uncalibrated_kwh']
+    if pd.notna(reported_annual_kwh) and reported_annual_kwh > 0:
+        print(f"\n--- Applying Proportional Scaling for Electricity ---")
+        print(f"  Reported Annual Electricity (from bill): {round(reported_annual_kwh, 2)} kWh")
+        print(f"  Total Estimated Uncalibrated Electricity (All Appliances): {round(total_uncalibrated_kwh, 2)} kWh")
+        if report['scaling_factor'] is not None:
+            print(f"  Calculated Scaling Factor: {round(report['scaling_factor'], 4)}")
+            for appliance_name, calibrated_typical_kwh in report['calibrated_kwh'].items():
+                print(f"    {appliance_name} Calibrated: {calibrated_typical_kwh} kWh/year")
+        else:
+            print("  Total uncalibrated electricity is zero. Cannot apply scaling.")
+    else:
+        print("\n--- Proportional Scaling Skipped: No valid reported electricity consumption for scaling. ---")
+
+    # --- Print Calibrated Electricity Consumption Details (kWh) ---
+    total_typical_kwh_calibrated = report['total_kwh_calibrated']
+    print(f"\n--- Calibrated Annual Electricity Consumption (kWh) ---")
+    for appliance, kwh_typical in report['calibrated_kwh'].items():
+        print(f"    {appliance}: {kwh_typical} kWh/year")
+    print(f"\n  Total Calibrated Annual Electricity Consumption: {round(total_typical_kwh_calibrated, 2)} kWh/year")
+    if report.get('kwh_range') is not None:
+        p10, p50, p90 = report['kwh_range']
+        print(f"  Uncalibrated Estimate Range (Monte Carlo P10 / P50 / P90): "
+              f"{p10:.0f} / {p50:.0f} / {p90:.0f} kWh/year")
+
+    # Re-print reported if available
+    if pd.notna(reported_annual_kwh) and reported_annual_kwh > 0:
+        print(f"  Reported Annual Electricity Consumption (from bill): {round(reported_annual_kwh, 2)} kWh/year")
+        print(f"  Difference (Calibrated Typical - Reported): "
+              f"{round(total_typical_kwh_calibrated - reported_annual_kwh, 2)} kWh/year")
+
+    # --- BTU Equivalents for Other Fuels ---
+    print(f"\n--- Estimated Annual Energy Consumption (BTU Equivalents by Fuel Type) ---")
+    for fuel_type, btu_typical in report['fuel_btu'].items():
+        if fuel_type != 'Electricity (Total)':
+            print(f"    {fuel_type}: {btu_typical} BTU/year")
+
+    # --- DETAILED HOUSEHOLD ANALYSIS ---
+    print(f"\n--- Detailed Household Energy Analysis ---")
+
+    # Cost breakdown
+    print(f"\n--- Annual Cost Breakdown by Appliance ---")
+    cost_breakdown = report['cost_breakdown']
+    for appliance, cost in sorted(cost_breakdown.items(), key=lambda x: x[1], reverse=True):
+        print(f"    {appliance}: ${cost:.2f}")
+    print(f"  Total Estimated Annual Cost: ${sum(cost_breakdown.values()):.2f}")
+
+    # Major energy consumers
+    print(f"\n--- Top 5 Energy Consumers ---")
+    for i, (appliance, kwh) in enumerate(report['major_consumers'], 1):
+        percentage = (kwh / total_typical_kwh_calibrated * 100) if total_typical_kwh_calibrated > 0 else 0
+        print(f"    {i}. {appliance}: {kwh} kWh/year ({percentage:.1f}%)")
+
+    # Efficiency recommendations
+    print(f"\n--- Energy Efficiency Recommendations ---")
+    if report['recommendations']:
+        for i, rec in enumerate(report['recommendations'], 1):
+            print(f"    {i}. {rec['appliance']}")
+            print(f"       Current: {rec['current_kwh']} kWh/year")
+            print(f"       Recommendation: {rec['recommendation']}")
+            print(f"       Potential Savings: {rec['estimated_savings_kwh']:.0f} kWh/year (${rec['estimated_savings_kwh'] * 0.12:.2f})")
+    else:
+        print("    No major inefficiencies detected.")
+
+    # Carbon footprint
+    carbon_data = report['carbon_data']
+    print(f"\n--- Carbon Footprint Analysis ---")
+    print(f"    Electricity CO2: {carbon_data['electricity_co2_kg']} kg")
+    print(f"    Fuel CO2: {carbon_data['fuel_co2_kg']} kg")
+    print(f"    Total CO2: {carbon_data['total_co2_kg']} kg ({carbon_data['total_co2_metric_tons']} metric tons/year)")
+    equivalent_trees = carbon_data['total_co2_kg'] / 20  # 1 tree absorbs ~20 kg CO2/year
+    print(f"    Equivalent to: {equivalent_trees:.1f} trees needed to offset")
+
+    # --- Appliance-Level Detailed Simulation (only needed for this printout) ---
+    print(f"\n--- Detailed Appliance Simulation (24-Hour Profile) ---")
+    try:
+        simulator_results = energy_costs_instance.simulate_household_appliances()
+        daily_energy = simulator_results['daily_energy']
+        peak_load = simulator_results['peak_load']
+        efficiency_ratings = simulator_results['efficiency_ratings']
+
+        print(f"    Daily Energy Consumption by Appliance:")
+        for appliance, energy_wh in sorted(daily_energy.items(), key=lambda x: x[1], reverse=True):
+            energy_kwh = energy_wh / 1000
+            print(f"      {appliance}: {energy_kwh:.2f} kWh/day ({energy_kwh*365:.1f} kWh/year)")
+
+        print(f"\n    Peak Load Analysis:")
+        print(f"      Average Peak Hour: {peak_load['max'].mean():.0f}W")
+        print(f"      Average Hourly Load: {peak_load['mean'].mean():.0f}W")
+        print(f"      Minimum Hourly Load: {peak_load['min'].mean():.0f}W")
+        print(f"      Peak-to-minimum ratio: {peak_load['max'].mean() / peak_load['min'].mean():.2f}x")
+
+        print(f"\n    Appliance Efficiency Ratings (Higher is better):")
+        for appliance, rating in sorted(efficiency_ratings.items(), key=lambda x: x[1], reverse=True)[:5]:
+            print(f"      {appliance}: {rating:.1f}%")
+    except Exception as sim_error:
+        print(f"    Note: Appliance simulation unavailable ({str(sim_error)[:50]}...)")
+
+
+def report_household(index, row_data, total_uncalibrated_kwh, uncalibrated_breakdown_kwh, aggregates,
+                     verbose=True, kwh_range=None):
+    """
+    Analyzes one household, folds it into the running aggregates and (if verbose) prints its details.
+    Errors are counted in aggregates.household_errors; only verbose mode prints their tracebacks.
+
+    Args:
+        index: Row label of the household in the survey file.
+        row_data (pd.Series): The household's survey answers.
+        total_uncalibrated_kwh (float): Estimated annual electricity before calibration.
+        uncalibrated_breakdown_kwh (dict): Estimated annual kWh per appliance category.
+        aggregates (SurveyAggregates): Running totals to update.
+        verbose (bool): Print the household's report.
+        kwh_range (tuple, optional): Monte Carlo (P10, P50, P90) of the uncalibrated annual kWh.
+
+    Returns:
+        dict: The household's results as a ResultsStore record, or None if it could not be analyzed.
+    """
+    person_name = row_data.get('Q0_name', 'N/A')  # Get the name
+    if verbose:
+        print(f"\n{'=' * 50}")
+        print(f"Energy Consumption Data for Person: {person_name} (Row {index + 1})")
+        print(f"{'=' * 50}")
+
+    try:
+        energy_costs_instance = EnergyConsumptionCosts(row_data)
+        report = compute_household_report(index, row_data, total_uncalibrated_kwh, uncalibrated_breakdown_kwh,
+                                          energy_costs_instance)
+        report['kwh_range'] = kwh_range
+        aggregate_household_report(report, aggregates)
+        if verbose:
+            print_household_report(report, energy_costs_instance)
+        return household_result_record(
+            index, row_data, report['segments'], total_uncalibrated_kwh, report['reported_annual_kwh'],
+            report['calibrated_kwh'], report['fuel_btu'], report['cost_breakdown'],
+            report['major_consumers'], report['carbon_data'], report['year_range'], report['sq_ft_home'],
+            kwh_range)
+
+    except Exception as e:
+        aggregates.add_household_error(index + 1, e)
+        if verbose:
+            print(f"  An error occurred processing energy consumption for {person_name}: {e}")
+            import traceback
+            traceback.print_exc()  # Print full traceback for debugging
+        return None
+
+
+def analyze_households(df, aggregates, records=None, verbose=True, progress=None, monte_carlo=None):
+    """
+    Reports every household of a survey chunk and folds it into the running aggregates.
+    If a records list is given, each household's ResultsStore record is appended to it.
+    With verbose=False nothing is printed per household; progress (a ProgressIndicator)
+    is updated after each one. monte_carlo (simulate_electricity_ranges arguments, e.g.
+    {'draws': 1000, 'seed': 1}) adds each household's uncertainty range.
+    """
+    # Estimate every household's electricity breakdown in one vectorized pass
+    total_kwh_by_row, electricity_breakdown_by_row = estimate_annual_electricity_consumption_frame(df)
+    kwh_ranges = simulate_electricity_ranges(df, **monte_carlo)['Total'] if monte_carlo else None
+    aggregates.add_unrecognized_answers(count_unrecognized_answers(df))
+
+    # Iterate through each row (person) in the chunk
+    for index, row_data in df.iterrows():
+        breakdown = breakdown_row_to_dict(electricity_breakdown_by_row.loc[index])
+        record = report_household(index, row_data, float(total_kwh_by_row.loc[index]), breakdown, aggregates,
+                                  verbose, None if kwh_ranges is None else tuple(kwh_ranges.loc[index]))
+        if records is not None and record is not None:
+            records.append(record)
+        aggregates.num_households += 1
+        if progress is not None:
+            progress.update()
+
+        # Sample household for the load profile chart (first valid record)
+        if aggregates.sample_load_profile is None:
+            aggregates.sample_load_profile = sample_load_profile(row_data)
+    return aggregates
+
+
+# Shards per worker process, so uneven households still balance across the pool
+SHARDS_PER_JOB = 4
+
+
+def _analyze_shard(df, collect_records=False, verbose=True, monte_carlo=None):
+    """Process-pool worker: analyzes one shard with its report captured instead of printed."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    records = [] if collect_records else None
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        aggregates = analyze_households(df, SurveyAggregates(), records, verbose, monte_carlo=monte_carlo)
+    return stdout.getvalue(), stderr.getvalue(), aggregates, records
+
+
+def household_reports(file_path, chunksize=None, aggregates=None, monte_carlo=None):
+    """
+    Analyzes a survey file without printing anything and yields each household's results
+    (the ResultsStore record) as it is computed. Households that fail are skipped and
+    counted in aggregates.household_errors when an aggregates object is passed in.
+    """
+    aggregates = aggregates if aggregates is not None else SurveyAggregates()
+    for df in read_survey_chunks(file_path, chunksize):
+        records = []
+        analyze_households(df, aggregates, records, verbose=False, monte_carlo=monte_carlo)
+        yield from records
+
+
+def print_personal_appliance_data(file_path, chunksize=None, jobs=1, plot_dir=None, plot_formats=('png',),
+                                  plot_segments=(), results_dir=None, quiet=False, report_path=None,
+                                  checkpoint_path=None, full_rebuild=False, monte_carlo_draws=None,
+                                  monte_carlo_seed=None):
+    """
+    Loads a CSV file, processes electricity and fuel consumption for each person,
+    and then prints only the relevant energy use details (typical values).
+    Applies proportional scaling to estimated electricity consumption to match
+    reported total electricity.
+    Finally, generates combined plots for electricity consumption (kWh)
+    and total energy consumption (BTU by all categories) across all users,
+    using typical values for plotting.
 
+    Args:
+        file_path (str): The path to the CSV file, or a mongodb:// URI (or collection) to read the
+                         backend's surveys directly (see read_survey_collection).
+        chunksize (int, optional): Stream the file in chunks of this many rows, keeping only
+                                   running aggregates in memory. None loads the whole file.
+        jobs (int): Worker processes. Above 1, each chunk is sharded across a process pool and
+                    the shards' reports and partial aggregates are merged back in row order.
+        plot_dir (str, optional): Write the plots as image files under this directory, rendered in
+                                  a background process, instead of showing them.
+        plot_formats (tuple): Image formats for plot_dir ('png', 'svg').
+        plot_segments (tuple): Also write per-segment breakdown figures ('city', 'home_type').
+        results_dir (str, optional): Also write every household's results to a Parquet dataset
+                                     here (see ResultsStore; requires pyarrow).
+        quiet (bool): Skip the per-household printout (and its 24-hour simulation); show a progress
+                      line on stderr instead and only list failed households in the summary.
+        report_path (str, optional): Also write every household's results as JSON lines to this file.
+        checkpoint_path (str, optional): Incremental mode. Only rows added since the checkpoint are
+                                         analyzed and folded into its stored aggregates; the checkpoint
+                                         is then moved past them (see AnalysisCheckpoint).
+        full_rebuild (bool): With checkpoint_path, ignore the stored checkpoint, analyze the whole
+                             file and replace the checkpoint.
+        monte_carlo_draws (int, optional): Also estimate each household's P10/P50/P90 annual kWh
+                                           from this many draws (see simulate_electricity_ranges).
+        monte_carlo_seed (int, optional): Seed for reproducible Monte Carlo ranges.
+
+    Returns:
+        SurveyAggregates: The survey-wide totals, or None if the file could not be analyzed.
+    """
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    exporter = PlotExporter(plot_dir, plot_formats, plot_segments) if plot_dir is not None else None
+    store = ResultsStore(results_dir) if results_dir is not None else None
+    report_writer = JsonLinesReportWriter(report_path) if report_path is not None else None
+    sinks = [sink for sink in (report_writer, store) if sink is not None]
+    monte_carlo = {'draws': monte_carlo_draws, 'seed': monte_carlo_seed} if monte_carlo_draws else None
+    progress = None
+    try:
+        # Create an instance of the plotting class
+        plotter = PlotElectricityUse()
+        enhanced_plotter = EnhancedPlotting()
+
+        aggregates = SurveyAggregates()
+        checkpoint, skip_rows, query = None, 0, None
+        if checkpoint_path is not None:
+            try:
+                checkpoint = None if full_rebuild else AnalysisCheckpoint.load(checkpoint_path)
+                if checkpoint is not None:
+                    skip_rows = checkpoint.resume_position(file_path)
+            except ValueError as e:
+                print(f"Error: the checkpoint {checkpoint_path} does not match {file_path}: {e}")
+                print("Run again with --full-rebuild (full_rebuild=True) to rebuild it from the whole file.")
+                return None
+            if checkpoint is None:
+                checkpoint = AnalysisCheckpoint()
+                print(f"Full analysis run; the checkpoint will be written to {checkpoint_path}")
+            else:
+                print(f"Resuming from checkpoint {checkpoint_path} (saved {checkpoint.updated_at}, "
+                      f"{checkpoint.aggregates.num_households} households, {skip_rows} rows skipped)")
+            checkpoint.rows = skip_rows
+            query = checkpoint.resume_query() if is_mongodb_source(file_path) else None
+            aggregates = checkpoint.aggregates
+        households_before = aggregates.num_households
+
+        from_mongodb = is_mongodb_source(file_path)
+        for chunk_number, df in enumerate(read_survey_chunks(file_path, chunksize, skip_rows, query)):
+            if checkpoint is not None:
+                chunk, df = df, checkpoint.new_rows(df)
+                checkpoint.advance(chunk)
+            if chunk_number == 0:
+                if from_mongodb:
+                    print(f"Reading surveys from MongoDB in batches of {chunksize or SURVEY_COLLECTION_BATCH} documents.")
+                else:
+                    print("Successfully loaded the CSV file." if chunksize is None
+                          else f"Streaming the CSV file in chunks of {chunksize} rows.")
+                print("\n--- DataFrame Overview ---")
+                if chunksize is None and not from_mongodb:
+                    print(f"Total rows: {len(df)}")
+                print(f"Total columns: {len(df.columns)}")
+                if quiet:
+                    progress = ProgressIndicator(len(df) if chunksize is None and not from_mongodb else None)
+            if df.empty:
+                continue
+
+            if executor is None:
+                records = [] if sinks else None
+                analyze_households(df, aggregates, records, not quiet, progress, monte_carlo)
+                for sink in sinks:
+                    sink.add(records)
+                continue
+
+            # Shard the chunk across the pool; shard reports are printed and merged in row order
+            shards = np.array_split(np.arange(len(df)), min(len(df), jobs * SHARDS_PER_JOB) or 1)
+            for stdout_text, stderr_text, shard_aggregates, records in executor.map(
+                    _analyze_shard, [df.iloc[positions] for positions in shards],
+                    [bool(sinks)] * len(shards), [not quiet] * len(shards), [monte_carlo] * len(shards)):
+                sys.stdout.write(stdout_text)
+                sys.stderr.write(stderr_text)
+                aggregates.merge(shard_aggregates)
+                for sink in sinks:
+                    sink.add(records)
+                if progress is not None:
+                    progress.update(shard_aggregates.num_households)
+
+        if progress is not None:
+            progress.close()
+        if report_writer is not None:
+            report_writer.close()
+            print(f"Household reports written to {report_path} ({report_writer.rows_written} rows)")
+        if store is not None:
+            store.close()
+            print(f"Household results written to {results_dir} ({store.rows_written} rows, run date {store.run_date})")
+        if checkpoint is not None:
+            checkpoint.save(checkpoint_path)
+            print(f"Checkpoint saved to {checkpoint_path} ({aggregates.num_households - households_before} "
+                  f"new households, {aggregates.num_households} in total)")
+
+        print_survey_summary(aggregates, plotter, enhanced_plotter, exporter)
+
+        if exporter is not None:
+            written, failed = exporter.wait()
+            print(f"Plots written to {plot_dir}:")
+            for output_path in written:
+                print(f"  {output_path}")
+            for output_path, error in failed.items():
+                print(f"  Failed to write {output_path}: {error}")
+        return aggregates
 
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found. Please ensure it's in the correct directory.")
@@ -1611,10 +3447,142 @@ def print_personal_appliance_data(file_path):
         print(f"An unexpected error occurred: {e}")
         import traceback
         traceback.print_exc()  # Print full traceback for debugging
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if exporter is not None:
+            exporter.close()
+        if report_writer is not None:
+            report_writer.close()
+
+
+def print_survey_summary(aggregates, plotter, enhanced_plotter, exporter=None):
+    """
+    Generates the combined plots and prints the final summary report from the running aggregates.
+    With an exporter the plots (and its per-segment batches) are queued for rendering to files.
+    """
+    all_users_combined_electricity_kwh_breakdown = aggregates.electricity_kwh_breakdown
+    all_users_combined_total_btu_breakdown = aggregates.total_btu_breakdown
+
+    # --- Plotting the combined electricity consumption breakdown (kWh) and total energy consumption (BTU) for all users ---
+    print(f"\n\n{'=' * 50}")
+    print("Generating Combined Energy Consumption Plots for All Users")
+    print(f"{'=' * 50}")
+    if exporter is None:
+        plotter.plot_combined_energy_breakdowns(
+            all_users_combined_electricity_kwh_breakdown,
+            all_users_combined_total_btu_breakdown
+        )
+    else:
+        exporter.submit('plot_combined_energy_breakdowns', 'energy_breakdown',
+                        all_users_combined_electricity_kwh_breakdown, all_users_combined_total_btu_breakdown)
+        for segment in sorted(aggregates.segment_total_btu):
+            if segment[0] in exporter.segments:
+                exporter.submit('plot_combined_energy_breakdowns', 'energy_breakdown',
+                                aggregates.segment_electricity_kwh.get(segment, {}),
+                                aggregates.segment_total_btu[segment], segment=segment)
+
+    # --- Generate Enhanced Analysis Plots ---
+    print(f"\n\n{'=' * 50}")
+    print("Generating Advanced Energy Analysis Visualizations")
+    print(f"{'=' * 50}")
+
+    if aggregates.sample_load_profile is not None:
+        # Plot hourly load profile
+        print("Generating hourly load profile chart...")
+        if exporter is None:
+            enhanced_plotter.plot_hourly_load_profile(aggregates.sample_load_profile)
+        else:
+            exporter.submit('plot_hourly_load_profile', 'hourly_load_profile', aggregates.sample_load_profile)
+
+    # --- Process and Plot Data for 'Energy by Year Built/Moved-in' ---
+    print(f"\n\n{'=' * 50}")
+    print("Generating Energy Consumption by Year Built/Moved-in Plot")
+    print(f"{'=' * 50}")
+
+    aggregated_year_data = aggregates.aggregated_year_data()
+    if not aggregated_year_data.empty:
+        if exporter is None:
+            plotter.plot_energy_by_year_built(aggregated_year_data)
+        else:
+            exporter.submit('plot_energy_by_year_built', 'energy_by_year_built', aggregated_year_data)
+    else:
+        print("No valid year built/moved-in data found for plotting.")
+
+    # --- FINAL SUMMARY REPORT ---
+    print(f"\n\n{'=' * 70}")
+    print("COMPREHENSIVE SURVEY ANALYSIS - FINAL SUMMARY")
+    print(f"{'=' * 70}")
+    print(f"\nTotal Households Analyzed: {aggregates.num_households}")
+    print(f"\nAggregate Energy Statistics:")
+    print(f"  Total Electricity Consumption: {sum(all_users_combined_electricity_kwh_breakdown.values()):.0f} kWh/year")
+    print(f"  Total Energy (All Fuels): {sum(all_users_combined_total_btu_breakdown.values())/1_000_000:,.0f} Million BTU/year")
+
+    if all_users_combined_electricity_kwh_breakdown:
+        avg_kwh_per_household = sum(all_users_combined_electricity_kwh_breakdown.values()) / aggregates.num_households
+        print(f"  Average per Household: {avg_kwh_per_household:.0f} kWh/year")
+
+    print(f"\nTop 5 Energy Consuming Categories (Aggregate):")
+    sorted_categories = sorted(all_users_combined_electricity_kwh_breakdown.items(), key=lambda x: x[1], reverse=True)
+    for i, (category, kwh) in enumerate(sorted_categories[:5], 1):
+        percentage = (kwh / sum(all_users_combined_electricity_kwh_breakdown.values()) * 100) if all_users_combined_electricity_kwh_breakdown else 0
+        print(f"  {i}. {category}: {kwh:.0f} kWh/year ({percentage:.1f}%)")
+
+    if aggregates.unrecognized_answers:
+        print(f"\nUnrecognized Answers (estimated with default values):")
+        for column, answers in sorted(aggregates.unrecognized_answers.items()):
+            for answer, households in sorted(answers.items(), key=lambda x: x[1], reverse=True):
+                print(f"  {column}: '{answer}' ({households} households)")
+
+    if aggregates.household_errors:
+        print(f"\nHouseholds Skipped After Errors: {sum(households for households, _ in aggregates.household_errors.values())}")
+        for message, (households, rows) in sorted(aggregates.household_errors.items(), key=lambda x: x[1][0],
+                                                  reverse=True):
+            more = ', ...' if households > len(rows) else ''
+            print(f"  {message} ({households} households; rows {', '.join(map(str, rows))}{more})")
+
+    print(f"\nAnalysis Complete! Generated visualizations and detailed recommendations.")
+    print(f"{'=' * 70}\n")
 
 
 # --- How to use the function ---
 # Ensure your prepared CSV file (e.g., 'realistic_dummy_forms_prepared.csv')
 # is in the same directory as this script, or provide the full path to the file.
 if __name__ == '__main__':
-    print_personal_appliance_data('realistic_dummy_forms.csv')  # Or 'realistic_dummy_forms_prepared.csv'
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Household energy survey analysis")
+    parser.add_argument('file_path', nargs='?', default='realistic_dummy_forms.csv',
+                        help="Survey CSV export, or a mongodb:// URI to read the surveys collection directly "
+                             "(default: realistic_dummy_forms.csv)")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows with bounded memory")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Analyze households in this many worker processes (default: 1)")
+    parser.add_argument('--plot-dir', default=None,
+                        help="Write the plots as image files to this directory instead of showing them")
+    parser.add_argument('--plot-format', action='append', choices=PlotExporter.FORMATS, default=None,
+                        help="Image format for --plot-dir (repeatable, default: png)")
+    parser.add_argument('--plot-segments', action='append', choices=sorted(SEGMENT_COLUMNS), default=[],
+                        help="Also write breakdown figures per city or home type (repeatable)")
+    parser.add_argument('--results-dir', default=None,
+                        help="Write per-household results to a Parquet dataset partitioned by city and run date")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Skip the per-household printout; show progress and an error summary instead")
+    parser.add_argument('--report-jsonl', default=None,
+                        help="Write per-household results to this file as JSON lines")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Incremental mode: analyze only rows added since this checkpoint file and update it")
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help="With --checkpoint, reanalyze the whole file and replace the checkpoint")
+    parser.add_argument('--monte-carlo-draws', type=int, default=None,
+                        help="Estimate each household's P10/P50/P90 annual kWh from this many Monte Carlo draws")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Random seed for reproducible Monte Carlo ranges")
+    args = parser.parse_args()
+    print_personal_appliance_data(args.file_path, chunksize=args.chunksize, jobs=args.jobs,
+                                  plot_dir=args.plot_dir, plot_formats=tuple(args.plot_format or ('png',)),
+                                  plot_segments=tuple(args.plot_segments), results_dir=args.results_dir,
+                                  quiet=args.quiet, report_path=args.report_jsonl,
+                                  checkpoint_path=args.checkpoint, full_rebuild=args.full_rebuild,
+                                  monte_carlo_draws=args.monte_carlo_draws, monte_carlo_seed=args.seed)
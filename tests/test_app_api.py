@@ -1,10 +1,16 @@
 import importlib
+import json
 import os
+import random
 import sys
 import unittest
+from datetime import datetime, timedelta
 from pathlib import Path
 from types import SimpleNamespace
 
+from bson import ObjectId
+from pymongo.errors import ServerSelectionTimeoutError
+
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 BACKEND_DIR = ROOT_DIR / "app" / "backend"
@@ -22,15 +28,136 @@ class FakeSurveyCollection:
         self.inserted_documents.append(document)
         return SimpleNamespace(inserted_id="test-survey-id")
 
+    def insert_many(self, documents, ordered=True):
+        self.inserted_documents.extend(documents)
+        return SimpleNamespace(inserted_ids=[document["_id"] for document in documents])
+
+
+def matches(document, query):
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, option) for option in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = document.get(field)
+            if "$gt" in condition and not (value is not None and value > condition["$gt"]):
+                return False
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+        elif document.get(field) != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+        self.requested_batch_size = None
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.documents.sort(key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    def batch_size(self, size):
+        self.requested_batch_size = size
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+
+class DroppingCursor(FakeCursor):
+    """Yields its first documents, then loses the connection mid-iteration."""
+
+    def __iter__(self):
+        yield from self.documents
+        raise ServerSelectionTimeoutError("Connection lost")
+
+
+class DroppingSurveyCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection):
+        return DroppingCursor([dict(document) for document in self.documents])
+
+
+class UnreachableSurveyCollection:
+    def __init__(self):
+        self.calls = 0
+
+    def insert_one(self, document):
+        self.calls += 1
+        raise ServerSelectionTimeoutError("No servers available")
+
+    def find(self, query, projection):
+        self.calls += 1
+        raise ServerSelectionTimeoutError("No servers available")
+
+
+class FakeStoredSurveys:
+    def __init__(self, documents):
+        self.documents = documents
+        self.indexes = {}
+
+    def create_indexes(self, models):
+        for model in models:
+            self.indexes.setdefault(model.document["name"], dict(model.document["key"]))
+        return [model.document["name"] for model in models]
+
+    def aggregate(self, pipeline):
+        self.pipeline = pipeline
+        return [
+            {"name": name, "key": key, "accesses": {"ops": 0, "since": datetime(2026, 1, 1)}}
+            for name, key in self.indexes.items()
+        ]
+
+    def find(self, query, projection):
+        return FakeCursor([
+            {field: document[field] for field in projection if field in document}
+            for document in self.documents if matches(document, query)
+        ])
+
+
+class FakeStatsCollection:
+    def __init__(self):
+        self.documents = {}
+
+    def update_one(self, query, update, upsert=False):
+        document = self.documents.setdefault(query["_id"], {"_id": query["_id"]})
+        for path, amount in update.get("$inc", {}).items():
+            *parents, field = path.split(".")
+            target = document
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[field] = target.get(field, 0) + amount
+        document.update(update.get("$set", {}))
+
+    def replace_one(self, query, document, upsert=False):
+        self.documents[query["_id"]] = document
+
+    def find_one(self, query):
+        return self.documents.get(query["_id"])
+
 
 class FlaskApiTests(unittest.TestCase):
     def setUp(self):
         app_module.app.config["TESTING"] = True
+        app_module.CALCULATE_CACHE.clear()
+        app_module.mongodb_breaker = app_module.CircuitBreaker(failure_threshold=2, reset_timeout=3600)
         self.client = app_module.app.test_client()
 
     def tearDown(self):
         app_module.db = None
         app_module.surveys_collection = None
+        app_module.stats_collection = None
+        app_module.survey_write_buffer = None
+        app_module.mongodb_health = None
 
     def test_calculate_returns_expected_totals(self):
         response = self.client.post(
@@ -67,6 +194,73 @@ class FlaskApiTests(unittest.TestCase):
             {"Refrigerator": 2.64, "Lighting": 0.16},
         )
 
+    def test_calculate_serves_repeated_payloads_from_cache(self):
+        first = self.client.post("/api/calculate", json={"tariff": 7, "fan": {"watts": 75, "qty": 2}})
+        second = self.client.post(
+            "/api/calculate",
+            json={"fan": {"qty": "2", "watts": 75.0}, "tariff": 7, "tv": None, "unused": 1},
+        )
+        other_tariff = self.client.post("/api/calculate", json={"tariff": 8, "fan": {"watts": 75, "qty": 2}})
+
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(other_tariff.get_json()["tariff"], 8)
+        stats = self.client.get("/api/calculate/cache-stats").get_json()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 2, 2))
+
+    def test_calculate_batch_matches_single_household_results(self):
+        households = [
+            {"tariff": 7, "fridge": {"watts": 100, "duty": 0.5, "qty": 2}, "lighting": {"qty": 5}},
+            {"ac": {"watts": "1200", "eer": 0}, "tv": {"hours": 30}, "heater": {"inlet_temp": 70}},
+            {"fan": {"watts": "fast"}},
+            {},
+        ]
+
+        response = self.client.post("/api/calculate/batch", json=households)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["count"], 4)
+        for household, result in zip(households, data["results"]):
+            single = self.client.post("/api/calculate", json=household).get_json()
+            self.assertEqual(result, single)
+        self.assertIn("error", data["results"][2])
+
+    def test_calculate_batch_matches_single_household_results_for_mixed_values(self):
+        rng = random.Random(7)
+        numbers = [0, 2, 7.5, "3", " 4.5 ", "1_000", "1e3", True, -1]
+        # Rare enough that most columns convert in one pass, where None must still fail
+        unconvertible = [None, None, None, "fast", [1], {"x": 1}]
+
+        def value():
+            return rng.choice(unconvertible) if rng.random() < 0.01 else rng.choice(numbers)
+
+        keys = [key for key, _, _, _ in app_module.APPLIANCE_CALCULATORS]
+        fields = ["watts", "qty", "hours", "duty", "eer", "inlet_temp", "bulbs"]
+        households = [
+            {key: {field: value() for field in rng.sample(fields, 3)}
+             for key in rng.sample(keys, rng.randint(0, len(keys)))}
+            for _ in range(300)
+        ]
+
+        response = self.client.post("/api/calculate/batch", json=households)
+
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        singles = [self.client.post("/api/calculate", json=household).get_json() for household in households]
+        self.assertEqual(results, singles)
+        self.assertTrue(any("error" in result for result in results))
+        self.assertTrue(any("error" not in result for result in results))
+
+    def test_calculate_batch_accepts_ndjson(self):
+        body = '{"fridge": {"watts": 100}}\n\n{"tv": {"qty": 2}}\n'
+
+        response = self.client.post("/api/calculate/batch", data=body, content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 200)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["appliances"][0]["name"], "Television")
+
     def test_submit_survey_saves_to_collection(self):
         fake_collection = FakeSurveyCollection()
         app_module.db = object()
@@ -84,6 +278,204 @@ class FlaskApiTests(unittest.TestCase):
         self.assertEqual(inserted["name"], "Test User")
         self.assertIn("submitted_at", inserted)
 
+    def test_buffered_submissions_are_written_in_bulk(self):
+        fake_collection = FakeSurveyCollection()
+        app_module.db = object()
+        buffer = app_module.SurveyWriteBuffer(lambda: fake_collection, flush_batch=10, flush_interval=60)
+        app_module.survey_write_buffer = buffer
+
+        responses = [
+            self.client.post("/api/submit-survey", json={"name": f"User {i}"})
+            for i in range(3)
+        ]
+        self.assertEqual([response.status_code for response in responses], [202, 202, 202])
+        self.assertEqual(fake_collection.inserted_documents, [])
+
+        buffer.close()
+
+        self.assertEqual([document["name"] for document in fake_collection.inserted_documents],
+                         ["User 0", "User 1", "User 2"])
+        self.assertEqual(str(fake_collection.inserted_documents[0]["_id"]), responses[0].get_json()["id"])
+        self.assertEqual(buffer.stats(), {"queued": 0, "written": 3, "failed": 0, "batches": 1})
+
+    def test_get_surveys_pages_with_keyset_cursor(self):
+        start = datetime(2026, 1, 1, 9, 0)
+        documents = [
+            {"_id": ObjectId(), "submitted_at": start + timedelta(minutes=i // 2), "Q1_City": "Pune"}
+            for i in range(5)
+        ]
+        app_module.db = object()
+        app_module.surveys_collection = FakeStoredSurveys(documents)
+
+        seen, after = [], None
+        while True:
+            query = "/api/surveys?limit=2" + (f"&after={after}" if after else "")
+            page = self.client.get(query).get_json()
+            seen.extend(survey["_id"] for survey in page["surveys"])
+            after = page["next_after"]
+            if after is None:
+                break
+
+        self.assertEqual(seen, [str(document["_id"]) for document in documents])
+        self.assertEqual(self.client.get("/api/surveys?after=bogus").status_code, 400)
+
+    def test_get_surveys_streams_ndjson(self):
+        documents = [{"_id": ObjectId(), "submitted_at": datetime(2026, 1, day)} for day in (3, 1, 2)]
+        app_module.db = object()
+        app_module.surveys_collection = FakeStoredSurveys(documents)
+
+        response = self.client.get("/api/surveys?format=ndjson&batch_size=2")
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line["submitted_at"] for line in lines],
+                         ["2026-01-01T00:00:00", "2026-01-02T00:00:00", "2026-01-03T00:00:00"])
+
+    def test_get_surveys_stream_ends_with_error_line_when_connection_drops(self):
+        documents = [{"_id": ObjectId(), "submitted_at": datetime(2026, 1, day)} for day in (1, 2)]
+        app_module.db = object()
+        app_module.surveys_collection = DroppingSurveyCollection(documents)
+
+        responses = [self.client.get("/api/surveys?format=ndjson") for _ in range(2)]
+
+        for response in responses:
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            self.assertEqual(len(lines), 3)
+            self.assertEqual(lines[-1], {"error": "Connection lost"})
+        breaker = self.client.get("/health").get_json()["mongodb_circuit"]
+        self.assertEqual(breaker["state"], "open")
+        self.assertEqual(breaker["consecutive_failures"], 2)
+
+    def test_survey_indexes_are_created_once_and_reported(self):
+        collection = FakeStoredSurveys([])
+        app_module.ensure_survey_indexes(collection)
+        app_module.ensure_survey_indexes(collection)
+        app_module.db = object()
+        app_module.surveys_collection = collection
+
+        indexes = self.client.get("/api/admin/indexes").get_json()["indexes"]
+
+        self.assertEqual(len(indexes), len(app_module.SURVEY_INDEXES))
+        self.assertIn({"submitted_at": 1, "_id": 1}, [index["key"] for index in indexes])
+        self.assertEqual(collection.pipeline, [{"$indexStats": {}}])
+
+    def test_health_reports_cached_mongodb_probe_state(self):
+        pings = []
+
+        def failing_ping():
+            pings.append(1)
+            raise ConnectionError("unreachable")
+
+        probe = app_module.MongoHealthProbe(failing_ping, interval=3600)
+        probe.check()
+        probe.ensure_started = lambda: None
+        app_module.mongodb_health = probe
+
+        first = self.client.get("/health").get_json()
+        second = self.client.get("/health").get_json()
+
+        self.assertEqual(first["mongodb"], "disconnected")
+        self.assertEqual(second["mongodb_probe"]["error"], "unreachable")
+        self.assertEqual(len(pings), 1)
+
+    def test_circuit_opens_after_repeated_failures_and_fails_fast(self):
+        collection = UnreachableSurveyCollection()
+        app_module.db = object()
+        app_module.surveys_collection = collection
+
+        failures = [self.client.post("/api/submit-survey", json={"Q1_City": "Pune"}) for _ in range(2)]
+        rejected = self.client.post("/api/submit-survey", json={"Q1_City": "Pune"})
+        read = self.client.get("/api/surveys")
+
+        self.assertEqual([response.status_code for response in failures], [500, 500])
+        self.assertEqual(rejected.status_code, 503)
+        self.assertEqual(read.status_code, 503)
+        self.assertEqual(collection.calls, 2)
+        breaker = self.client.get("/health").get_json()["mongodb_circuit"]
+        self.assertEqual(breaker["state"], "open")
+        self.assertEqual(breaker["rejected"], 2)
+
+    def test_half_open_probe_closes_circuit(self):
+        breaker = app_module.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+
+        with self.assertRaises(ServerSelectionTimeoutError):
+            breaker.call(UnreachableSurveyCollection().find, {}, {})
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual([(t["from"], t["to"]) for t in breaker.transitions],
+                         [("closed", "open"), ("open", "half_open"), ("half_open", "closed")])
+
+    def test_stats_are_updated_incrementally_and_match_rebuild(self):
+        surveys = FakeSurveyCollection()
+        app_module.db = object()
+        app_module.surveys_collection = surveys
+        app_module.stats_collection = FakeStatsCollection()
+        submissions = [
+            {"Q1_City": "Pune", "Q2_num_adults": "2", "Q3_home_type": "Mobile home"},
+            {"Q1_City": "St. Louis", "Q2_num_adults": "4", "Q3_home_type": "Mobile home"},
+            {"Q1_City": "Pune", "Q2_num_adults": "", "Q3_home_type": "Own"},
+            {"Q1_City": "Pune", "Q2_num_adults": "inf", "Q3_home_type": "Own"},
+            {"Q1_City": "Pune", "Q2_num_adults": True, "Q3_home_type": "Own"},
+        ]
+        for submission in submissions:
+            self.client.post("/api/submit-survey", json=submission)
+
+        stats = self.client.get("/api/stats").get_json()
+        self.assertEqual(stats["total_surveys"], 5)
+        self.assertEqual(stats["per_city"], {"Pune": 4, "St. Louis": 1})
+        self.assertEqual(stats["per_home_type"], {"Mobile home": 2, "Own": 3})
+        self.assertEqual(sum(stats["per_day"].values()), 5)
+        self.assertEqual(stats["average_adults"], 3.0)
+
+        for index, document in enumerate(surveys.inserted_documents):
+            document["_id"] = index
+        app_module.surveys_collection = FakeStoredSurveys(surveys.inserted_documents)
+        app_module.stats_collection = FakeStatsCollection()
+        self.assertEqual(self.client.post("/api/admin/stats/rebuild").status_code, 404)
+        app_module.ADMIN_API_TOKEN = "secret"
+        self.addCleanup(setattr, app_module, "ADMIN_API_TOKEN", "")
+        unauthorized = self.client.post("/api/admin/stats/rebuild", headers={"X-Admin-Token": "guess"})
+        self.assertEqual(unauthorized.status_code, 401)
+        self.assertEqual(app_module.stats_collection.documents, {})
+        rebuilt = self.client.post("/api/admin/stats/rebuild", headers={"X-Admin-Token": "secret"}).get_json()
+
+        app_module.stats_collection = FakeStatsCollection()
+        command = app_module.app.test_cli_runner().invoke(args=["rebuild-stats"])
+
+        stats.pop("updated_at")
+        rebuilt.pop("updated_at")
+        self.assertEqual(rebuilt, stats)
+        self.assertEqual(command.exit_code, 0)
+        self.assertEqual(dict(json.loads(command.output), updated_at=None), dict(stats, updated_at=None))
+
+    def test_pages_reference_immutable_hashed_assets(self):
+        page = self.client.get("/").get_data(as_text=True)
+        asset_url = next(
+            line.split('href="')[1].split('"')[0] for line in page.splitlines() if "/assets/css/navigation." in line
+        )
+
+        response = self.client.get(asset_url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        revalidated = self.client.get(asset_url, headers={"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.get_data(), b"")
+
+        plain = self.client.get("/css/navigation.css")
+        self.assertEqual(plain.get_data(), (ROOT_DIR / "app" / "frontend" / "css" / "navigation.css").read_bytes())
+        self.assertEqual(plain.headers["Cache-Control"], "no-cache")
+
+    def test_catch_all_serves_static_files_like_the_static_route(self):
+        with app_module.app.test_request_context("/css/navigation.css", headers={"Accept-Encoding": "gzip"}):
+            response = app_module.catch_all("css/navigation.css")
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+        self.assertIn("ETag", response.headers)
+
     def test_submit_survey_rejects_empty_request(self):
         response = self.client.post("/api/submit-survey", json=None)
 
@@ -0,0 +1,97 @@
+import sys
+import unittest
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT_DIR / "app" / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from models.air_conditioner import AirConditioner
+from models.refrigerator import Refrigerator
+from models.thermostat import ABOVE, BELOW, simulate_thermostat
+from models.water_heater import WaterHeater
+
+
+def power_intervals(activity_log):
+    intervals = []
+    for step, power in enumerate(activity_log):
+        if intervals and intervals[-1][2] == power:
+            intervals[-1] = (intervals[-1][0], step + 1, power)
+        else:
+            intervals.append((step, step + 1, power))
+    return intervals
+
+
+class ThermostatEngineTests(unittest.TestCase):
+    def test_matches_per_step_updates(self):
+        temp, is_on, on_steps = 28.0, False, 0
+        for _ in range(5000):
+            if temp > 23.0:
+                is_on = True
+            elif temp < 21.0:
+                is_on = False
+            temp += 0.01 * (35.0 - temp) + (-0.6 if is_on else 0.0)
+            on_steps += is_on
+
+        result = simulate_thermostat(28.0, False, 5000, 0.01, 35.0, -0.6, (ABOVE, 23.0), (BELOW, 21.0))
+
+        self.assertEqual(result["on_steps"], on_steps)
+        self.assertEqual(result["is_on"], is_on)
+        self.assertAlmostEqual(result["temp"], temp, places=8)
+
+    def test_repeating_cycle_is_replayed_exactly(self):
+        result = simulate_thermostat(28.0, False, 100000, 0.05, 35.0, -1.05, (ABOVE, 23.0), (BELOW, 21.0))
+        intervals = result["intervals"]
+
+        self.assertEqual(intervals[0][0], 0)
+        self.assertEqual(intervals[-1][1], 100000)
+        self.assertTrue(all(previous[1] == current[0] for previous, current in zip(intervals, intervals[1:])))
+        self.assertTrue(all(previous[2] != current[2] for previous, current in zip(intervals, intervals[1:])))
+        self.assertEqual(result["on_steps"], sum(end - start for start, end, on in intervals if on))
+
+
+class EventDrivenModelTests(unittest.TestCase):
+    def assert_same_run(self, stepped, event_driven, intervals, energy_attribute):
+        self.assertEqual(intervals, power_intervals(stepped.activity_log))
+        self.assertAlmostEqual(getattr(event_driven, energy_attribute), getattr(stepped, energy_attribute), places=6)
+        self.assertEqual(event_driven.activity_log, [])
+
+    def test_air_conditioner_matches_simulate_step(self):
+        stepped, event_driven = AirConditioner(), AirConditioner()
+        for _ in range(3 * 1440):
+            stepped.simulate_step()
+
+        intervals = event_driven.simulate_events(3 * 1440)
+
+        self.assert_same_run(stepped, event_driven, intervals, "energy_used_wh")
+        self.assertEqual(event_driven.is_on, stepped.is_on)
+        self.assertAlmostEqual(event_driven.temp_room, stepped.temp_room, places=8)
+
+    def test_refrigerator_matches_simulate_step(self):
+        stepped, event_driven = Refrigerator(), Refrigerator()
+        for _ in range(3 * 1440):
+            stepped.simulate_step()
+
+        intervals = event_driven.simulate_events(3 * 1440)
+
+        self.assert_same_run(stepped, event_driven, intervals, "energy_used")
+        self.assertAlmostEqual(event_driven.temp_inside, stepped.temp_inside, places=8)
+
+    def test_water_heater_matches_simulate_step_with_daily_showers(self):
+        stepped, event_driven = WaterHeater(), WaterHeater()
+        for step in range(3 * 1440):
+            minute_of_day = (6 * 60 + step) % 1440
+            stepped.simulate_step(minute_of_day // 60, minute_of_day % 60)
+
+        intervals = event_driven.simulate_events(3 * 1440, start_hour=6)
+
+        self.assert_same_run(stepped, event_driven, intervals, "energy_used_wh")
+        self.assertEqual(event_driven.is_heating, stepped.is_heating)
+        self.assertAlmostEqual(event_driven.temp_water, stepped.temp_water, places=8)
+        # One reheat after the initial warm-up for each of the three 8:00 showers
+        self.assertEqual(sum(1 for start, end, power in intervals if power), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,151 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
 import sys
+import tempfile
 import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
 from pathlib import Path
+from unittest import mock
 
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT_DIR))
 
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from bson import ObjectId  # noqa: E402
+
+try:
+    import pyarrow.dataset as pyarrow_dataset
+except ImportError:  # Optional dependency of the results store
+    pyarrow_dataset = None
+
 from survey_analytics.survey_analysis import (  # noqa: E402
+    ELECTRICITY_CATEGORIES,
+    AnalysisCheckpoint,
+    MONTE_CARLO_DISTRIBUTIONS,
+    AC_AGE_CODES,
+    APPLIANCE_POWER_TYPICAL,
+    ApplianceSimulator,
+    BatchApplianceSimulator,
+    SimulationCache,
+    WaterHeaterModel,
     EnergyConsumptionCosts,
+    PlotElectricityUse,
+    PlotExporter,
+    SURVEY_FIELDS,
+    _pyplot,
+    breakdown_row_to_dict,
+    clean_numeric_columns,
+    compute_household_report,
+    count_unrecognized_answers,
+    estimate_annual_electricity_consumption_frame,
+    household_reports,
+    outdoor_temperatures,
+    print_personal_appliance_data,
+    read_hourly_climatology,
     safe_numeric_conversion,
+    simulate_electricity_ranges,
 )
 
 
+def write_survey_csv(directory, num_rows=12):
+    rows = []
+    for i in range(num_rows):
+        rows.append({
+            "Q0_name": f"Person {i}",
+            "Q1_City": "Pune" if i % 2 else "Mumbai",
+            "Q2_num_adults": i % 4,
+            "Q4_ownership": "Owned" if i % 2 else "Rented",
+            "Q5_year_built": 1980 + i,
+            "Q6_move_in_year": 2000 + i,
+            "Q7_sq_ft_home": 800 + 50 * i,
+            "Q9_num_refrigerators": 1,
+            "Q10_refrigerator_size": "Medium (17.6 to 22.5 cubic feet)",
+            "Q37_has_ac": "Yes" if i % 3 == 0 else "No",
+            "Q38_uses_central_ac": "Yes",
+            "Q42_num_ceiling_fans": i % 3,
+            "Q60_num_lpg_propane_cylinders_year": 6,
+            "Q62_last_electricity_consumption": 400.0 if i % 2 else None,
+        })
+    path = Path(directory) / "survey.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+class FakeSurveyCursor:
+    def __init__(self, documents):
+        self.documents = documents
+        self.requested_batch_size = None
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.documents.sort(key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        self.requested_batch_size = size
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+
+class FakeSurveyCollection:
+    """In-process stand-in for the backend's surveys collection."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append((query, projection))
+        self.cursor = FakeSurveyCursor([
+            {field: document[field] for field in projection if field in document}
+            for document in self.documents
+            if all(document.get(field) >= condition["$gte"] for field, condition in query.items())
+        ])
+        return self.cursor
+
+
+def survey_documents(df):
+    """The survey rows as the backend stores them: typed answers, "" when unanswered."""
+    started = datetime(2026, 10, 1, 9, 0)
+    return [
+        dict({column: "" if pd.isna(value) else value for column, value in row.items()},
+             _id=ObjectId(), submitted_at=started + timedelta(minutes=i), browser_fingerprint="x" * 100)
+        for i, row in enumerate(df.to_dict("records"))
+    ]
+
+
+def run_analysis(*args, **kwargs):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        print_personal_appliance_data(*args, **kwargs)
+    return output.getvalue()
+
+
 class SurveyAnalysisTests(unittest.TestCase):
     def test_safe_numeric_conversion_cleans_currency_and_commas(self):
         self.assertEqual(safe_numeric_conversion("50,000"), 50000)
         self.assertEqual(safe_numeric_conversion("not a number", default=7), 7)
 
+    def test_clean_numeric_columns_matches_scalar_conversion(self):
+        answers = [None, np.nan, 5, 2.5, "7", " 3.0 ", "₹1,200", "-3", "1e3", ".", "", "²", ".5", "nan", "4."]
+        df = pd.DataFrame({"Q2_num_adults": answers, "Q29_tv_daily_hours": list(range(len(answers)))})
+
+        cleaned = clean_numeric_columns(df, default=-1)
+
+        expected = [float(safe_numeric_conversion(value, -1)) for value in answers]
+        np.testing.assert_array_equal(cleaned["Q2_num_adults"].to_numpy(), expected)
+        np.testing.assert_array_equal(cleaned["Q29_tv_daily_hours"], df["Q29_tv_daily_hours"])
+        self.assertTrue(cleaned["Q47_num_light_bulbs_total"].isna().all())
+        self.assertEqual(df["Q2_num_adults"].tolist()[4], "7")
+
     def test_estimate_annual_electricity_consumption_breakdown(self):
         row = {
             "Q9_num_refrigerators": 1,
@@ -48,6 +177,477 @@ class SurveyAnalysisTests(unittest.TestCase):
         self.assertAlmostEqual(breakdown["Water Heater (Electric)"], 730.0)
         self.assertAlmostEqual(total_kwh, sum(breakdown.values()))
 
+    def test_frame_estimate_matches_per_row_estimate(self):
+        df = pd.DataFrame({
+            "Q2_num_adults": [2, np.nan, "3", "x"],
+            "Q9_num_refrigerators": [1, "2", 0, np.nan],
+            "Q10_refrigerator_size": ["Large (22.6 to 29.5 cubic feet)", "Half-size or compact", np.nan, "Other"],
+            "Q12_refrigerator_age": ["10 to 14 years old", "Don't know", "2 to 4 years old", np.nan],
+            "Q37_has_ac": ["Yes", "Yes", "No", np.nan],
+            "Q38_uses_central_ac": ["Yes", "No", "Yes", "Yes"],
+            "Q40_central_ac_age": ["5 to 9 years old", np.nan, np.nan, np.nan],
+            "Q42_num_ceiling_fans": [3, 0, "1", np.nan],
+            "Q47_num_light_bulbs_total": ["2.5", 10, 0, 6],
+            "Q48_num_light_bulbs_4hr_plus": ["2", 4, 0, np.nan],
+            "Q49_LED__light_emitting_diode_": ["No", "Yes", np.nan, "No"],
+            "Q49_Incandescent": ["Yes", "No", np.nan, "No"],
+            "Q26_num_televisions": [2, 1, 1, 0],
+            "Q27_tv_size": ["60 inches or larger", "Less than 27 inches", np.nan, np.nan],
+            "Q28_tv_type": ["OLED", "CRT", "Plasma", np.nan],
+            "Q29_tv_daily_hours": [3.5, "₹2", 0, 4],
+            "Q19_has_clothes_washer": ["Yes", "Yes", "No", "Yes"],
+            "Q20_clothes_washer_usage": ["1,5", 2, 3, np.nan],
+            "Q30_num_laptop_computers": [1, np.nan, "2", 0],
+            "Q32_has_wireless_router": ["Yes", "No", "Yes", np.nan],
+            "Q18_Coffee_maker": ["Yes", "No", np.nan, "Yes"],
+            "Q18_Rice_cooker": ["Yes", "Yes", "No", np.nan],
+        })
+
+        totals, breakdowns = estimate_annual_electricity_consumption_frame(df)
+
+        self.assertEqual(list(breakdowns.columns), ELECTRICITY_CATEGORIES)
+        for index, row in df.iterrows():
+            total_kwh, breakdown = EnergyConsumptionCosts(row).estimate_annual_electricity_consumption()
+            self.assertEqual(breakdown_row_to_dict(breakdowns.loc[index]), breakdown)
+            self.assertEqual(list(breakdown_row_to_dict(breakdowns.loc[index])), list(breakdown))
+            self.assertEqual(totals.loc[index], total_kwh)
+
+    def test_frame_estimate_keeps_per_row_carbon_footprint(self):
+        rng = np.random.default_rng(7)
+        size = 300
+
+        def answers(*choices):
+            return [choices[i] for i in rng.integers(len(choices), size=size)]
+
+        df = pd.DataFrame({
+            "Q2_num_adults": answers(1, 2, "3", np.nan),
+            "Q9_num_refrigerators": answers(0, 1, 2, "1"),
+            "Q10_refrigerator_size": answers("Large (22.6 to 29.5 cubic feet)", "Half-size or compact",
+                                             "Medium (17.6 to 22.5 cubic feet)"),
+            "Q12_refrigerator_age": answers("10 to 14 years old", "2 to 4 years old", "Less than 2 years old"),
+            "Q37_has_ac": answers("Yes", "No"),
+            "Q38_uses_central_ac": answers("Yes", "No"),
+            "Q40_central_ac_age": answers("5 to 9 years old", "20 years or older", np.nan),
+            "Q42_num_ceiling_fans": answers(0, 1, 3, "2", np.nan),
+            "Q47_num_light_bulbs_total": rng.integers(0, 25, size=size),
+            "Q48_num_light_bulbs_4hr_plus": answers(0, 2, "5", np.nan),
+            "Q49_LED__light_emitting_diode_": answers("Yes", "No"),
+            "Q49_Incandescent": answers("Yes", "No"),
+            "Q26_num_televisions": answers(0, 1, 2, "1"),
+            "Q27_tv_size": answers("60 inches or larger", "40 to 59 inches", "Less than 27 inches"),
+            "Q28_tv_type": answers("OLED", "LED", "Plasma", "CRT"),
+            "Q29_tv_daily_hours": np.round(rng.uniform(0, 9, size=size), 1),
+            "Q43_has_water_heater": answers("Yes", "No"),
+            "Q46_water_heater_fuel": answers("Electricity", "LPG"),
+            "Q19_has_clothes_washer": answers("Yes", "No"),
+            "Q20_clothes_washer_usage": answers(1, 3, "2", np.nan),
+            "Q30_num_laptop_computers": answers(0, 1, "2"),
+            "Q32_has_wireless_router": answers("Yes", "No"),
+            "Q18_Coffee_maker": answers("Yes", "No"),
+            # Without a bill the uncalibrated estimate is reported, so its types reach the rounding
+            "Q62_last_electricity_consumption": np.where(rng.random(size) < 0.5, np.nan,
+                                                         np.round(rng.uniform(100, 900, size=size), 1)),
+        })
+
+        totals, breakdowns = estimate_annual_electricity_consumption_frame(df)
+        # Sharding or re-slicing the frame must not change the result
+        shard_totals, shard_breakdowns = estimate_annual_electricity_consumption_frame(
+            pd.concat([df.iloc[1::2], df.iloc[::2]]))
+
+        for index, row in df.iterrows():
+            expected = compute_household_report(index, row, *EnergyConsumptionCosts(row)
+                                                .estimate_annual_electricity_consumption())
+            breakdown = breakdown_row_to_dict(breakdowns.loc[index])
+            report = compute_household_report(index, row, float(totals.loc[index]), breakdown)
+            self.assertEqual(report["carbon_data"], expected["carbon_data"])
+            self.assertEqual(breakdown, expected["uncalibrated_kwh"])
+            self.assertEqual(breakdown_row_to_dict(shard_breakdowns.loc[index]), breakdown)
+            self.assertEqual(shard_totals.loc[index], totals.loc[index])
+
+    def test_frame_estimate_accepts_cleaned_frame(self):
+        with tempfile.TemporaryDirectory() as directory:
+            df = pd.read_csv(write_survey_csv(directory, num_rows=20))
+        df["Q2_num_adults"] = df["Q2_num_adults"].astype(str).radd("₹")
+
+        raw_total, raw_breakdown = estimate_annual_electricity_consumption_frame(df)
+        total, breakdown = estimate_annual_electricity_consumption_frame(clean_numeric_columns(df))
+
+        pd.testing.assert_series_equal(total, raw_total)
+        pd.testing.assert_frame_equal(breakdown, raw_breakdown)
+
+    def test_monte_carlo_ranges_bracket_the_typical_estimate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            df = pd.read_csv(write_survey_csv(directory))
+        df["Q47_num_light_bulbs_total"] = [10, 0, 6] * 4
+        df["Q48_num_light_bulbs_4hr_plus"] = [4, 0, 6] * 4
+        total_kwh, breakdown = estimate_annual_electricity_consumption_frame(df)
+
+        certain = {name: ("uniform", 1.0, 1.0) for name in MONTE_CARLO_DISTRIBUTIONS}
+        typical = simulate_electricity_ranges(df, draws=20, seed=1, distributions=certain)
+        for category in ELECTRICITY_CATEGORIES:
+            for label in ("P10", "P50", "P90"):
+                np.testing.assert_allclose(typical[(category, label)], breakdown[category], atol=0.01)
+        np.testing.assert_allclose(typical[("Total", "P50")], total_kwh, atol=0.01)
+
+        ranges = simulate_electricity_ranges(df, draws=4000, seed=7, block_elements=10_000)
+        self.assertTrue((ranges[("Total", "P10")] < total_kwh).all())
+        self.assertTrue((ranges[("Total", "P90")] > total_kwh).all())
+        self.assertTrue((ranges[("Lighting", "P10")].dropna() < ranges[("Lighting", "P90")].dropna()).all())
+        self.assertTrue(ranges[("Clothes Dryer (Electric)", "P50")].isna().all())
+
+        # Seeded draws are shared by all households, so chunking does not change any range
+        chunked = pd.concat([simulate_electricity_ranges(df.iloc[:5], draws=4000, seed=7),
+                             simulate_electricity_ranges(df.iloc[5:], draws=4000, seed=7)])
+        pd.testing.assert_frame_equal(chunked, ranges)
+        with self.assertRaises(ValueError):
+            simulate_electricity_ranges(df, draws=10, distributions={"AC_Power": ("gamma", 2.0)})
+
+    def test_answer_code_tables_classify_and_report_unrecognized(self):
+        df = pd.DataFrame({
+            "Q40_central_ac_age": ["5 to 9 years old", "Don't know", "ancient", "ancient", np.nan],
+            "Q28_tv_type": ["OLED (organic light-emitting diode)", "CRT", "Other (please specify)", "Projector", ""],
+        })
+
+        np.testing.assert_array_equal(AC_AGE_CODES.codes(df), [2, 6, 6, 6, 6])
+        self.assertEqual(AC_AGE_CODES.factor("5 To 9 Years Old"), APPLIANCE_POWER_TYPICAL["AC_Age_5_9_Factor"])
+        self.assertEqual(count_unrecognized_answers(df), {
+            "Q40_central_ac_age": {"ancient": 2},
+            "Q28_tv_type": {"Projector": 1},
+        })
+
+    def test_chunked_analysis_matches_full_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_survey_csv(directory)
+            full_output = run_analysis(str(path))
+            chunked_output = run_analysis(str(path), chunksize=5)
+
+        def households(output):
+            return output[output.index("Energy Consumption Data for Person"):]
+
+        self.assertIn("Total Households Analyzed: 12", chunked_output)
+        self.assertEqual(households(chunked_output), households(full_output))
+
+    def test_parallel_analysis_matches_serial_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_survey_csv(directory)
+            serial_output = run_analysis(str(path))
+            parallel_output = run_analysis(str(path), jobs=2)
+
+        self.assertEqual(parallel_output, serial_output)
+
+    def test_plot_exporter_writes_segment_figures_in_background(self):
+        breakdown = {"Refrigerator": 600.0, "Lighting": 200.0}
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = PlotExporter(directory, formats=("png", "svg"), segments=("city",))
+            try:
+                exporter.submit("plot_combined_energy_breakdowns", "energy_breakdown", breakdown, breakdown)
+                exporter.submit("plot_combined_energy_breakdowns", "energy_breakdown", breakdown, breakdown,
+                                segment=("city", "New Delhi"))
+                written, failed = exporter.wait()
+            finally:
+                exporter.close()
+
+            self.assertEqual(failed, {})
+            self.assertEqual(sorted(Path(path).relative_to(directory).as_posix() for path in written), [
+                "city/New_Delhi/energy_breakdown.png",
+                "city/New_Delhi/energy_breakdown.svg",
+                "energy_breakdown.png",
+                "energy_breakdown.svg",
+            ])
+            self.assertTrue(all(Path(path).stat().st_size > 0 for path in written))
+
+    def test_render_workers_use_agg_whatever_backend_is_configured(self):
+        script = (
+            "from survey_analytics.survey_analysis import _init_render_worker\n"
+            "_init_render_worker()\n"
+            "import matplotlib\n"
+            "print(matplotlib.get_backend())\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, capture_output=True, text=True,
+                                check=True, env=dict(os.environ, MPLBACKEND="TkAgg"))
+
+        self.assertEqual(result.stdout.strip().lower(), "agg")
+
+    def test_shown_figures_are_closed(self):
+        breakdown = {"Refrigerator": 600.0, "Lighting": 200.0}
+        plotter = PlotElectricityUse()
+        plt = _pyplot()
+        plt.close("all")
+
+        for _ in range(3):
+            plotter.plot_combined_energy_breakdowns(breakdown, breakdown)
+
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_quiet_run_writes_json_lines_and_summarizes_errors(self):
+        def year_range_failing_for_renters(home_characteristics):
+            if home_characteristics.ownership == "Rented":
+                raise ValueError("unreadable move-in year")
+            return None
+
+        progress = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch("survey_analytics.survey_analysis.household_year_range",
+                           side_effect=year_range_failing_for_renters), \
+                contextlib.redirect_stderr(progress):
+            path = write_survey_csv(directory)
+            report_path = Path(directory) / "reports.jsonl"
+            output = run_analysis(str(path), quiet=True, report_path=str(report_path))
+            reports = [json.loads(line) for line in report_path.read_text(encoding="utf-8").splitlines()]
+            yielded = list(household_reports(str(path), chunksize=5))
+
+        self.assertNotIn("Energy Consumption Data for Person", output)
+        self.assertNotIn("Traceback", output + progress.getvalue())
+        self.assertIn("Total Households Analyzed: 12", output)
+        self.assertIn("Households Skipped After Errors: 6", output)
+        self.assertIn("ValueError: unreadable move-in year (6 households; rows 1, 3, 5, 7, 9, ...)", output)
+        self.assertIn("Analyzed 12/12 households (100%)", progress.getvalue())
+        self.assertEqual([report["name"] for report in reports], [f"Person {i}" for i in range(1, 12, 2)])
+        self.assertEqual([(report["household"], report["total_btu"]) for report in yielded],
+                         [(report["household"], report["total_btu"]) for report in reports])
+        self.assertEqual(reports[0]["total_annual_cost"], sum(reports[0]["annual_cost"].values()))
+
+    def test_incremental_runs_match_a_full_run(self):
+        def summary(output):
+            return output[output.index("COMPREHENSIVE SURVEY ANALYSIS"):]
+
+        with tempfile.TemporaryDirectory() as directory:
+            survey = pd.read_csv(write_survey_csv(directory))
+            survey["submitted_at"] = [f"2026-10-{1 + i // 5:02d}T09:00:0{i % 5}" for i in range(len(survey))]
+            survey["_id"] = [f"{i:024x}" for i in range(len(survey))]
+            path, checkpoint = Path(directory) / "export.csv", Path(directory) / "checkpoint.json"
+            full_output = run_analysis(str(path.with_name("survey.csv")))
+
+            survey.iloc[:8].to_csv(path, index=False)
+            run_analysis(str(path), checkpoint_path=str(checkpoint))
+            # The next export has four new rows but lost an old one, so new rows are found by key
+            survey.drop(index=3).to_csv(path, index=False)
+            incremental_output = run_analysis(str(path), checkpoint_path=str(checkpoint), chunksize=5)
+            repeated_output = run_analysis(str(path), checkpoint_path=str(checkpoint))
+            rebuilt_output = run_analysis(str(path), checkpoint_path=str(checkpoint), full_rebuild=True)
+
+        self.assertIn("Checkpoint saved to", incremental_output)
+        self.assertIn("(4 new households, 12 in total)", incremental_output)
+        self.assertEqual(summary(incremental_output), summary(full_output))
+        self.assertIn("(0 new households, 12 in total)", repeated_output)
+        self.assertEqual(summary(repeated_output), summary(full_output))
+        self.assertIn("(11 new households, 11 in total)", rebuilt_output)
+
+    def test_resumed_run_keeps_file_row_numbers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            survey = pd.read_csv(write_survey_csv(directory, num_rows=7))
+            survey["submitted_at"] = [f"2026-10-01T09:00:0{i}" for i in range(len(survey))]
+            path, checkpoint = Path(directory) / "export.csv", Path(directory) / "checkpoint.json"
+            first_reports, second_reports = Path(directory) / "first.jsonl", Path(directory) / "second.jsonl"
+            survey.iloc[:4].to_csv(path, index=False)
+            run_analysis(str(path), checkpoint_path=str(checkpoint), quiet=True, report_path=str(first_reports))
+            survey.to_csv(path, index=False)
+            output = run_analysis(str(path), checkpoint_path=str(checkpoint), chunksize=2,
+                                  report_path=str(second_reports))
+            first = [json.loads(line) for line in first_reports.read_text(encoding="utf-8").splitlines()]
+            second = [json.loads(line) for line in second_reports.read_text(encoding="utf-8").splitlines()]
+
+        self.assertEqual([report["household"] for report in first], ["0", "1", "2", "3"])
+        self.assertEqual([(report["household"], report["row_number"]) for report in second],
+                         [("4", 5), ("5", 6), ("6", 7)])
+        self.assertIn("Energy Consumption Data for Person: Person 4 (Row 5)", output)
+
+    def test_checkpoint_for_another_file_suggests_a_full_rebuild(self):
+        with tempfile.TemporaryDirectory() as directory:
+            survey = pd.read_csv(write_survey_csv(directory, num_rows=6))
+            survey["submitted_at"] = [f"2026-10-01T09:00:0{i}" for i in range(len(survey))]
+            path, checkpoint = Path(directory) / "export.csv", Path(directory) / "checkpoint.json"
+            survey.iloc[:4].to_csv(path, index=False)
+            run_analysis(str(path), checkpoint_path=str(checkpoint), quiet=True)
+            # The export no longer has the column the checkpoint's position is keyed on
+            survey.drop(columns="submitted_at").to_csv(path, index=False)
+            output = run_analysis(str(path), checkpoint_path=str(checkpoint))
+
+        self.assertIn(f"Error: the checkpoint {checkpoint} does not match {path}", output)
+        self.assertIn("--full-rebuild", output)
+        self.assertNotIn("An unexpected error occurred", output)
+
+    def test_checkpoint_save_rejects_unserializable_values_without_leftovers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "checkpoint.json"
+            AnalysisCheckpoint(rows=np.int64(3), last_key=["2026-10-01T09:00:00", "a"]).save(path)
+
+            with self.assertRaises(TypeError):
+                AnalysisCheckpoint(rows=4, last_key=[Decimal("1.5")]).save(path)
+
+            self.assertEqual(os.listdir(directory), ["checkpoint.json"])
+            self.assertEqual(AnalysisCheckpoint.load(path).rows, 3)
+
+    def test_mongodb_source_matches_csv_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            survey = pd.read_csv(write_survey_csv(directory))
+            documents = survey_documents(survey)
+            export = survey.assign(_id=[str(document["_id"]) for document in documents],
+                                   submitted_at=[document["submitted_at"].isoformat() for document in documents])
+            export_path = Path(directory) / "export.csv"
+            export.to_csv(export_path, index=False)
+            csv_output = run_analysis(str(export_path))
+
+            collection = FakeSurveyCollection(documents[:8])
+            checkpoint = Path(directory) / "checkpoint.json"
+            run_analysis(collection, chunksize=5, checkpoint_path=str(checkpoint))
+            collection.documents = documents
+            incremental_output = run_analysis(collection, chunksize=5, checkpoint_path=str(checkpoint))
+            mongodb_output = run_analysis(FakeSurveyCollection(list(reversed(documents))), chunksize=5)
+
+        def households(output):
+            return output[output.index("Energy Consumption Data for Person"):]
+
+        self.assertIn("Reading surveys from MongoDB in batches of 5 documents.", mongodb_output)
+        self.assertEqual(households(mongodb_output), households(csv_output))
+        query, projection = collection.queries[-1]
+        self.assertEqual(query, {"submitted_at": {"$gte": documents[7]["submitted_at"]}})
+        self.assertEqual(set(projection), set(SURVEY_FIELDS))
+        self.assertEqual(collection.cursor.requested_batch_size, 5)
+        self.assertIn("(4 new households, 12 in total)", incremental_output)
+        self.assertEqual(incremental_output[incremental_output.index("COMPREHENSIVE SURVEY ANALYSIS"):],
+                         csv_output[csv_output.index("COMPREHENSIVE SURVEY ANALYSIS"):])
+
+    @unittest.skipIf(pyarrow_dataset is None, "pyarrow is not installed")
+    def test_results_store_writes_city_partitions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results_dir = Path(directory) / "results"
+            output = run_analysis(str(write_survey_csv(directory)), results_dir=str(results_dir))
+
+            table = pyarrow_dataset.dataset(results_dir, partitioning="hive").to_table().sort_by("row_number")
+            partitions = sorted(path.name for path in results_dir.iterdir())
+
+        self.assertIn("Household results written to", output)
+        self.assertEqual(partitions, ["city=Mumbai", "city=Pune"])
+        self.assertEqual(table.num_rows, 12)
+        self.assertEqual(table.column("city").to_pylist()[:2], ["Mumbai", "Pune"])
+        first = table.slice(0, 1).to_pylist()[0]
+        self.assertEqual(first["kwh_refrigerator"] + first["kwh_air_conditioning"] + first["kwh_other_use"],
+                         first["total_kwh_calibrated"])
+        self.assertIsNone(first["kwh_ceiling_fans"])
+        self.assertEqual(first["top_consumers"][0]["appliance"], "Air Conditioning")
+
+    def test_batch_simulator_matches_appliance_simulator(self):
+        daily_energy, hourly_df = ApplianceSimulator().simulate_24_hours()
+
+        batch_energy, power = BatchApplianceSimulator(3, living_room_bulbs=[4, 8, 4]).simulate_24_hours()
+
+        self.assertEqual(power.shape, (3, 96, len(BatchApplianceSimulator.APPLIANCES)))
+        self.assertEqual(batch_energy.iloc[0].to_dict(), daily_energy)
+        self.assertEqual(batch_energy.iloc[2].to_dict(), daily_energy)
+        self.assertAlmostEqual(batch_energy.loc[1, 'Living_Room_Lights'], 2 * daily_energy['Living_Room_Lights'])
+        batch_hourly_df = BatchApplianceSimulator.hourly_data(power, 0)
+        self.assertEqual(list(batch_hourly_df.columns), list(hourly_df.columns))
+        np.testing.assert_array_equal(batch_hourly_df.to_numpy(dtype=float), hourly_df.to_numpy(dtype=float))
+
+    def test_year_simulation_follows_the_outdoor_temperature_series(self):
+        day_night = np.array([28.0 if 8 <= hour <= 18 else 24.0 for hour in range(24)])
+        simulator = BatchApplianceSimulator(2, living_room_bulbs=[4, 8])
+        _, power = simulator.simulate_24_hours()
+
+        annual_energy, profiles = simulator.simulate_year(np.tile(day_night, 365), water_inlet_temp=25.0,
+                                                          water_heater_substeps=1, dtype=np.float32)
+
+        self.assertEqual(profiles.shape, (2, BatchApplianceSimulator.HOURS_PER_YEAR,
+                                          len(BatchApplianceSimulator.APPLIANCES)))
+        self.assertEqual(profiles.dtype, np.float32)
+        # The first day is the 24-hour run averaged per hour
+        np.testing.assert_allclose(profiles[:, :24], power.reshape(2, 24, 4, -1).mean(axis=2), rtol=1e-6)
+        np.testing.assert_allclose(annual_energy.to_numpy(),
+                                   profiles.sum(axis=1, dtype=float)[:, [BatchApplianceSimulator.APPLIANCES.index(name)
+                                                                         for name in annual_energy.columns]])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "climatology.csv"
+            hours = np.arange(BatchApplianceSimulator.HOURS_PER_YEAR)
+            pd.DataFrame({
+                "hour": hours,
+                "Mumbai": 30 + 4 * np.sin(2 * np.pi * (hours / len(hours) - 0.25)),
+                "Shimla": 12 + 8 * np.sin(2 * np.pi * (hours / len(hours) - 0.25)),
+            }).to_csv(path, index=False)
+            climatology = read_hourly_climatology(path)
+
+        outdoor = outdoor_temperatures([" mumbai", "Shimla", "Atlantis", np.nan], climatology)
+        np.testing.assert_array_equal(outdoor[0], climatology["Mumbai"].to_numpy())
+        np.testing.assert_allclose(outdoor[2], climatology.mean(axis=1).to_numpy())
+        np.testing.assert_array_equal(outdoor[3], outdoor[2])
+
+        annual_energy, profiles = BatchApplianceSimulator(2).simulate_year(outdoor[:2])
+        daily_ac = profiles[:, :, 0].reshape(2, 365, 24).sum(axis=2)
+        self.assertGreater(annual_energy.loc[0, "AC"], 10 * annual_energy.loc[1, "AC"])
+        self.assertGreater(daily_ac[0, 180], daily_ac[0, 0])
+        # One-minute water heater control resolves the colder refill water of winter in Shimla
+        daily_water_heater = profiles[:, :, BatchApplianceSimulator.APPLIANCES.index("Water_Heater")].reshape(
+            2, 365, 24).sum(axis=2)
+        self.assertGreater(daily_water_heater[1, 0], daily_water_heater[0, 0])
+        self.assertGreater(daily_water_heater[1, 0], daily_water_heater[1, 180])
+
+        with self.assertRaises(ValueError):
+            BatchApplianceSimulator(1).simulate_year(np.full(30, 25.0))
+
+    def test_year_simulation_standby_loss_works_against_the_room(self):
+        class LeakyWaterHeater(WaterHeaterModel):
+            def __init__(self):
+                super().__init__()
+                self.insulation_k = 5.0
+
+        def stepped_reference(step_minutes):
+            # The water heater model in a 25 °C room, refilled with 10 °C water at 8:00
+            heater = LeakyWaterHeater()
+            for hour in range(48):
+                for minute in range(0, 60, step_minutes):
+                    if hour % 24 == 8 and minute == 0:
+                        heater.temp_water = (heater.temp_water * (1 - 15 / heater.capacity)
+                                             + 10.0 * 15 / heater.capacity)
+                    heater.simulate_step(-1, minute, step_minutes * 60)
+            return np.reshape(heater.activity_log, (48, -1)).mean(axis=1)
+
+        with mock.patch("survey_analytics.survey_analysis.WaterHeaterModel", LeakyWaterHeater):
+            _, coarse = BatchApplianceSimulator(1).simulate_year(np.full(48, 0.0), water_inlet_temp=10.0,
+                                                                 water_heater_substeps=1)
+            _, profiles = BatchApplianceSimulator(1).simulate_year(np.full(48, 0.0), water_inlet_temp=10.0)
+
+        water_heater = BatchApplianceSimulator.APPLIANCES.index("Water_Heater")
+        np.testing.assert_allclose(coarse[0, :, water_heater], stepped_reference(BatchApplianceSimulator.STEP_MINUTES))
+        # The default one-minute control, jumped between thermostat switches, matches stepping every minute
+        np.testing.assert_allclose(profiles[0, :, water_heater], stepped_reference(1))
+
+    def test_simulation_cache_reuses_identical_configurations(self):
+        cache = SimulationCache(maxsize=1)
+        daily_energy, hourly_df = ApplianceSimulator().simulate_24_hours()
+
+        cached_energy, cached_hourly_df = cache.simulate_24_hours(ApplianceSimulator())
+        cache.simulate_24_hours(ApplianceSimulator())
+        modified = ApplianceSimulator()
+        modified.appliances['AC'].power_watt = 1500
+        cache.simulate_24_hours(modified)
+
+        self.assertEqual(cached_energy, daily_energy)
+        self.assertTrue(cached_hourly_df.equals(hourly_df))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 2, 'size': 1, 'maxsize': 1})
+
+
+# Seconds the module may take to import on top of pandas and NumPy (about 0.05 s when
+# measured; importing matplotlib.pyplot eagerly took over 0.5 s)
+IMPORT_BUDGET_SECONDS = float(os.environ.get("SURVEY_ANALYSIS_IMPORT_BUDGET", 0.3))
+
+
+class ImportTimeTests(unittest.TestCase):
+    def test_import_stays_within_budget_without_matplotlib(self):
+        script = (
+            "import sys, time\n"
+            "import numpy, pandas\n"
+            "started = time.perf_counter()\n"
+            "import survey_analytics.survey_analysis\n"
+            "print(time.perf_counter() - started, 'matplotlib' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, capture_output=True,
+                                text=True, check=True)
+        elapsed, matplotlib_loaded = result.stdout.split()
+
+        self.assertEqual(matplotlib_loaded, "False")
+        self.assertLess(float(elapsed), IMPORT_BUDGET_SECONDS)
+
 
 if __name__ == "__main__":
     unittest.main()